@@ -0,0 +1,56 @@
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/..'))
+from src.costfunctions.type1 import Type1
+from src.metrics.distance_metrics import euclidean_distance
+from src.metrics.similarity_metrics import combined_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.solvers.naive_solver import NaiveSolver
+from src.utils.combinatorics import count_combinations
+from src.utils.worker_pool import shutdown_worker_pool
+
+
+def time_backend(execution_backend: str, query, data, cost_function, max_subset_size: int,
+                 number_of_workers: int) -> float:
+    # The solver prints the number of subsets, which is not part of the benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = NaiveSolver(query, data, cost_function, normalize=False, result_length=10,
+                             max_subset_size=max_subset_size, max_number_of_concurrent_processes=number_of_workers,
+                             RADIUS=1000000, semantic_filtering=False, parallel_scoring=True,
+                             execution_backend=execution_backend)
+    # A new worker pool is started for every run, just like for a new dataset
+    shutdown_worker_pool()
+    start = time.perf_counter()
+    solver.get_max_inter_dataset_distance()
+    solver.solve()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    # Config
+    numbers_of_pois = [10, 20, 40, 60, 80]
+    max_subset_size = 3
+    number_of_workers = 4
+    possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports', 'science', 'culture', 'history']
+
+    # Code
+    logging.basicConfig(level=logging.WARNING)
+    query = KeywordCoordinate('query', 0.5, 0.5, possible_keywords[:3])
+    cost_function = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+    print('precalculation of the maximum inter-dataset distances and solve with parallel scoring, {} workers'.format(
+        number_of_workers))
+    print('{:>6} {:>9} {:>10} {:>10} {:>8}'.format('POIs', 'subsets', 'process', 'thread', 'speed-up'))
+    for number_of_pois in numbers_of_pois:
+        data = [KeywordCoordinate('poi{}'.format(index), (index * 7 % 101) / 101, (index * 13 % 103) / 103,
+                                  possible_keywords[index % 9:index % 9 + 3]) for index in range(number_of_pois)]
+        number_of_subsets = count_combinations(number_of_pois, max_subset_size)
+        process_time = time_backend('process', query, data, cost_function, max_subset_size, number_of_workers)
+        thread_time = time_backend('thread', query, data, cost_function, max_subset_size, number_of_workers)
+        print('{:>6} {:>9} {:>9.3f}s {:>9.3f}s {:>7.1f}x'.format(number_of_pois, number_of_subsets, process_time,
+                                                               thread_time, process_time / thread_time))
+    shutdown_worker_pool()
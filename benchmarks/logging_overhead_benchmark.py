@@ -0,0 +1,44 @@
+import itertools
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/..'))
+from src.costfunctions.type1 import Type1
+from src.metrics.distance_metrics import euclidean_distance
+from src.metrics.similarity_metrics import combined_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.utils.logging_utils import enable_debug_tracing
+
+
+def time_per_subset(cost_function, query, subsets) -> float:
+    start = time.perf_counter()
+    for subset in subsets:
+        cost_function.solve(query, subset)
+    return (time.perf_counter() - start) / len(subsets)
+
+
+if __name__ == '__main__':
+    # Config
+    number_of_pois = 20
+    subset_size = 3
+    possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports', 'science', 'culture', 'history']
+
+    # Code
+    query = KeywordCoordinate('query', 0.5, 0.5, possible_keywords[:3])
+    data = [KeywordCoordinate('poi{}'.format(index), (index * 7 % 11) / 11, (index * 5 % 13) / 13,
+                              possible_keywords[index % 9:index % 9 + 3]) for index in range(number_of_pois)]
+    subsets = list(itertools.combinations(data, subset_size))
+    cost_function = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+
+    # Tracing disabled: the level of the root logger is INFO just like in the logging config.
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+    disabled = time_per_subset(cost_function, query, subsets)
+    print('tracing disabled: {:.2f} us per subset ({} subsets)'.format(disabled * 1e6, len(subsets)))
+
+    # Tracing enabled: every debug record is formatted and handled (written to /dev/null).
+    logging.getLogger().handlers[0].setLevel(logging.DEBUG)
+    enable_debug_tracing()
+    enabled = time_per_subset(cost_function, query, subsets)
+    print('tracing enabled:  {:.2f} us per subset ({:.1f}x)'.format(enabled * 1e6, enabled / disabled))
@@ -0,0 +1,52 @@
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/..'))
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
+
+
+def measure_allocated_bytes(create_function):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    created = create_function()
+    allocated = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return created, allocated
+
+
+if __name__ == '__main__':
+    # Config
+    number_of_pois = 20000
+    possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports', 'science', 'culture', 'history']
+
+    # Code
+    # The names and keyword strings exist in both variants and are created up front.
+    names = ['poi{}'.format(index) for index in range(number_of_pois)]
+    x = [(index * 7 % 1009) / 1009 for index in range(number_of_pois)]
+    y = [(index * 5 % 1013) / 1013 for index in range(number_of_pois)]
+    keywords = [possible_keywords[index % 9:index % 9 + 3] for index in range(number_of_pois)]
+
+    standalone, standalone_bytes = measure_allocated_bytes(
+        lambda: [KeywordCoordinate(names[index], x[index], y[index], keywords[index]) for index in
+                 range(number_of_pois)])
+    table, table_bytes = measure_allocated_bytes(lambda: PoiTable(names, x, y, keywords))
+    dataset, views_bytes = measure_allocated_bytes(lambda: create_dataset(table))
+    print('standalone KeywordCoordinates: {:.0f} bytes per POI'.format(standalone_bytes / number_of_pois))
+    print('PoiTable: {:.0f} bytes per POI, with KeywordCoordinate views: {:.0f} bytes per POI'.format(
+        table_bytes / number_of_pois, (table_bytes + views_bytes) / number_of_pois))
+
+    start = time.perf_counter()
+    for repetition in range(10):
+        for kwc in dataset:
+            hash(kwc)
+    print('hash: {:.2f} us per call'.format((time.perf_counter() - start) / (10 * number_of_pois) * 1e6))
+
+    start = time.perf_counter()
+    pickled = pickle.dumps(dataset)
+    unpickled = pickle.loads(pickled)
+    print('pickle round trip of the dataset: {:.1f} ms, {:.0f} bytes per POI'.format(
+        (time.perf_counter() - start) * 1000, len(pickled) / number_of_pois))
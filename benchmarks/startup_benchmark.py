@@ -0,0 +1,23 @@
+import os
+import statistics
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/..'))
+from src.utils.benchmark_utils import measure_import_time
+
+if __name__ == '__main__':
+    # Config
+    module_names = ['src.solvers.naive_solver', 'src.evaluator', 'src.utils.data_handler']
+    heavy_module_names = ['pandas', 'sklearn', 'spacy', 'en_core_web_lg']
+    repetitions = 10
+
+    # Code
+    for module_name in module_names:
+        timings = []
+        loaded_heavy_modules = []
+        for repetition in range(repetitions):
+            timing, loaded_heavy_modules = measure_import_time(module_name, heavy_module_names)
+            timings.append(timing)
+        print('{}: median {:.1f} ms, min {:.1f} ms, max {:.1f} ms, heavy modules loaded: {}'.format(
+            module_name, statistics.median(timings) * 1000, min(timings) * 1000, max(timings) * 1000,
+            loaded_heavy_modules))
@@ -1,22 +1,104 @@
 from __future__ import annotations
 
+import functools
 import logging
+import math
 import os
+import typing
 
 import numpy as np
 
-from src.metrics.similarity_metrics import create_combined_keyword_vector
+from src.metrics.similarity_metrics import keyword_id_cosine_similarity
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.utils.data_handler import load_pickle
 from src.utils.logging_utils import dataset_comprehension
 from src.utils.typing_definitions import distance_function_type, similarity_function_type, dataset_type, \
-    precalculated_dict_type, keyword_dataset_type
+    precalculated_dict_type
+
+logger = logging.getLogger(__name__)
+
+
+def keyword_id_distance(query: KeywordCoordinate, element: KeywordCoordinate, model) -> float:
+    """
+    Keyword distance kernel of the combined and the keyword id cosine similarity. The combined keyword list would consist of the keywords of the query and the dataset. For such a list the combined cosine similarity is the binary cosine similarity of the keyword id sets.
+    :param query: The query
+    :param element: The element
+    :param model: Not used
+    :return: Distance between the keywords
+    """
+    return keyword_id_cosine_similarity(query, element)
+
+
+def keyword_coordinate_distance(similarity_metric: similarity_function_type, query: KeywordCoordinate,
+                                element: KeywordCoordinate, model) -> float:
+    """
+    Keyword distance kernel of the similarity metrics which take the KeywordCoordinates (tfidf_cosine_similarity).
+    :param similarity_metric: The similarity metric
+    :param query: The query
+    :param element: The element
+    :param model: Not used
+    :return: Distance between the keywords
+    """
+    return similarity_metric(query, element)
+
+
+def keyword_model_distance(similarity_metric: similarity_function_type, query: KeywordCoordinate,
+                           element: KeywordCoordinate, model) -> float:
+    """
+    Keyword distance kernel of the similarity metrics which need the word2vec model (word2vec_cosine_similarity).
+    :param similarity_metric: The similarity metric
+    :param query: The query
+    :param element: The element
+    :param model: The word2vec model or EmbeddingBackend
+    :return: Distance between the keywords
+    """
+    return similarity_metric(query.keywords, element.keywords, model)
+
+
+def keyword_list_distance(similarity_metric: similarity_function_type, query: KeywordCoordinate,
+                          element: KeywordCoordinate, model) -> float:
+    """
+    Keyword distance kernel of the similarity metrics which take the keyword lists.
+    :param similarity_metric: The similarity metric
+    :param query: The query
+    :param element: The element
+    :param model: Not used
+    :return: Distance between the keywords
+    """
+    return similarity_metric(query.keywords, element.keywords)
+
+
+def get_keyword_distance_kernel(similarity_metric: similarity_function_type) -> typing.Callable[
+        [KeywordCoordinate, KeywordCoordinate, typing.Any], float]:
+    """
+    Selects the keyword distance kernel of a similarity metric. The kernels take the query, the element and the model of the cost function, and they are picklable, so cost functions which keep them can be sent to worker processes.
+    :param similarity_metric: The similarity metric
+    :return: The kernel
+    """
+    if similarity_metric.__name__ in ('combined_cosine_similarity', 'keyword_id_cosine_similarity'):
+        return keyword_id_distance
+    elif similarity_metric.__name__ == 'tfidf_cosine_similarity':
+        return functools.partial(keyword_coordinate_distance, similarity_metric)
+    elif similarity_metric.__name__ == 'word2vec_cosine_similarity':
+        return functools.partial(keyword_model_distance, similarity_metric)
+    else:
+        return functools.partial(keyword_list_distance, similarity_metric)
 
 
 class CostFunction:
     """
     The CostFunction class acts as base for the specific types of cost functions. It offers all the required methods for the cost calculations. The purpose of a CostFunction is to enable comparability between different sets of data.
     """
+    # Whether the cost of a subset never decreases when a POI is added and only depends on the maximum query-dataset
+    # distance, the maximum inter-dataset distance and the maximum keyword distance of the subset. The pruning of the
+    # solvers relies on it, so subclasses with another aggregation have to keep it False.
+    is_monotone = False
+    # Whether the cost of a subset is math.inf as soon as its maximum inter-dataset distance or its maximum keyword
+    # distance exceeds the threshold. The threshold filtering of the solvers relies on it.
+    has_subset_thresholds = False
+    # Whether the query distance threshold is compared with the maximum query-dataset distance of a subset, so every
+    # subset with a POI exceeding it on its own has an infinite cost.
+    has_maximum_query_distance_threshold = False
 
     def __init__(self, distance_metric: distance_function_type,
                  similarity_metric: similarity_function_type, alpha: float, beta: float, omega: float,
@@ -36,13 +118,16 @@ class CostFunction:
         :param dataset_distance_threshold: The threshold for the inter-dataset distance.
         :param keyword_similarity_threshold: The threshold for the keyword list similarity.
         :param disable_thresholds: Whether to honor any threshold values.
-        :param model: The word2vec model. This can be passed to the CostFunction instead of reading it from disk to improve performance.
+        :param model: The word2vec model or an EmbeddingBackend. This can be passed to the CostFunction instead of reading it from disk to improve performance. Passing the same EmbeddingBackend to the Solver avoids loading a second model for the semantic filtering.
         :param precalculated_query_dataset_dict: A dictionary with precalculated query-dataset values for a given frozen subset.
         :param precalculated_inter_dataset_dict: A dictionary with precalculated inter-dataset values for a given frozen subset.
         :param precalculated_keyword_similarity_dict: A dictionary with precalculated keyword similarity values for a given frozen subset.
         """
+        self.model = model
         self.distance_metric: distance_function_type = distance_metric
         self.similarity_metric: similarity_function_type = similarity_metric
+        # The keyword distance is calculated for every POI of every subset, so its kernel is only selected once
+        self.keyword_distance_kernel = get_keyword_distance_kernel(similarity_metric)
         self.alpha = alpha
         self.beta = beta
         self.omega = omega
@@ -53,53 +138,56 @@ class CostFunction:
         self.precalculated_query_dataset_dict = precalculated_query_dataset_dict
         self.precalculated_inter_dataset_dict = precalculated_inter_dataset_dict
         self.precalculated_keyword_similarity_dict = precalculated_keyword_similarity_dict
-        logger = logging.getLogger(__name__)
+        # The number of solve calls which stopped before all the components were calculated and the number of distance
+        # and keyword distance calculations which were skipped by them, counted in the process which calls solve
+        self.early_aborts: int = 0
+        self.saved_evaluations: int = 0
         if self.similarity_metric.__name__ == 'word2vec_cosine_similarity':
             try:
                 if model is None:
                     model_path = os.path.abspath(os.path.abspath(os.path.dirname(__file__)) + '/../../files/model.pickle')
                     print('*****' + model_path)
-                    logger.debug('loading model from path {}'.format(model_path))
+                    logger.debug('loading model from path %s', model_path)
                     self.model = load_pickle(model_path)
                 else:
-                    logger.debug('loading model {} from parameter'.format(model))
                     self.model = model
-                    key, value = self.model.popitem()
-                    self.model[key] = value
+                    if isinstance(model, dict):
+                        logger.debug('loading model with %s words from parameter', len(model))
+                        key, value = self.model.popitem()
+                        self.model[key] = value
                     # if type(value) != np.ndarray:
                     #     logger.error('Model seems to be corrupt.')
                     #     raise ValueError('Model seems to be corrupt.')
             except:
                 logger.error('Could not load model')
                 raise ValueError('Could not load model')
-        logger.debug('created with distance metric {}, similarity metric {}, alpha {}, beta {} and omega {}'.format(
-            self.distance_metric.__name__, self.similarity_metric.__name__, self.alpha, self.beta, self.omega))
+        logger.debug('created with distance metric %s, similarity metric %s, alpha %s, beta %s and omega %s',
+                     self.distance_metric.__name__, self.similarity_metric.__name__, self.alpha, self.beta, self.omega)
 
     # TODO check if minimum and maximum functions can be refactored into one
-    def get_maximum_for_dataset(self, dataset: dataset_type, denormalized_dataset: dataset_type = None) -> float:
+    def get_maximum_for_dataset(self, dataset: dataset_type, denormalized_dataset: dataset_type = None,
+                                limit: float = math.inf) -> float:
         """
         Calculates the maximum inter-dataset distance cost.
         :param dataset: The dataset.
         :param denormalized_dataset: The normalized_dataset. This is used for the matching of precalculated values.
+        :param limit: The calculation stops as soon as a distance exceeds the limit and returns that distance instead of the maximum.
         :return: Maximum inter-dataset distance cost.
         """
-        logger = logging.getLogger(__name__)
-        logger.debug('finding maximum distance for dataset {}'.format(dataset_comprehension(dataset)))
         if self.precalculated_inter_dataset_dict is not None:
-            logger.debug('querying precalculated set')
             if denormalized_dataset is not None:
                 dataset_key = denormalized_dataset
             else:
                 dataset_key = dataset
             precalculated_result = self.precalculated_inter_dataset_dict.get(frozenset(dataset_key))
             if precalculated_result is not None:
-                logger.debug('found precalculated value {}'.format(precalculated_result))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('found precalculated maximum distance %s for dataset %s', precalculated_result,
+                                 dataset_comprehension(dataset))
                 return precalculated_result
             else:
                 logger.warning(
                     'could not find the maximum precalculated inter-dataset value in the given precalculated set. This suggests an erroneous or a wrong dict has been passed into the CostFunction.')
-        else:
-            logger.debug('No precalculated inter-dataset dict found')
         current_maximum: float = 0.0
         for index1 in range(len(dataset)):
             for index2 in range(len(dataset) - index1 - 1):
@@ -107,7 +195,16 @@ class CostFunction:
                                                      dataset[index1 + index2 + 1].coordinates)
                 if current_value > current_maximum:
                     current_maximum = current_value
-        logger.debug('found maximum distance for dataset of {}'.format(current_maximum))
+                    if current_maximum > limit:
+                        # The pairs of the previous rows and of this row up to the current one were calculated
+                        calculated_pairs = index1 * (len(dataset) - 1) - index1 * (index1 - 1) // 2 + index2 + 1
+                        self.saved_evaluations += len(dataset) * (len(dataset) - 1) // 2 - calculated_pairs
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug('stopped at distance %s above the limit %s for dataset %s', current_maximum,
+                                         limit, dataset_comprehension(dataset))
+                        return current_maximum
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found maximum distance %s for dataset %s', current_maximum, dataset_comprehension(dataset))
         return current_maximum
 
     def get_minimum_for_dataset(self, dataset: dataset_type, denormalized_dataset: dataset_type = None) -> float:
@@ -117,26 +214,22 @@ class CostFunction:
         :param denormalized_dataset: The normalized_dataset. This is used for the matching of precalculated values.
         :return: Minimum inter-dataset distance cost.
         """
-        logger = logging.getLogger(__name__)
-        logger.debug('finding minimum distance for dataset {}'.format(dataset_comprehension(dataset)))
         if self.precalculated_inter_dataset_dict is not None:
-            logger.debug('querying precalculated set')
             if denormalized_dataset is not None:
                 dataset_key = denormalized_dataset
             else:
                 dataset_key = dataset
             precalculated_result = self.precalculated_inter_dataset_dict.get(frozenset(dataset_key))
             if precalculated_result is not None:
-                logger.debug('found precalculated value {}'.format(precalculated_result))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('found precalculated minimum distance %s for dataset %s', precalculated_result,
+                                 dataset_comprehension(dataset))
                 return precalculated_result
             else:
                 logger.warning(
                     'could not find the minimum precalculated inter-dataset value in the given precalculated set. This suggests an erroneous or a wrong dict has been passed into the CostFunction.')
-        else:
-            logger.debug('No precalculated inter-dataset dict found')
         current_minimum: float = 9999999.9
         if len(dataset) <= 1:
-            logger.debug('Dataset of size 1 returning inter-dataset distance of 0.0')
             return 0.0
         for index1 in range(len(dataset)):
             for index2 in range(len(dataset) - index1 - 1):
@@ -144,36 +237,42 @@ class CostFunction:
                                                      dataset[index1 + index2 + 1].coordinates)
                 if current_value < current_minimum:
                     current_minimum = current_value
-        logger.debug('found minimum distance for dataset of {}'.format(current_minimum))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found minimum distance %s for dataset %s', current_minimum, dataset_comprehension(dataset))
         return current_minimum
 
-    def get_maximum_for_query(self, query: KeywordCoordinate, dataset: dataset_type) -> float:
+    def get_maximum_for_query(self, query: KeywordCoordinate, dataset: dataset_type, limit: float = math.inf) -> float:
         """
         Calculates the maximum query-dataset distance cost.
         :param query: The query
         :param dataset: The dataset
+        :param limit: The calculation stops as soon as a distance exceeds the limit and returns that distance instead of the maximum.
         :return: Maximum query-dataset distance cost
         """
-        logger = logging.getLogger(__name__)
-        logger.debug(
-            'finding maximum distance for query {} and dataset {}'.format(query, dataset_comprehension(dataset)))
         if self.precalculated_query_dataset_dict is not None:
-            logger.debug('querying precalculated set')
             precalculated_result = self.precalculated_query_dataset_dict.get(frozenset(dataset))
             if precalculated_result is not None:
-                logger.debug('found precalculated value {}'.format(precalculated_result))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('found precalculated maximum distance %s for query %s and dataset %s',
+                                 precalculated_result, query, dataset_comprehension(dataset))
                 return precalculated_result
             else:
                 logger.warning(
                     'could not find the maximum precalculated query-dataset value in the given precalculated set. This suggests an erroneous or a wrong dict has been passed into the CostFunction.')
-        else:
-            logger.debug('No precalculated query-dataset dict found')
         current_maximum = 0
         for index in range(len(dataset)):
             current_value = self.distance_metric(query.coordinates, dataset[index].coordinates)
             if current_value > current_maximum:
                 current_maximum = current_value
-        logger.debug('found maximum distance for query and dataset of {}'.format(current_maximum))
+                if current_maximum > limit:
+                    self.saved_evaluations += len(dataset) - index - 1
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug('stopped at distance %s above the limit %s for query %s and dataset %s',
+                                     current_maximum, limit, query, dataset_comprehension(dataset))
+                    return current_maximum
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found maximum distance %s for query %s and dataset %s', current_maximum, query,
+                         dataset_comprehension(dataset))
         return current_maximum
 
     def get_minimum_for_query(self, query: KeywordCoordinate, dataset: dataset_type) -> float:
@@ -183,76 +282,222 @@ class CostFunction:
         :param dataset: The dataset
         :return: Minimum query-dataset distance cost
         """
-        logger = logging.getLogger(__name__)
-        logger.debug(
-            'finding minimum distance for query {} and dataset {}'.format(query, dataset_comprehension(dataset)))
         if self.precalculated_query_dataset_dict is not None:
-            logger.debug('querying precalculated set')
             precalculated_result = self.precalculated_query_dataset_dict.get(frozenset(dataset))
             if precalculated_result is not None:
-                logger.debug('found precalculated value {}'.format(precalculated_result))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('found precalculated minimum distance %s for query %s and dataset %s',
+                                 precalculated_result, query, dataset_comprehension(dataset))
                 return precalculated_result
             else:
                 logger.warning(
                     'could not find the minimum precalculated query-dataset value in the given precalculated set. This suggests an erroneous or a wrong dict has been passed into the CostFunction.')
-        else:
-            logger.debug('No precalculated query-dataset dict found')
         current_minimum = 99999999
         for index in range(len(dataset)):
             current_value = self.distance_metric(query.coordinates, dataset[index].coordinates)
             if current_value < current_minimum:
                 current_minimum = current_value
-        logger.debug('found minimum distance for query and dataset of {}'.format(current_minimum))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found minimum distance %s for query %s and dataset %s', current_minimum, query,
+                         dataset_comprehension(dataset))
         return current_minimum
 
-    def get_maximum_keyword_distance(self, query: KeywordCoordinate, dataset: dataset_type) -> float:
+    def get_maximum_keyword_distance(self, query: KeywordCoordinate, dataset: dataset_type,
+                                     limit: float = math.inf) -> float:
         """
         Calculates the maximum keyword distance.
         :param query: The query
         :param dataset: The dataset
+        :param limit: The calculation stops as soon as a distance exceeds the limit and returns that distance instead of the maximum.
         :return: Maximum distance between the keywords
         """
-        logger = logging.getLogger(__name__)
-        logger.debug(
-            'finding maximum similarity for query {} and dataset {}'.format(query, dataset_comprehension(dataset)))
         if self.precalculated_keyword_similarity_dict is not None:
-            logger.debug('querying precalculated set')
             precalculated_result = self.precalculated_keyword_similarity_dict.get(frozenset(dataset))
             if precalculated_result is not None:
-                logger.debug('found precalculated value {}'.format(precalculated_result))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug('found precalculated maximum similarity %s for query %s and dataset %s',
+                                 precalculated_result, query, dataset_comprehension(dataset))
                 return precalculated_result
             else:
                 logger.warning(
                     'could not find the maximum precalculated keyword similarity value in the given precalculated set. This suggests an erroneous or a wrong dict has been passed into the CostFunction.')
-        else:
-            logger.debug('No precalculated keyword-similarity dict found')
         current_maximum = 0
-        combination = False
-        latentfactors = False
-        if self.similarity_metric.__name__ == 'combined_cosine_similarity':
-            combined_keyword_vector: keyword_dataset_type = create_combined_keyword_vector(query, dataset)
-            combination = True
-        elif self.similarity_metric.__name__ == 'word2vec_cosine_similarity':
-            latentfactors = True
-        for element in dataset:
-            if combination:
-                current_value = self.similarity_metric(query.keywords, element.keywords, combined_keyword_vector)
-            elif latentfactors:
-                current_value = self.similarity_metric(query.keywords, element.keywords, self.model)
-            else:
-                current_value = self.similarity_metric(query.keywords, element.keywords)
+        keyword_distance_kernel = self.keyword_distance_kernel
+        model = self.model
+        for index, element in enumerate(dataset):
+            current_value = keyword_distance_kernel(query, element, model)
             if current_value > current_maximum:
                 current_maximum = current_value
-        logger.debug('found maximum similarity cost for query and dataset of {}'.format(current_maximum))
+                if current_maximum > limit:
+                    self.saved_evaluations += len(dataset) - index - 1
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug('stopped at similarity cost %s above the limit %s for query %s and dataset %s',
+                                     current_maximum, limit, query, dataset_comprehension(dataset))
+                    return current_maximum
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found maximum similarity cost %s for query %s and dataset %s', current_maximum, query,
+                         dataset_comprehension(dataset))
         return current_maximum
 
+    def get_keyword_distance(self, query: KeywordCoordinate, element: KeywordCoordinate) -> float:
+        """
+        Calculates the keyword distance between the query and a single element of a dataset.
+        :param query: The query
+        :param element: The element
+        :return: Distance between the keywords
+        """
+        return self.keyword_distance_kernel(query, element, self.model)
+
+    def get_cost_from_components(self, query_distance: float, dataset_distance: float,
+                                 keyword_similarity: float) -> float:
+        """
+        Combines the maximum query-dataset distance, the maximum inter-dataset distance and the maximum keyword distance of a subset into its cost. Only cost functions which are monotone in all three components implement this. Solvers use it to bound the cost of partial subsets.
+        :param query_distance: The maximum query-dataset distance
+        :param dataset_distance: The maximum inter-dataset distance
+        :param keyword_similarity: The maximum keyword distance
+        :return: The cost
+        """
+        pass
+
+    def get_cost_from_aggregates(self, maximum_query_distance: float, minimum_query_distance: float,
+                                 query_distance_power_sum: float, dataset_distance: float,
+                                 keyword_similarity: float) -> float:
+        """
+        Combines the aggregates of a subset into its cost. The aggregates cover what any of the cost types needs and can be updated in constant time when a POI is added to a subset, which allows solvers to calculate the costs of subsets sharing a prefix incrementally. By default the aggregates are combined with get_cost_from_components, cost types which need other aggregates override this.
+        :param maximum_query_distance: The maximum query-dataset distance
+        :param minimum_query_distance: The minimum query-dataset distance
+        :param query_distance_power_sum: The sum of the query-dataset distances to the power of phi_1, in the order of the subset. Only used by Type4.
+        :param dataset_distance: The maximum inter-dataset distance
+        :param keyword_similarity: The maximum keyword distance
+        :return: The cost
+        """
+        return self.get_cost_from_components(maximum_query_distance, dataset_distance, keyword_similarity)
+
+    def get_costs_from_aggregates(self, maximum_query_distances: np.ndarray, minimum_query_distances: np.ndarray,
+                                  query_distance_power_sums: np.ndarray, dataset_distances: np.ndarray,
+                                  keyword_similarities: np.ndarray) -> np.ndarray:
+        """
+        Combines the aggregates of a block of subsets into their costs, like get_cost_from_aggregates does for a single subset. By default get_cost_from_aggregates is called for every subset, the cost types override this with NumPy operations on the whole block.
+        :param maximum_query_distances: The maximum query-dataset distances
+        :param minimum_query_distances: The minimum query-dataset distances
+        :param query_distance_power_sums: The sums of the query-dataset distances to the power of phi_1. Only used by Type4.
+        :param dataset_distances: The maximum inter-dataset distances
+        :param keyword_similarities: The maximum keyword distances
+        :return: The costs
+        """
+        return np.fromiter(map(self.get_cost_from_aggregates, maximum_query_distances.tolist(),
+                               minimum_query_distances.tolist(), query_distance_power_sums.tolist(),
+                               dataset_distances.tolist(), keyword_similarities.tolist()),
+                           dtype=np.float64, count=len(maximum_query_distances))
+
+    def get_query_distance_powers(self, query_distances: np.ndarray) -> np.ndarray:
+        """
+        Calculates the terms of the query distance power sums passed to get_cost_from_aggregates and get_costs_from_aggregates. Only cost types which use the power sum override this, all the others get zeros.
+        :param query_distances: The query-dataset distances
+        :return: The powers of the query-dataset distances
+        """
+        return np.zeros_like(query_distances, dtype=np.float64)
+
+    def set_threshold_violations(self, costs: np.ndarray, query_distances: np.ndarray, dataset_distances: np.ndarray,
+                                 keyword_similarities: np.ndarray) -> np.ndarray:
+        """
+        Sets the costs of the subsets of a block which do not meet one of the thresholds to math.inf.
+        :param costs: The costs, which are changed in place
+        :param query_distances: The query-dataset distances which are compared with the query distance threshold
+        :param dataset_distances: The maximum inter-dataset distances
+        :param keyword_similarities: The maximum keyword distances
+        :return: The costs
+        """
+        if not self.disable_thresholds:
+            costs[(query_distances > self.query_distance_threshold) | (dataset_distances > self.dataset_distance_threshold) |
+                  (keyword_similarities > self.keyword_similarity_threshold)] = math.inf
+        return costs
+
+    def get_lower_bound(self, query_distance: float, keyword_similarity: float) -> float:
+        """
+        Calculates a lower bound for the cost of any subset which contains an element with the given query-dataset distance and keyword distance. All the cost types combine omega * keyword distance with non-negative terms by either a sum or a maximum, and return math.inf if a threshold is not met. Cost types for which the query-dataset distance of a single element bounds the cost override this.
+        :param query_distance: The query-dataset distance of the element
+        :param keyword_similarity: The keyword distance of the element
+        :return: The lower bound
+        """
+        if not self.disable_thresholds and keyword_similarity > self.keyword_similarity_threshold:
+            return math.inf
+        return self.omega * keyword_similarity
+
+    def get_keyword_lower_bound(self, keyword_similarity: float) -> float:
+        """
+        Calculates a lower bound for the cost of any subset which contains an element with the given keyword distance.
+        :param keyword_similarity: The keyword distance of the element
+        :return: The lower bound
+        """
+        return self.get_lower_bound(0.0, keyword_similarity)
+
+    def get_limit(self, threshold: float) -> float:
+        """
+        Returns the limit for the calculation of a maximum which is compared with the given threshold.
+        :param threshold: The threshold
+        :return: The threshold or math.inf if the thresholds are disabled
+        """
+        if self.disable_thresholds:
+            return math.inf
+        return threshold
+
+    def is_early_abort_enabled(self, bound: float) -> bool:
+        """
+        Checks if a solve call can stop before all the components are calculated, which is the case if thresholds are used or a bound is given.
+        :param bound: The bound of the caller
+        :return: True if the partial costs need to be checked
+        """
+        return not self.disable_thresholds or bound != math.inf
+
+    def get_number_of_evaluations(self, dataset: dataset_type, component: str) -> int:
+        """
+        Returns the number of distance or keyword distance calculations of a component of the cost of a dataset. Components which are looked up in a precalculated dictionary need none.
+        :param dataset: The dataset
+        :param component: One of 'query_distance', 'dataset_distance', 'keyword_similarity' and 'query_distance_power_sum'
+        :return: The number of calculations
+        """
+        if component == 'query_distance':
+            return len(dataset) if self.precalculated_query_dataset_dict is None else 0
+        elif component == 'dataset_distance':
+            return len(dataset) * (len(dataset) - 1) // 2 if self.precalculated_inter_dataset_dict is None else 0
+        elif component == 'keyword_similarity':
+            return len(dataset) if self.precalculated_keyword_similarity_dict is None else 0
+        elif component == 'query_distance_power_sum':
+            return len(dataset)
+        else:
+            msg = 'Unknown component {}'.format(component)
+            logger.error(msg)
+            raise ValueError(msg)
+
+    def abort_evaluation(self, partial_cost: float, bound: float, dataset: dataset_type,
+                         skipped_components: typing.Tuple[str, ...]) -> bool:
+        """
+        Checks if the calculation of the cost of a dataset can stop after some of its components. The partial cost combines the calculated components with 0 for the missing ones, which is a lower bound of the cost for all the cost types. The calculation stops if the partial cost misses a threshold (math.inf) or exceeds the bound of the caller. The skipped calculations are counted in early_aborts and saved_evaluations.
+        :param partial_cost: The cost of the calculated components
+        :param bound: The bound of the caller
+        :param dataset: The dataset
+        :param skipped_components: The components which would be calculated next (see get_number_of_evaluations)
+        :return: True if the calculation can stop
+        """
+        if partial_cost != math.inf and partial_cost <= bound:
+            return False
+        self.early_aborts += 1
+        for component in skipped_components:
+            self.saved_evaluations += self.get_number_of_evaluations(dataset, component)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('stopped before %s for dataset %s with a partial cost of %s and a bound of %s',
+                         skipped_components, dataset_comprehension(dataset), partial_cost, bound)
+        return True
+
     def solve(self, query: KeywordCoordinate, dataset: dataset_type,
-              denormalized_dataset: dataset_type = None) -> float:
+              denormalized_dataset: dataset_type = None, bound: float = math.inf) -> float:
         """
         Implements the solution algorithm. Any costfunction class needs to implement this.
         :param query: The query
         :param dataset: The dataset
         :param denormalized_dataset: The normalized_dataset. This is used for the matching of precalculated values.
+        :param bound: The cost above which the exact cost is not needed. Datasets which cost more may get math.inf instead of their cost.
         :return: The cost
         """
         pass
@@ -1,14 +1,22 @@
 import logging
 import math
 
+import numpy as np
+
 from src.costfunctions.costfunction import CostFunction
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.utils.logging_utils import dataset_comprehension
 from src.utils.typing_definitions import distance_function_type, similarity_function_type, dataset_type, \
     precalculated_dict_type
 
+logger = logging.getLogger(__name__)
+
 
 class Type2(CostFunction):
+    is_monotone = True
+    has_subset_thresholds = True
+    has_maximum_query_distance_threshold = True
+
     def __init__(self, distance_metric: distance_function_type, similarity_metric: similarity_function_type,
                  alpha: float, beta: float, omega: float, query_distance_threshold: float = 0.7,
                  dataset_distance_threshold: float = 0.7, keyword_similarity_threshold: float = 0.7,
@@ -27,7 +35,7 @@ class Type2(CostFunction):
         :param dataset_distance_threshold: The threshold for the inter-dataset distance.
         :param keyword_similarity_threshold: The threshold for the keyword list similarity.
         :param disable_thresholds: Whether to honor any threshold values.
-        :param model: The word2vec model. This can be passed to the CostFunction instead of reading it from disk to improve performance.
+        :param model: The word2vec model or an EmbeddingBackend. This can be passed to the CostFunction instead of reading it from disk to improve performance.
         :param precalculated_query_dataset_dict: A dictionary with precalculated query-dataset values for a given frozen subset.
         :param precalculated_inter_dataset_dict: A dictionary with precalculated inter-dataset values for a given frozen subset.
         :param precalculated_keyword_similarity_dict: A dictionary with precalculated keyword similarity values for a given frozen subset.
@@ -38,34 +46,74 @@ class Type2(CostFunction):
                          precalculated_keyword_similarity_dict)
 
     def solve(self, query: KeywordCoordinate, dataset: dataset_type,
-              denormalized_dataset: dataset_type = None) -> float:
+              denormalized_dataset: dataset_type = None, bound: float = math.inf) -> float:
         """
-        Solves the Type2 cost function.
+        Solves the Type2 cost function. The components are calculated from the cheapest to the most expensive one (query-dataset distance, inter-dataset distance, keyword distance) and the calculation stops as soon as the dataset misses a threshold or exceeds the bound (see abort_evaluation).
         :param query: The query
         :param dataset: The dataset
         :param denormalized_dataset: The normalized_dataset. This is used for the matching of precalculated values.
+        :param bound: The cost above which the exact cost is not needed. Datasets which cost more may get math.inf instead of their cost.
         :return: The maximum cost for the given query and dataset
         """
-        logger = logging.getLogger(__name__)
-        logger.debug('solving for query {} and dataset {}'.format(query, dataset_comprehension(dataset)))
-        query_distance = self.get_maximum_for_query(query, dataset)
-        logger.debug('solved query distance for {}'.format(query_distance))
-        if denormalized_dataset is not None:
-            dataset_distance = self.get_maximum_for_dataset(dataset, denormalized_dataset)
-        else:
-            dataset_distance = self.get_maximum_for_dataset(dataset)
-        logger.debug('solved dataset distance for {}'.format(dataset_distance))
-        keyword_similarity = self.get_maximum_keyword_distance(query, dataset)
-        logger.debug('solved keyword similarity for {}'.format(keyword_similarity))
-        if (not self.disable_thresholds and (query_distance > self.query_distance_threshold or dataset_distance > self.dataset_distance_threshold or keyword_similarity > self.keyword_similarity_threshold)):
-            logger.debug(
-                'One of the thresholds was not met. Query threshold: {}, dataset threshold: {}, keyword threshold {}'.format(
-                    self.query_distance_threshold, self.dataset_distance_threshold, self.keyword_similarity_threshold))
+        early_abort = self.is_early_abort_enabled(bound)
+        query_distance = self.get_maximum_for_query(query, dataset, self.get_limit(self.query_distance_threshold))
+        if early_abort and self.abort_evaluation(self.get_cost_from_components(query_distance, 0.0, 0.0), bound,
+                                                 dataset, ('dataset_distance', 'keyword_similarity')):
             return math.inf
-        else:
-            solution = max(self.alpha * query_distance, self.beta * dataset_distance, self.omega * keyword_similarity)
-            logger.debug('solved with a cost of {}'.format(solution))
-            return solution
+        dataset_distance = self.get_maximum_for_dataset(dataset, denormalized_dataset,
+                                                        self.get_limit(self.dataset_distance_threshold))
+        if early_abort and self.abort_evaluation(self.get_cost_from_components(query_distance, dataset_distance, 0.0),
+                                                 bound, dataset, ('keyword_similarity',)):
+            return math.inf
+        keyword_similarity = self.get_maximum_keyword_distance(query, dataset,
+                                                               self.get_limit(self.keyword_similarity_threshold))
+        solution = self.get_cost_from_components(query_distance, dataset_distance, keyword_similarity)
+        if logger.isEnabledFor(logging.DEBUG):
+            if solution == math.inf:
+                logger.debug('One of the thresholds was not met for query %s and dataset %s. Query distance: %s (threshold %s), dataset distance: %s (threshold %s), keyword similarity: %s (threshold %s)',
+                             query, dataset_comprehension(dataset), query_distance, self.query_distance_threshold,
+                             dataset_distance, self.dataset_distance_threshold, keyword_similarity,
+                             self.keyword_similarity_threshold)
+            else:
+                logger.debug('solved for query %s and dataset %s with a cost of %s (query distance %s, dataset distance %s, keyword similarity %s)',
+                             query, dataset_comprehension(dataset), solution, query_distance, dataset_distance,
+                             keyword_similarity)
+        return solution
 
+    def get_cost_from_components(self, query_distance: float, dataset_distance: float,
+                                 keyword_similarity: float) -> float:
+        """
+        Combines the components of a subset into its Type2 cost.
+        :param query_distance: The maximum query-dataset distance
+        :param dataset_distance: The maximum inter-dataset distance
+        :param keyword_similarity: The maximum keyword distance
+        :return: The cost or math.inf if one of the thresholds is not met
+        """
+        if (not self.disable_thresholds and (query_distance > self.query_distance_threshold or dataset_distance > self.dataset_distance_threshold or keyword_similarity > self.keyword_similarity_threshold)):
+            return math.inf
+        return max(self.alpha * query_distance, self.beta * dataset_distance, self.omega * keyword_similarity)
 
+    def get_costs_from_aggregates(self, maximum_query_distances: np.ndarray, minimum_query_distances: np.ndarray,
+                                  query_distance_power_sums: np.ndarray, dataset_distances: np.ndarray,
+                                  keyword_similarities: np.ndarray) -> np.ndarray:
+        """
+        Combines the aggregates of a block of subsets into their Type2 costs.
+        :param maximum_query_distances: The maximum query-dataset distances
+        :param minimum_query_distances: The minimum query-dataset distances
+        :param query_distance_power_sums: The sums of the query-dataset distances to the power of phi_1
+        :param dataset_distances: The maximum inter-dataset distances
+        :param keyword_similarities: The maximum keyword distances
+        :return: The costs, math.inf where one of the thresholds is not met
+        """
+        costs = np.maximum(np.maximum(self.alpha * maximum_query_distances, self.beta * dataset_distances),
+                           self.omega * keyword_similarities)
+        return self.set_threshold_violations(costs, maximum_query_distances, dataset_distances, keyword_similarities)
 
+    def get_lower_bound(self, query_distance: float, keyword_similarity: float) -> float:
+        """
+        Calculates a lower bound for the cost of any subset which contains an element with the given query-dataset distance and keyword distance.
+        :param query_distance: The query-dataset distance of the element
+        :param keyword_similarity: The keyword distance of the element
+        :return: The lower bound
+        """
+        return self.get_cost_from_components(query_distance, 0.0, keyword_similarity)
@@ -9,9 +9,9 @@ import time
 import typing
 
 from src.solvers.solver import Solver
-from src.utils.logging_utils import list_comprehension, solution_list_comprehension
+from src.utils.logging_utils import list_comprehension, solution_list_comprehension, start_queue_logging, \
+    stop_queue_logging, get_worker_logging_arguments, initialize_worker_logging
 from src.utils.typing_definitions import solution_type
-from os import path
 from pathlib import Path
 
 
@@ -19,26 +19,19 @@ class Evaluator:
     """
     The Evaluator enables the evaluation of many Solvers at once.
     """
-    def __init__(self):
+    def __init__(self, asynchronous_logging: bool = False):
         """
         Constructs a new Evaluator object and initializes the state of the object. Solvers can be added to the evaluator.
+        :param asynchronous_logging: If True, log records of the evaluator and of all worker processes are sent through a queue to a single listener thread which writes the log files
         """
-        #log_file_path = path.join(path.dirname(path.abspath(__file__)), 'logs\config\logging.config')
-        
-        #print(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + 'logs/config/logging.config'))
-        
-        #logging.config.fileConfig(log_file_path)
-        
-        path_current = Path(os.path.abspath(os.path.dirname(os.path.abspath(__file__))))
-        path = path_current.parent
-    
-        print('*****' + str(path) + '\logs\config\logging.config')
-        logging.config.fileConfig(str(path) + '\logs\config\logging.config')
-        
-        
-        
-        #logging.config.fileConfig('C:\\Users\rhermoso\github\Re-CoSKQ\logs\config\logging.config')
-        
+        stop_queue_logging()
+        project_path = Path(os.path.abspath(os.path.dirname(os.path.abspath(__file__)))).parent
+        log_path = os.path.join(str(project_path), 'logs')
+        logging.config.fileConfig(os.path.join(log_path, 'config', 'logging.config'),
+                                  defaults={'logdir': Path(log_path).as_posix()}, disable_existing_loggers=False)
+        self.asynchronous_logging = asynchronous_logging
+        if asynchronous_logging:
+            start_queue_logging()
         self.solvers: typing.List[Solver] = []
         self.results: typing.List[typing.Tuple[solution_type, Solver]] = []
         self.timings: typing.List[typing.Tuple[float, Solver]] = []
@@ -70,7 +63,8 @@ class Evaluator:
         self.results: typing.List[typing.Tuple[solution_type, Solver]] = []
         self.timings: typing.List[typing.Tuple[float, Solver]] = []
         if evaluate_all_solvers_concurrently:
-            with concurrent.futures.ProcessPoolExecutor() as executor:
+            with concurrent.futures.ProcessPoolExecutor(initializer=initialize_worker_logging,
+                                                        initargs=get_worker_logging_arguments()) as executor:
                 future_list = []
                 for solver in self.solvers:
                     future = executor.submit(solver.solve)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import typing
+
+import numpy as np
+
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.model.vocabulary import vocabulary
+from src.utils.typing_definitions import dataset_type
+
+
+class InvertedIndex:
+    """
+    The InvertedIndex maps every interned keyword of a dataset to the posting list of the POIs which have the keyword. POIs are identified by their position in the dataset the index was built for. The posting lists are stored in CSR format: the positions of the POIs with keyword_ids[i] are positions[posting_offsets[i]:posting_offsets[i + 1]], sorted in ascending order. An index is built once per dataset and can be shared by all the solvers working on that dataset.
+    """
+
+    __slots__ = ('keyword_ids', 'posting_offsets', 'positions', 'number_of_pois')
+
+    def __init__(self, data: dataset_type):
+        """
+        Constructs a new InvertedIndex object for a dataset.
+        :param data: The dataset
+        """
+        keyword_id_arrays = [kwc.table.get_sorted_keyword_ids(kwc.row) for kwc in data]
+        lengths = np.fromiter((len(keyword_ids) for keyword_ids in keyword_id_arrays), dtype=np.int64,
+                              count=len(keyword_id_arrays))
+        if len(keyword_id_arrays) > 0:
+            keyword_ids = np.concatenate(keyword_id_arrays)
+        else:
+            keyword_ids = np.zeros(0, dtype=np.int32)
+        self._set_postings(keyword_ids, np.repeat(np.arange(len(data), dtype=np.int64), lengths), len(data))
+
+    def _set_postings(self, keyword_ids: np.ndarray, positions: np.ndarray, number_of_pois: int):
+        order = np.argsort(keyword_ids, kind='stable')
+        sorted_keyword_ids = keyword_ids[order]
+        self.keyword_ids, starts = np.unique(sorted_keyword_ids, return_index=True)
+        self.posting_offsets = np.append(starts, len(sorted_keyword_ids)).astype(np.int64)
+        self.positions = positions[order]
+        self.number_of_pois = number_of_pois
+        for array in (self.keyword_ids, self.posting_offsets, self.positions):
+            array.flags.writeable = False
+
+    def get_postings(self, keyword_id: int) -> np.ndarray:
+        """
+        Returns the posting list of a keyword.
+        :param keyword_id: The interned keyword id
+        :return: The sorted positions of the POIs with the keyword. The array is empty if no POI has the keyword.
+        """
+        index = int(np.searchsorted(self.keyword_ids, keyword_id))
+        if index == len(self.keyword_ids) or self.keyword_ids[index] != keyword_id:
+            return self.positions[:0]
+        return self.positions[self.posting_offsets[index]:self.posting_offsets[index + 1]]
+
+    def get_positions(self, keyword_ids: typing.Iterable[int]) -> np.ndarray:
+        """
+        Returns the union of the posting lists of multiple keywords.
+        :param keyword_ids: The interned keyword ids
+        :return: The sorted positions of the POIs with at least one of the keywords
+        """
+        postings = [self.get_postings(keyword_id) for keyword_id in keyword_ids]
+        if len(postings) == 0:
+            return self.positions[:0]
+        return np.unique(np.concatenate(postings))
+
+    def get_query_positions(self, query: KeywordCoordinate) -> np.ndarray:
+        """
+        Returns the POIs which share at least one keyword with the query.
+        :param query: The query
+        :return: The sorted positions of the POIs
+        """
+        return self.get_positions(query.table.get_sorted_keyword_ids(query.row).tolist())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the arrays of the index.
+        """
+        return self.keyword_ids.nbytes + self.posting_offsets.nbytes + self.positions.nbytes
+
+    def __getstate__(self):
+        # Keyword ids are only valid inside a process, so the index is pickled with the words instead.
+        lengths = np.diff(self.posting_offsets)
+        words = [vocabulary.get_word(keyword_id) for keyword_id in self.keyword_ids.tolist()]
+        return words, lengths, self.positions, self.number_of_pois
+
+    def __setstate__(self, state):
+        words, lengths, positions, number_of_pois = state
+        keyword_ids = np.repeat(np.asarray(vocabulary.get_ids(words), dtype=np.int32), lengths)
+        self._set_postings(keyword_ids, np.array(positions), number_of_pois)
+
+    def __str__(self):
+        return 'InvertedIndex({} keywords, {} POIs)'.format(len(self.keyword_ids), self.number_of_pois)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import typing
+
+import numpy as np
+
+from src.costfunctions.costfunction import CostFunction
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.utils.typing_definitions import dataset_type, distance_function_type
+
+logger = logging.getLogger(__name__)
+
+
+class IRTreeNode:
+    """
+    A node of an IRTree. Every node stores the bounding box of the POIs beneath it and a summary of their keywords: the union of their keyword ids and the smallest and largest number of distinct keywords of a single POI. Leaves store the positions of their POIs, inner nodes their children.
+    """
+
+    __slots__ = ('min_x', 'min_y', 'max_x', 'max_y', 'keyword_ids', 'min_keyword_count', 'max_keyword_count',
+                 'children', 'positions')
+
+    def __init__(self, min_x: float, min_y: float, max_x: float, max_y: float, keyword_ids: typing.FrozenSet[int],
+                 min_keyword_count: int, max_keyword_count: int, children: typing.List[IRTreeNode] = None,
+                 positions: np.ndarray = None):
+        """
+        Constructs a new IRTreeNode object.
+        :param min_x: The smallest x coordinate beneath the node
+        :param min_y: The smallest y coordinate beneath the node
+        :param max_x: The largest x coordinate beneath the node
+        :param max_y: The largest y coordinate beneath the node
+        :param keyword_ids: The union of the keyword ids beneath the node
+        :param min_keyword_count: The smallest number of distinct keywords of a POI beneath the node
+        :param max_keyword_count: The largest number of distinct keywords of a POI beneath the node
+        :param children: The children of an inner node
+        :param positions: The positions of the POIs of a leaf
+        """
+        self.min_x = min_x
+        self.min_y = min_y
+        self.max_x = max_x
+        self.max_y = max_y
+        self.keyword_ids = keyword_ids
+        self.min_keyword_count = min_keyword_count
+        self.max_keyword_count = max_keyword_count
+        self.children = children
+        self.positions = positions
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.children is None
+
+    def __str__(self):
+        return 'IRTreeNode(({}, {}), ({}, {}), {} keywords, {} {})'.format(
+            self.min_x, self.min_y, self.max_x, self.max_y, len(self.keyword_ids),
+            len(self.positions) if self.is_leaf else len(self.children), 'POIs' if self.is_leaf else 'children')
+
+
+def sort_tile_recursive(x: np.ndarray, y: np.ndarray, capacity: int) -> typing.List[np.ndarray]:
+    """
+    Groups points with the Sort-Tile-Recursive algorithm: the points are sorted by x and cut into vertical slices, then every slice is sorted by y and cut into groups of at most capacity points.
+    :param x: The x coordinates
+    :param y: The y coordinates
+    :param capacity: The maximum size of a group
+    :return: A list with the indices of the points of every group
+    """
+    number_of_groups = math.ceil(len(x) / capacity)
+    number_of_slices = math.ceil(math.sqrt(number_of_groups))
+    slice_size = capacity * math.ceil(number_of_groups / number_of_slices)
+    order = np.lexsort((y, x))
+    groups: typing.List[np.ndarray] = []
+    for slice_start in range(0, len(order), slice_size):
+        current_slice = order[slice_start:slice_start + slice_size]
+        current_slice = current_slice[np.lexsort((x[current_slice], y[current_slice]))]
+        for group_start in range(0, len(current_slice), capacity):
+            groups.append(current_slice[group_start:group_start + capacity])
+    return groups
+
+
+class IRTree:
+    """
+    The IRTree is a spatial-keyword index: an R-tree, bulk loaded with the Sort-Tile-Recursive algorithm, whose nodes additionally summarize the keywords beneath them. For a query, the bounding box of a node bounds the query-dataset distance and the keyword summary bounds the keyword distance of every POI beneath the node. Combined by the cost function, this gives a lower bound for the cost of any subset with a POI of the node, which allows to skip whole regions. POIs are identified by their position in the dataset the tree was built for.
+    """
+
+    def __init__(self, data: dataset_type, node_capacity: int = 16):
+        """
+        Constructs a new IRTree object for a dataset.
+        :param data: The dataset
+        :param node_capacity: The maximum number of POIs of a leaf and of children of an inner node
+        """
+        if node_capacity < 2:
+            msg = 'The node capacity of an IRTree has to be at least 2, got {}'.format(node_capacity)
+            logger.error(msg)
+            raise ValueError(msg)
+        self.node_capacity = node_capacity
+        self.number_of_pois = len(data)
+        x = np.fromiter((kwc.coordinates.x for kwc in data), dtype=np.float64, count=len(data))
+        y = np.fromiter((kwc.coordinates.y for kwc in data), dtype=np.float64, count=len(data))
+        keyword_id_sets = [kwc.table.get_keyword_id_set(kwc.row) for kwc in data]
+        nodes: typing.List[IRTreeNode] = []
+        if len(data) > 0:
+            for positions in sort_tile_recursive(x, y, node_capacity):
+                keyword_counts = [len(keyword_id_sets[position]) for position in positions.tolist()]
+                nodes.append(IRTreeNode(float(x[positions].min()), float(y[positions].min()),
+                                        float(x[positions].max()), float(y[positions].max()),
+                                        frozenset().union(*[keyword_id_sets[position] for position in positions.tolist()]),
+                                        min(keyword_counts), max(keyword_counts), positions=np.sort(positions)))
+        self.height = 1
+        while len(nodes) > 1:
+            center_x = np.array([(node.min_x + node.max_x) / 2 for node in nodes])
+            center_y = np.array([(node.min_y + node.max_y) / 2 for node in nodes])
+            parents: typing.List[IRTreeNode] = []
+            for group in sort_tile_recursive(center_x, center_y, node_capacity):
+                children = [nodes[index] for index in group.tolist()]
+                parents.append(IRTreeNode(min(child.min_x for child in children),
+                                          min(child.min_y for child in children),
+                                          max(child.max_x for child in children),
+                                          max(child.max_y for child in children),
+                                          frozenset().union(*[child.keyword_ids for child in children]),
+                                          min(child.min_keyword_count for child in children),
+                                          max(child.max_keyword_count for child in children), children=children))
+            nodes = parents
+            self.height += 1
+        self.root: IRTreeNode = nodes[0] if len(nodes) > 0 else None
+
+    def get_query_distance_lower_bound(self, node: IRTreeNode, query: KeywordCoordinate,
+                                       distance_metric: distance_function_type,
+                                       normalization: typing.Tuple[float, float, float, float] = None) -> float:
+        """
+        Calculates a lower bound for the query-dataset distance of the POIs beneath a node. The bound is the distance to the closest point of the bounding box for the euclidean and the manhattan distance. For the geographic distance, which takes x as the latitude, the bound is the meridian arc to the closest latitude of the bounding box. Any other distance metric is bounded by 0.
+        :param node: The node
+        :param query: The query. If a normalization is given, the query has to be normalized.
+        :param distance_metric: The distance metric
+        :param normalization: The normalization of the coordinates as tuple of max_x, min_x, max_y and min_y. The bounding box is normalized the same way as the POIs.
+        :return: The lower bound
+        """
+        if distance_metric.__name__ not in ('euclidean_distance', 'manhattan_distance', 'geographic_distance'):
+            return 0.0
+        min_x, min_y, max_x, max_y = node.min_x, node.min_y, node.max_x, node.max_y
+        if normalization is not None:
+            normalization_max_x, normalization_min_x, normalization_max_y, normalization_min_y = normalization
+            min_x = (min_x - normalization_min_x) / (normalization_max_x - normalization_min_x)
+            max_x = (max_x - normalization_min_x) / (normalization_max_x - normalization_min_x)
+            min_y = (min_y - normalization_min_y) / (normalization_max_y - normalization_min_y)
+            max_y = (max_y - normalization_min_y) / (normalization_max_y - normalization_min_y)
+        query_x = query.coordinates.x
+        query_y = query.coordinates.y
+        delta_x = max(min_x - query_x, 0.0, query_x - max_x)
+        delta_y = max(min_y - query_y, 0.0, query_y - max_y)
+        if distance_metric.__name__ == 'manhattan_distance':
+            return delta_x + delta_y
+        if distance_metric.__name__ == 'geographic_distance':
+            # Same earth radius as geographic_distance, in meters
+            return 6373000.0 * math.radians(delta_x)
+        return math.sqrt(delta_x ** 2 + delta_y ** 2)
+
+    def get_positions_within(self, kwc: KeywordCoordinate, distance: float,
+                             distance_metric: distance_function_type) -> np.ndarray:
+        """
+        Returns the POIs whose leaves are not farther away from a location than a distance (range search). Every POI within the distance is returned, the caller has to check the exact distance of the returned POIs.
+        :param kwc: The location
+        :param distance: The distance
+        :param distance_metric: The distance metric
+        :return: The sorted positions of the POIs
+        """
+        if self.root is None:
+            return np.zeros(0, dtype=np.int64)
+        positions: typing.List[np.ndarray] = []
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if self.get_query_distance_lower_bound(node, kwc, distance_metric) > distance:
+                continue
+            if node.is_leaf:
+                positions.append(node.positions)
+            else:
+                stack.extend(node.children)
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(positions))
+
+    def get_keyword_distance_lower_bound(self, node: IRTreeNode, query: KeywordCoordinate,
+                                         cost_function: CostFunction) -> float:
+        """
+        Calculates a lower bound for the keyword distance of the POIs beneath a node. For the binary cosine similarity of the keyword ids the bound follows from the number of query keywords beneath the node and the keyword counts of the POIs. The other similarity metrics are only bounded if no query keyword appears beneath the node.
+        :param node: The node
+        :param query: The query
+        :param cost_function: The cost function with the similarity metric
+        :return: The lower bound
+        """
+        query_keyword_ids = query.table.get_keyword_id_set(query.row)
+        shared_keywords = len(query_keyword_ids & node.keyword_ids)
+        similarity_metric_name = cost_function.similarity_metric.__name__
+        if similarity_metric_name in ('combined_cosine_similarity', 'keyword_id_cosine_similarity'):
+            if shared_keywords == 0:
+                return 1.0
+            # The similarity |Q & P| / sqrt(|Q| * |P|) is largest for |P| = shared_keywords
+            if node.max_keyword_count < shared_keywords:
+                maximum_similarity = math.sqrt(node.max_keyword_count / len(query_keyword_ids))
+            elif node.min_keyword_count > shared_keywords:
+                maximum_similarity = shared_keywords / math.sqrt(len(query_keyword_ids) * node.min_keyword_count)
+            else:
+                maximum_similarity = math.sqrt(shared_keywords / len(query_keyword_ids))
+            return max(1.0 - maximum_similarity, 0.0)
+        elif similarity_metric_name == 'tfidf_cosine_similarity' and shared_keywords == 0:
+            return 1.0
+        return 0.0
+
+    def get_lower_bound(self, node: IRTreeNode, query: KeywordCoordinate, cost_function: CostFunction,
+                        normalization: typing.Tuple[float, float, float, float] = None) -> float:
+        """
+        Calculates a lower bound for the cost of any subset which contains a POI beneath a node.
+        :param node: The node
+        :param query: The query. If a normalization is given, the query has to be normalized.
+        :param cost_function: The cost function
+        :param normalization: The normalization of the coordinates as tuple of max_x, min_x, max_y and min_y
+        :return: The lower bound
+        """
+        return cost_function.get_lower_bound(
+            self.get_query_distance_lower_bound(node, query, cost_function.distance_metric, normalization),
+            self.get_keyword_distance_lower_bound(node, query, cost_function))
+
+    def get_leaves(self, query: KeywordCoordinate, cost_function: CostFunction, bound: float,
+                   normalization: typing.Tuple[float, float, float, float] = None) -> typing.Iterator[IRTreeNode]:
+        """
+        Returns the leaves whose lower bound does not exceed a bound. Inner nodes exceeding the bound are skipped with all their descendants.
+        :param query: The query. If a normalization is given, the query has to be normalized.
+        :param cost_function: The cost function
+        :param bound: The bound
+        :param normalization: The normalization of the coordinates as tuple of max_x, min_x, max_y and min_y
+        :return: An iterator over the leaves
+        """
+        if self.root is None:
+            return
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if self.get_lower_bound(node, query, cost_function, normalization) > bound:
+                continue
+            if node.is_leaf:
+                yield node
+            else:
+                stack.extend(reversed(node.children))
+
+    def get_leaves_by_lower_bound(self, query: KeywordCoordinate, cost_function: CostFunction,
+                                  normalization: typing.Tuple[float, float, float, float] = None) -> \
+            typing.Iterator[typing.Tuple[float, IRTreeNode]]:
+        """
+        Returns all the leaves in ascending order of their lower bounds (best-first search). Inner nodes are only expanded when the iteration reaches their lower bound, so stopping the iteration early skips the remaining regions.
+        :param query: The query. If a normalization is given, the query has to be normalized.
+        :param cost_function: The cost function
+        :param normalization: The normalization of the coordinates as tuple of max_x, min_x, max_y and min_y
+        :return: An iterator over tuples of the lower bound and the leaf
+        """
+        if self.root is None:
+            return
+        counter = 0
+        queue = [(self.get_lower_bound(self.root, query, cost_function, normalization), counter, self.root)]
+        while len(queue) > 0:
+            lower_bound, _, node = heapq.heappop(queue)
+            if node.is_leaf:
+                yield lower_bound, node
+                continue
+            for child in node.children:
+                counter += 1
+                # A child can never be bounded lower than its parent
+                child_lower_bound = max(lower_bound,
+                                        self.get_lower_bound(child, query, cost_function, normalization))
+                heapq.heappush(queue, (child_lower_bound, counter, child))
+
+    def __str__(self):
+        return 'IRTree({} POIs, height {}, node capacity {})'.format(self.number_of_pois, self.height,
+                                                                     self.node_capacity)
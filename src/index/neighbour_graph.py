@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import typing
+
+import numpy as np
+
+from src.index.ir_tree import IRTree
+from src.metrics.distance_metrics import geographic_distance
+from src.utils.typing_definitions import dataset_type, distance_function_type
+
+logger = logging.getLogger(__name__)
+
+
+class NeighbourGraph:
+    """
+    The NeighbourGraph connects every pair of POIs of a dataset which are not farther apart than a maximum distance. Only these pairs are stored, in CSR format: the neighbours of the POI at position i are neighbours[offsets[i]:offsets[i + 1]], sorted in ascending order, with their distances at the same indices of distances. POIs are identified by their position in the dataset the graph was built for. The candidate pairs are found with a range search of an IRTree, so the distances of the pairs that are far apart are never calculated.
+    """
+
+    __slots__ = ('offsets', 'neighbours', 'distances', 'max_distance', 'number_of_pois', '_neighbour_sets')
+
+    def __init__(self, data: dataset_type, max_distance: float,
+                 distance_metric: distance_function_type = geographic_distance, ir_tree: IRTree = None):
+        """
+        Constructs a new NeighbourGraph object for a dataset.
+        :param data: The dataset
+        :param max_distance: The maximum distance between two neighbours
+        :param distance_metric: The distance metric
+        :param ir_tree: The IRTree of the dataset for the range search. If None, a tree is built.
+        """
+        if ir_tree is None:
+            ir_tree = IRTree(data)
+        elif ir_tree.number_of_pois != len(data):
+            msg = 'The IR-tree was built for {} POIs, but the data contains {} POIs'.format(ir_tree.number_of_pois,
+                                                                                          len(data))
+            logger.error(msg)
+            raise ValueError(msg)
+        neighbour_arrays: typing.List[np.ndarray] = []
+        distance_arrays: typing.List[np.ndarray] = []
+        for position, kwc in enumerate(data):
+            neighbours: typing.List[int] = []
+            distances: typing.List[float] = []
+            for other_position in ir_tree.get_positions_within(kwc, max_distance, distance_metric).tolist():
+                if other_position == position:
+                    continue
+                distance = distance_metric(kwc.coordinates, data[other_position].coordinates)
+                if distance <= max_distance:
+                    neighbours.append(other_position)
+                    distances.append(distance)
+            neighbour_arrays.append(np.asarray(neighbours, dtype=np.int64))
+            distance_arrays.append(np.asarray(distances, dtype=np.float64))
+        lengths = np.fromiter((len(neighbours) for neighbours in neighbour_arrays), dtype=np.int64,
+                              count=len(neighbour_arrays))
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        if len(neighbour_arrays) > 0:
+            self.neighbours = np.concatenate(neighbour_arrays)
+            self.distances = np.concatenate(distance_arrays)
+        else:
+            self.neighbours = np.zeros(0, dtype=np.int64)
+            self.distances = np.zeros(0, dtype=np.float64)
+        for array in (self.offsets, self.neighbours, self.distances):
+            array.flags.writeable = False
+        self.max_distance = max_distance
+        self.number_of_pois = len(data)
+        self._neighbour_sets: typing.List[typing.FrozenSet[int]] = None
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('built neighbour graph with %s edges for %s POIs and a maximum distance of %s',
+                        self.number_of_edges, self.number_of_pois, max_distance)
+
+    def get_neighbours(self, position: int) -> np.ndarray:
+        """
+        Returns the neighbours of a POI.
+        :param position: The position of the POI
+        :return: The sorted positions of the neighbours
+        """
+        return self.neighbours[self.offsets[position]:self.offsets[position + 1]]
+
+    def get_distances(self, position: int) -> np.ndarray:
+        """
+        Returns the distances between a POI and its neighbours.
+        :param position: The position of the POI
+        :return: The distances in the same order as the neighbours
+        """
+        return self.distances[self.offsets[position]:self.offsets[position + 1]]
+
+    def get_neighbour_set(self, position: int) -> typing.FrozenSet[int]:
+        """
+        Returns the neighbours of a POI as a set. The sets are created on first use.
+        :param position: The position of the POI
+        :return: The positions of the neighbours
+        """
+        if self._neighbour_sets is None:
+            self._neighbour_sets = [frozenset(self.get_neighbours(index).tolist())
+                                    for index in range(self.number_of_pois)]
+        return self._neighbour_sets[position]
+
+    def are_neighbours(self, position1: int, position2: int) -> bool:
+        """
+        Checks whether two POIs are neighbours.
+        :param position1: The position of the first POI
+        :param position2: The position of the second POI
+        :return: True if the POIs are not farther apart than the maximum distance
+        """
+        neighbours = self.get_neighbours(position1)
+        index = int(np.searchsorted(neighbours, position2))
+        return index < len(neighbours) and neighbours[index] == position2
+
+    @property
+    def number_of_edges(self) -> int:
+        """
+        The number of neighbour pairs. Every pair is stored once for each of its POIs.
+        """
+        return len(self.neighbours) // 2
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the arrays of the graph.
+        """
+        return self.offsets.nbytes + self.neighbours.nbytes + self.distances.nbytes
+
+    def __getstate__(self):
+        return self.offsets, self.neighbours, self.distances, self.max_distance, self.number_of_pois
+
+    def __setstate__(self, state):
+        self.offsets, self.neighbours, self.distances, self.max_distance, self.number_of_pois = state
+        for array in (self.offsets, self.neighbours, self.distances):
+            array.flags.writeable = False
+        self._neighbour_sets = None
+
+    def __str__(self):
+        return 'NeighbourGraph({} POIs, {} edges, maximum distance {})'.format(self.number_of_pois,
+                                                                             self.number_of_edges, self.max_distance)
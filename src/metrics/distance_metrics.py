@@ -1,14 +1,18 @@
-import copy
 import logging
 import math
 import typing
 
 from src.model.coordinate import Coordinate
-from src.model.keyword_coordinate import KeywordCoordinate
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
 from src.utils.logging_utils import dataset_comprehension, result_list_comprehension
 from src.utils.typing_definitions import dataset_type, solution_list
 from math import sin, cos, sqrt, atan2, radians
 
+euclidean_distance_logger = logging.getLogger(__name__ + '.euclidean_distance')
+geographic_distance_logger = logging.getLogger(__name__ + '.geographic_distance')
+manhattan_distance_logger = logging.getLogger(__name__ + '.manhattan_distance')
+denormalize_result_data_logger = logging.getLogger(__name__ + '.denormalize_result_data')
 
 def euclidean_distance(coordinate1: Coordinate, coordinate2: Coordinate) -> float:
     """
@@ -17,10 +21,9 @@ def euclidean_distance(coordinate1: Coordinate, coordinate2: Coordinate) -> floa
     :param coordinate2: The second coordinate
     :return: The euclidean distance
     """
-    logger = logging.getLogger(__name__ + '.euclidean_distance')
-    logger.debug('calculating for {} and {}'.format(coordinate1, coordinate2))
     solution = math.sqrt((coordinate1.x - coordinate2.x) ** 2 + (coordinate1.y - coordinate2.y) ** 2)
-    logger.debug('calculated {}'.format(solution))
+    if euclidean_distance_logger.isEnabledFor(logging.DEBUG):
+        euclidean_distance_logger.debug('calculated %s for %s and %s', solution, coordinate1, coordinate2)
     return solution
 
 def geographic_distance(coordinate1: Coordinate, coordinate2: Coordinate) -> float:
@@ -37,9 +40,6 @@ def geographic_distance(coordinate1: Coordinate, coordinate2: Coordinate) -> flo
     float Distance between two points in meters
         DESCRIPTION.
     """
-    logger = logging.getLogger(__name__ + '.geographic_distance')
-    logger.debug('calculating for {} and {}'.format(coordinate1, coordinate2))
-    
     # approximate radius of earth in km
     R = 6373.0
     lat1 = radians(coordinate1.x)
@@ -53,7 +53,8 @@ def geographic_distance(coordinate1: Coordinate, coordinate2: Coordinate) -> flo
     c = 2 * atan2(sqrt(a), sqrt(1 - a))   
     solution = R * c * 1000 # Results in meters (x1000)
     
-    logger.debug('calculated {}'.format(solution))
+    if geographic_distance_logger.isEnabledFor(logging.DEBUG):
+        geographic_distance_logger.debug('calculated %s for %s and %s', solution, coordinate1, coordinate2)
     
     return solution
     
@@ -66,10 +67,9 @@ def manhattan_distance(coordinate1: Coordinate, coordinate2: Coordinate) -> floa
     :param coordinate2: The second coordinate
     :return: The manhattan distance
     """
-    logger = logging.getLogger(__name__ + '.manhattan_distance')
-    logger.debug('calculating for {} and {}'.format(coordinate1, coordinate2))
     solution = abs(coordinate1.x - coordinate2.x) + abs(coordinate1.y - coordinate2.y)
-    logger.debug('calculated {}'.format(solution))
+    if manhattan_distance_logger.isEnabledFor(logging.DEBUG):
+        manhattan_distance_logger.debug('calculated %s for %s and %s', solution, coordinate1, coordinate2)
     return solution
 
 
@@ -82,29 +82,19 @@ def normalize_data(query: KeywordCoordinate, dataset: dataset_type) -> typing.Tu
     :return: A tuple with: the normalized query, the normalized dataset, the denormalization parameter max_x,  the denormalization parameter min_x, the denormalization parameter max_y and the denormalization parameter min_y,
     """
     logger = logging.getLogger(__name__ + '.normalize_data')
-    logger.debug('calculation for query {} and dataset {}'.format(query, dataset_comprehension(dataset)))
-    data = copy.deepcopy(dataset)
-    
-    # Cambio de Ramon (20200903)
-    data.append(copy.deepcopy(query)) # Añade una lista a una lista que solo contiene KeywordCoordinates
-    #data.append(copy.deepcopy(query[0]))
-    list_of_x = []
-    list_of_y = []
-    
-    type(data)
-    for kwc in data:  
-        list_of_x.append(kwc.coordinates.x)
-        list_of_y.append(kwc.coordinates.y)
-    min_x = min(list_of_x)
-    min_y = min(list_of_y)
-    max_x = max(list_of_x)
-    max_y = max(list_of_y)
-    for index in range(len(data)):
-        new_x = (data[index].coordinates.x - min_x) / (max_x - min_x)
-        new_y = (data[index].coordinates.y - min_y) / (max_y - min_y)
-        data[index].coordinates.x = new_x
-        data[index].coordinates.y = new_y
-    logger.debug('calculated query {} and dataset {}'.format(data[-1:][0], dataset_comprehension(data[:-1])))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('calculation for query %s and dataset %s', query, dataset_comprehension(dataset))
+    table = PoiTable.from_keyword_coordinates(list(dataset) + [query])
+    min_x = float(table.x.min())
+    min_y = float(table.y.min())
+    max_x = float(table.x.max())
+    max_y = float(table.y.max())
+    if max_x == min_x or max_y == min_y:
+        raise ZeroDivisionError('float division by zero')
+    data = create_dataset(table.with_coordinates((table.x - min_x) / (max_x - min_x),
+                                                 (table.y - min_y) / (max_y - min_y)))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('calculated query %s and dataset %s', data[-1:][0], dataset_comprehension(data[:-1]))
     return (data[-1:][0], data[:-1], max_x, min_x, max_y, min_y)
 
 
@@ -119,16 +109,15 @@ def denormalize_result_data(result_list: solution_list, max_x: float, min_x: flo
     :param min_y: Denormalization parameter min_y
     :return: The denormalized list of results
     """
-    logger = logging.getLogger(__name__ + '.denormalize_result_data')
     # print('********* TYPE: ', type(result_list[0][0]))
     # logger.debug('calculation for result {}, max_x {}, min_x {}, max_y {} and min_y {}'.format(result_list_comprehension(result_list), max_x, min_x, max_y, min_y))
     result: solution_list = []
     for solution_tuple in result_list:
-        solution_tuple_copy = copy.deepcopy(solution_tuple)
-        # print('>>>>> solution_tuple_copy', solution_tuple_copy)
-        for kwc in solution_tuple_copy[1]:
-            kwc.coordinates.x = kwc.coordinates.x * (max_x - min_x) + min_x
-            kwc.coordinates.y = kwc.coordinates.y * (max_y - min_y) + min_y
-        result.append(solution_tuple_copy)
-    logger.debug('calculated results {}'.format(result_list_comprehension(result)))
+        denormalized_subset = [KeywordCoordinate.from_table(
+            kwc.table.get_rescaled(max_x - min_x, min_x, max_y - min_y, min_y), kwc.row) for kwc in solution_tuple[1]]
+        if isinstance(solution_tuple[1], tuple):
+            denormalized_subset = tuple(denormalized_subset)
+        result.append((solution_tuple[0], denormalized_subset))
+    if denormalize_result_data_logger.isEnabledFor(logging.DEBUG):
+        denormalize_result_data_logger.debug('calculated results %s', result_list_comprehension(result))
     return result
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import typing
+
+import numpy as np
+
+from src.utils.data_handler import load_pickle
+from src.utils.shared_arrays import SharedArray
+from src.utils.typing_definitions import keyword_dataset_type
+
+
+class EmbeddingBackend:
+    """
+    The EmbeddingBackend class acts as base for the specific embedding models. An EmbeddingBackend turns keywords into vectors. The same backend can be passed to a Solver (semantic filtering) and to a CostFunction (word2vec keyword similarity) so that only a single model has to be loaded.
+    """
+
+    def get_vector(self, word: str) -> np.ndarray:
+        """
+        Implements the lookup of a single word. Any backend class needs to implement this.
+        :param word: The word
+        :return: The vector representation of the word. Raises a KeyError if the word is not part of the vocabulary.
+        """
+        pass
+
+    def get_document_vector(self, keywords: keyword_dataset_type) -> np.ndarray:
+        """
+        Calculates the vector representation of a list of keywords by averaging the vectors of all the known keywords.
+        :param keywords: The keywords
+        :return: The averaged vector or None if none of the keywords are part of the vocabulary
+        """
+        vectors: typing.List[np.ndarray] = []
+        for keyword in keywords:
+            try:
+                vectors.append(self.get_vector(keyword))
+            except KeyError:
+                continue
+        if len(vectors) == 0:
+            return None
+        return np.mean(vectors, axis=0)
+
+    def __getitem__(self, word: str) -> np.ndarray:
+        return self.get_vector(word)
+
+    def __contains__(self, word: str) -> bool:
+        try:
+            self.get_vector(word)
+        except KeyError:
+            return False
+        return True
+
+    def __str__(self):
+        return '{}()'.format(type(self).__name__)
+
+
+class Word2VecEmbeddingBackend(EmbeddingBackend):
+    """
+    The Word2VecEmbeddingBackend serves vectors from a pickled word2vec model, i.e. a dictionary of lowercase words and their vectors.
+    """
+
+    def __init__(self, model: typing.Dict[str, np.ndarray] = None, file_name: str = 'model.pickle'):
+        """
+        Constructs a new Word2VecEmbeddingBackend object. If no model is passed, the model is read from disk the first time a vector is requested.
+        :param model: The word2vec model as dictionary
+        :param file_name: The name of the model pickle inside the files directory of the project
+        """
+        self._model = model
+        self.file_name = file_name
+
+    @property
+    def model(self) -> typing.Dict[str, np.ndarray]:
+        if self._model is None:
+            logging.getLogger(__name__).debug('loading word2vec model {}'.format(self.file_name))
+            self._model = load_pickle(self.file_name)
+        return self._model
+
+    def get_vector(self, word: str) -> np.ndarray:
+        """
+        Returns the word2vec vector for a given word.
+        :param word: The word
+        :return: The vector representation of the word
+        """
+        return self.model[word.lower()]
+
+    def __str__(self):
+        return 'Word2VecEmbeddingBackend(file: {})'.format(self.file_name if self._model is None else 'in memory')
+
+
+class SharedEmbeddingBackend(EmbeddingBackend):
+    """
+    The SharedEmbeddingBackend serves the vectors of a word2vec model from shared memory. The words are kept sorted in one array and the vectors in a matrix with a row per word, both as SharedArrays. Worker processes which receive the backend attach to the same memory instead of unpickling their own copy of the model.
+    """
+
+    def __init__(self, model: typing.Union[typing.Dict[str, np.ndarray], Word2VecEmbeddingBackend]):
+        """
+        Constructs a new SharedEmbeddingBackend object by copying a word2vec model into shared memory.
+        :param model: The word2vec model as dictionary of lowercase words and their vectors or a Word2VecEmbeddingBackend
+        """
+        if isinstance(model, Word2VecEmbeddingBackend):
+            model = model.model
+        words = sorted(model)
+        self.words = SharedArray(np.array(words, dtype=str))
+        self.vectors = SharedArray(np.array([model[word] for word in words]))
+        self._rows: typing.Dict[str, int] = dict()
+
+    def get_vector(self, word: str) -> np.ndarray:
+        """
+        Returns the word2vec vector for a given word. The row of the word is looked up with a binary search and cached.
+        :param word: The word
+        :return: The read-only vector representation of the word
+        """
+        word = word.lower()
+        row = self._rows.get(word)
+        if row is None:
+            words = self.words.array
+            row = int(np.searchsorted(words, word))
+            if row >= len(words) or words[row] != word:
+                raise KeyError(word)
+            self._rows[word] = row
+        return self.vectors.array[row]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes of the shared words and vectors.
+        """
+        return self.words.nbytes + self.vectors.nbytes
+
+    def __getstate__(self):
+        return self.words, self.vectors
+
+    def __setstate__(self, state):
+        self.words, self.vectors = state
+        self._rows = dict()
+
+    def __str__(self):
+        return 'SharedEmbeddingBackend({} words)'.format(len(self.words.array))
+
+
+class SpacyEmbeddingBackend(EmbeddingBackend):
+    """
+    The SpacyEmbeddingBackend serves vectors from a spaCy language model. The model is loaded on first use and shared by all instances using the same model name.
+    """
+
+    _loaded_models: typing.Dict[str, typing.Any] = dict()
+
+    def __init__(self, model_name: str = 'en_core_web_lg'):
+        """
+        Constructs a new SpacyEmbeddingBackend object.
+        :param model_name: The name of the installed spaCy model package
+        """
+        self.model_name = model_name
+
+    @property
+    def nlp(self):
+        nlp = SpacyEmbeddingBackend._loaded_models.get(self.model_name)
+        if nlp is None:
+            logging.getLogger(__name__).debug('loading spaCy model {}'.format(self.model_name))
+            nlp = importlib.import_module(self.model_name).load()
+            SpacyEmbeddingBackend._loaded_models[self.model_name] = nlp
+        return nlp
+
+    def get_vector(self, word: str) -> np.ndarray:
+        """
+        Returns the spaCy vector for a given word.
+        :param word: The word
+        :return: The vector representation of the word
+        """
+        lexeme = self.nlp.vocab[word.lower()]
+        if not lexeme.has_vector:
+            raise KeyError(word)
+        return lexeme.vector
+
+    def get_document_vector(self, keywords: keyword_dataset_type) -> np.ndarray:
+        """
+        Calculates the vector representation of a list of keywords the same way spaCy does for a document.
+        :param keywords: The keywords
+        :return: The document vector
+        """
+        return self.nlp(' '.join(keywords)).vector
+
+    def __str__(self):
+        return 'SpacyEmbeddingBackend(model: {})'.format(self.model_name)
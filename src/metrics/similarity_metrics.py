@@ -4,16 +4,23 @@ import itertools
 import logging
 import math
 import typing
-import spacy
-
 
 import numpy as np
-import pandas as pd
 
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.utils.logging_utils import dataset_comprehension, sets_of_set_comprehension
 from src.utils.typing_definitions import sim_dataset_type, keyword_dataset_type, dataset_type
 
+cosine_similarity_logger = logging.getLogger(__name__ + '.cosine_similarity')
+one_hot_encode_logger = logging.getLogger(__name__ + '.one_hot_encode')
+create_keyword_vector_logger = logging.getLogger(__name__ + '.create_keyword_vector')
+create_combined_keyword_vector_logger = logging.getLogger(__name__ + '.create_combined_keyword_vector')
+separated_cosine_similarity_logger = logging.getLogger(__name__ + '.separated_cosine_similarity')
+combined_cosine_similarity_logger = logging.getLogger(__name__ + '.combined_cosine_similarity')
+keyword_id_cosine_similarity_logger = logging.getLogger(__name__ + '.keyword_id_cosine_similarity')
+tfidf_cosine_similarity_logger = logging.getLogger(__name__ + '.tfidf_cosine_similarity')
+word2vec_cosine_similarity_logger = logging.getLogger(__name__ + '.word2vec_cosine_similarity')
+find_subsets_logger = logging.getLogger(__name__ + '.find_subsets')
 
 def cosine_similarity(dataset1: sim_dataset_type, dataset2: sim_dataset_type) -> float:
     """
@@ -22,15 +29,13 @@ def cosine_similarity(dataset1: sim_dataset_type, dataset2: sim_dataset_type) ->
     :param dataset2: The second dataset
     :return: The cosine similarity
     """
-    logger = logging.getLogger(__name__ + '.cosine_similarity')
-    logger.debug('calculating for {} and {}'.format(dataset1, dataset2))
     if len(dataset1) != len(dataset2):
         msg = 'Both datasets have to be of the same length.'
-        logger.error(msg)
+        cosine_similarity_logger.error(msg)
         raise ValueError(msg)
     if sum(dataset1) == 0 or sum(dataset2) == 0:
         msg = 'Neither dataset may only consist of 0-values.'
-        logger.error(msg)
+        cosine_similarity_logger.error(msg)
         raise ValueError(msg)
     # Numerator
     numerator = 0
@@ -44,7 +49,8 @@ def cosine_similarity(dataset1: sim_dataset_type, dataset2: sim_dataset_type) ->
         b += dataset2[index] ** 2
     denominator = math.sqrt(a) * math.sqrt(b)
     solution = numerator / denominator
-    logger.debug('calculated {}'.format(solution))
+    if cosine_similarity_logger.isEnabledFor(logging.DEBUG):
+        cosine_similarity_logger.debug('calculated %s for %s and %s', solution, dataset1, dataset2)
     return solution
 
 
@@ -56,8 +62,6 @@ def one_hot_encode(keyword_list1, keyword_list2, combined_keyword_list) -> typin
     :param combined_keyword_list: The combined keyword list
     :return: A tuple with the one-hot-encoded versions of the first and second keyword list
     """
-    logger = logging.getLogger(__name__ + '.one_hot_encode')
-    logger.debug('calculating list 1 {}, list 2 {} using combined list {}'.format(keyword_list1, keyword_list2, combined_keyword_list))
     result_vector1: typing.List[int] = []
     result_vector2: typing.List[int] = []
     for element in combined_keyword_list:
@@ -70,7 +74,9 @@ def one_hot_encode(keyword_list1, keyword_list2, combined_keyword_list) -> typin
         else:
             result_vector2.append(0)
     solution = (result_vector1, result_vector2)
-    logger.debug('calculated {}'.format(solution))
+    if one_hot_encode_logger.isEnabledFor(logging.DEBUG):
+        one_hot_encode_logger.debug('calculated %s for list 1 %s, list 2 %s using combined list %s', solution,
+                                    keyword_list1, keyword_list2, combined_keyword_list)
     return solution
 
 
@@ -83,14 +89,13 @@ def create_keyword_vector(keyword_list1: keyword_dataset_type, keyword_list2: ke
     :param keyword_list2: The second input list
     :return: A tuple with the first one-hot-encoded keyword vector and the second one-hot-encoded keyword vector
     """
-    logger = logging.getLogger(__name__ + '.create_keyword_vector')
-    logger.debug('calculating for {} and {}'.format(keyword_list1, keyword_list2))
     merged_list = list(map(str.lower, (keyword_list1 + keyword_list2)))
     vector = list(set(merged_list))
-    logger.debug('calculated combined vector of {}'.format(vector))
     del (merged_list)
     solution = one_hot_encode(keyword_list1, keyword_list2, vector)
-    logger.debug('calculated {}'.format(solution))
+    if create_keyword_vector_logger.isEnabledFor(logging.DEBUG):
+        create_keyword_vector_logger.debug('calculated %s for %s and %s using combined vector %s', solution,
+                                           keyword_list1, keyword_list2, vector)
     return solution
 
 
@@ -101,8 +106,9 @@ def create_combined_keyword_vector(query: KeywordCoordinate, dataset: dataset_ty
     :param dataset: The dataset
     :return: A list with all the unique keywords in the query and dataset
     """
-    logger = logging.getLogger(__name__ + '.create_combined_keyword_vector')
-    logger.debug('calculating for query {} and dataset {}'.format(query, dataset_comprehension(dataset)))
+    if create_combined_keyword_vector_logger.isEnabledFor(logging.DEBUG):
+        create_combined_keyword_vector_logger.debug('calculating for query %s and dataset %s', query,
+                                                    dataset_comprehension(dataset))
     result_keyword_list: keyword_dataset_type = []
     for string in query.keywords:
         result_keyword_list.append(string)
@@ -121,11 +127,11 @@ def separated_cosine_similarity(query_keyword_list: keyword_dataset_type,
     :param data_keyword_list: The keyword list of the data point
     :return: The cosine similarity between the query keywords and data point keywords
     """
-    logger = logging.getLogger(__name__ + '.separated_cosine_similarity')
-    logger.debug('calculating for query {} and dataset {}'.format(query_keyword_list, data_keyword_list))
     query_vector, data_vector = create_keyword_vector(query_keyword_list, data_keyword_list)
     solution = 1 - cosine_similarity(query_vector, data_vector)
-    logger.debug('calculated {}'.format(solution))
+    if separated_cosine_similarity_logger.isEnabledFor(logging.DEBUG):
+        separated_cosine_similarity_logger.debug('calculated %s for query %s and dataset %s', solution,
+                                                 query_keyword_list, data_keyword_list)
     return solution
 
 
@@ -138,12 +144,62 @@ def combined_cosine_similarity(query_keyword_list: keyword_dataset_type, data_ke
     :param dataset_keyword_list: The keyword list for the entire dataset
     :return: The cosine similarity between the query keywords and data point keywords using the baseline keyword list of the entire dataset.
     """
-    logger = logging.getLogger(__name__ + '.combined_cosine_similarity')
-    logger.debug('calculating for query {} and dataset {} using combined keyword list {}'.format(query_keyword_list, data_keyword_list, dataset_keyword_list))
     query_vector, data_vector = one_hot_encode(query_keyword_list, data_keyword_list, dataset_keyword_list)
-    logger.debug('calculated query vector {} and data vector {}'.format(query_vector, data_vector))
     solution = 1 - cosine_similarity(query_vector, data_vector)
-    logger.debug('calculated {}'.format(solution))
+    if combined_cosine_similarity_logger.isEnabledFor(logging.DEBUG):
+        combined_cosine_similarity_logger.debug(
+            'calculated %s for query %s and dataset %s using combined keyword list %s (query vector %s, data vector %s)',
+            solution, query_keyword_list, data_keyword_list, dataset_keyword_list, query_vector, data_vector)
+    return solution
+
+
+def keyword_id_cosine_similarity(query: KeywordCoordinate, data_element: KeywordCoordinate) -> float:
+    """
+    Calculates the cosine similarity cost between the keywords of a query and the keywords of a data point using their interned keyword ids. Every distinct keyword counts once, so the result is the same as the one of combined_cosine_similarity with the combined keyword list of the query and the data point.
+    :param query: The query
+    :param data_element: The data point
+    :return: The cosine similarity cost between the query keywords and data point keywords
+    """
+    query_keyword_ids = query.table.get_keyword_id_set(query.row)
+    data_keyword_ids = data_element.table.get_keyword_id_set(data_element.row)
+    if len(query_keyword_ids) == 0 or len(data_keyword_ids) == 0:
+        msg = 'Neither dataset may only consist of 0-values.'
+        keyword_id_cosine_similarity_logger.error(msg)
+        raise ValueError(msg)
+    numerator = len(query_keyword_ids & data_keyword_ids)
+    solution = 1 - numerator / (math.sqrt(len(query_keyword_ids)) * math.sqrt(len(data_keyword_ids)))
+    if keyword_id_cosine_similarity_logger.isEnabledFor(logging.DEBUG):
+        keyword_id_cosine_similarity_logger.debug('calculated %s for query %s and data point %s', solution, query,
+                                                  data_element)
+    return solution
+
+
+def tfidf_cosine_similarity(query: KeywordCoordinate, data_element: KeywordCoordinate) -> float:
+    """
+    Calculates the cosine similarity cost between the keywords of a query and the keywords of a data point using the keyword weights (e.g. the TF-IDF scores of load_csv) stored in their tables. Keywords without a stored weight have the weight 1.0.
+    :param query: The query
+    :param data_element: The data point
+    :return: The weighted cosine similarity cost between the query keywords and data point keywords
+    """
+    query_norm = query.table.keyword_weight_norms[query.row]
+    data_norm = data_element.table.keyword_weight_norms[data_element.row]
+    if query_norm == 0 or data_norm == 0:
+        msg = 'Neither dataset may only consist of 0-values.'
+        tfidf_cosine_similarity_logger.error(msg)
+        raise ValueError(msg)
+    query_weights = query.table.get_keyword_weight_dict(query.row)
+    data_weights = data_element.table.get_keyword_weight_dict(data_element.row)
+    if len(query_weights) > len(data_weights):
+        query_weights, data_weights = data_weights, query_weights
+    numerator = 0.0
+    for keyword_id, weight in query_weights.items():
+        data_weight = data_weights.get(keyword_id)
+        if data_weight is not None:
+            numerator += weight * data_weight
+    solution = 1 - numerator / (float(query_norm) * float(data_norm))
+    if tfidf_cosine_similarity_logger.isEnabledFor(logging.DEBUG):
+        tfidf_cosine_similarity_logger.debug('calculated %s for query %s and data point %s', solution, query,
+                                             data_element)
     return solution
 
 
@@ -152,61 +208,67 @@ def word2vec_cosine_similarity(wordlist1: keyword_dataset_type, wordlist2: keywo
     Calculates the cosine similarity between lists of words based on their word2vec vectors.
     :param wordlist1: The first word list
     :param wordlist2: The second word list
-    :param model: The word2vec model
+    :param model: The word2vec model or an EmbeddingBackend
     :return: The calculated keyword similarity cost using word2vec vectors
     """
-    logger = logging.getLogger(__name__ + '.word2vec_cosine_similarity')
-    logger.debug('calculating for wordlist 1 {} and wordlist 2 {}'.format(wordlist1, wordlist2))
+    logger = word2vec_cosine_similarity_logger
     word_vector_list1: typing.List[np.array] = []
     for element in wordlist1:
-        logger.debug('getting vector for word {}'.format(element.lower()))
         try:
             word_vector_list1.append(get_word_vector(element, model))
         except:
-            logger.warning('the word {} is not part of the vocabulary and will therefore not be taken into account'.format(element))
-    logger.debug('vector 1 {}'.format(word_vector_list1))
+            logger.warning('the word %s is not part of the vocabulary and will therefore not be taken into account', element)
     if len(word_vector_list1) == 0:
-        logger.error('query (keywords: {}) has no valid keywords'.format(wordlist1))
+        logger.error('query (keywords: %s) has no valid keywords', wordlist1)
         raise ValueError('query (keywords: {}) has no valid keywords'.format(wordlist1))
     word_vector_list2: typing.List[np.array] = []
     for element in wordlist2:
-        logger.debug('getting vector for word {}'.format(element))
         try:
             word_vector_list2.append(get_word_vector(element, model))
         except:
-            logger.warning('the word {} is not part of the vocabulary and will therefore not be taken into account'.format(element))
-    logger.debug('vector 2 {}'.format(word_vector_list2))
+            logger.warning('the word %s is not part of the vocabulary and will therefore not be taken into account', element)
     if len(word_vector_list2) == 0:
-        logger.error('query (keywords: {}) has no valid keywords'.format(wordlist2))
+        logger.error('query (keywords: %s) has no valid keywords', wordlist2)
         raise ValueError('query (keywords: {}) has no valid keywords'.format(wordlist2))
     vector_shape = word_vector_list1[0].shape
-    logger.debug('vector_shape {}'.format(vector_shape))
     query_vector_sum: np.array = np.zeros(vector_shape)
     for vector in word_vector_list1:
         query_vector_sum = query_vector_sum + vector
-    logger.debug('query_vector_sum {}'.format(query_vector_sum))
     subset_vector_sum: np.array = np.zeros(vector_shape)
     for vector in word_vector_list2:
         subset_vector_sum = subset_vector_sum + vector
-    logger.debug('subset_vector_sum {}'.format(subset_vector_sum))
     sim = cosine_similarity(query_vector_sum, subset_vector_sum)
-    logger.debug('similarity {}'.format(sim))
-    logger.debug('returning cost {}'.format(1 - sim))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('calculated cost %s for wordlist 1 %s and wordlist 2 %s (query_vector_sum %s, subset_vector_sum %s)',
+                     1 - sim, wordlist1, wordlist2, query_vector_sum, subset_vector_sum)
     return 1 - sim
 
-# Using spaCy
-# Returns simlarity values between a query and a POI
-def semantic_similarity(query_nlps, data_element: KeywordCoordinate, nlp):
-    
-    result: bool;
-    
-    element_string = ''        
-    for kw in data_element.keywords:
-        element_string = element_string + ' ' + kw
-    
-    doc = nlp(element_string)
-    
-    return query_nlps.similarity(doc)
+def vector_cosine_similarity(vector1: np.ndarray, vector2: np.ndarray) -> float:
+    """
+    Calculates the cosine similarity between two dense vectors. Missing or zero vectors have a similarity of 0.0.
+    :param vector1: The first vector
+    :param vector2: The second vector
+    :return: The cosine similarity
+    """
+    if vector1 is None or vector2 is None:
+        return 0.0
+    norm = np.linalg.norm(vector1) * np.linalg.norm(vector2)
+    if norm == 0:
+        return 0.0
+    return float(np.dot(vector1, vector2) / norm)
+
+
+def semantic_similarity(query_vector: np.ndarray, data_element: KeywordCoordinate, embedding_backend) -> float:
+    """
+    Calculates the semantic similarity between a query and a POI.
+    :param query_vector: The document vector of the query keywords as returned by the embedding backend
+    :param data_element: The POI
+    :param embedding_backend: The EmbeddingBackend used to vectorize the keywords of the POI
+    :return: The cosine similarity between the query and the POI keywords
+    """
+    element_vector = embedding_backend.get_document_vector(data_element.keywords)
+    return vector_cosine_similarity(query_vector, element_vector)
+
 
 # https://stackoverflow.com/questions/374626/how-can-i-find-all-the-subsets-of-a-set-with-exactly-n-elements#374645
 def find_subsets(input_set: dataset_type, subset_size: int):
@@ -216,13 +278,13 @@ def find_subsets(input_set: dataset_type, subset_size: int):
     :param subset_size: The subset size
     :return: A set of all the subsets
     """
-    logger = logging.getLogger(__name__ + '.find_subsets')
-    logger.debug('finding all subsets of length {} in set {}'.format(subset_size, dataset_comprehension(input_set)))
     if subset_size > len(input_set):
         solution = set(itertools.combinations(input_set, 0))
     else:
         solution = set(itertools.combinations(input_set, subset_size))
-    logger.debug('found {}'.format(sets_of_set_comprehension(solution)))
+    if find_subsets_logger.isEnabledFor(logging.DEBUG):
+        find_subsets_logger.debug('found %s subsets of length %s in set %s: %s', len(solution), subset_size,
+                                  dataset_comprehension(input_set), sets_of_set_comprehension(solution))
     return solution
 
 # def find_subsets(input_set: dataset_type, subset_size: int, candidates: pd.DataFrame):
@@ -248,7 +310,7 @@ def get_word_vector(word: str, model):
     """
     Returns the word vector for a given word and model.
     :param word: The word
-    :param model: The model
+    :param model: The model. Either a dictionary of lowercase words and vectors or an EmbeddingBackend
     :return: The vector representation of the word
     """
     word_lower = word.lower()
@@ -1,7 +1,6 @@
-import logging
-
-
 class Coordinate:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
         """
         Constructs a Coordinate object. This class keeps track of the physical 2D-location of KeywordCoordinates.
@@ -10,7 +9,15 @@ class Coordinate:
         """
         self.x = x
         self.y = y
-        logging.getLogger(__name__).debug('created at ({}, {})'.format(self.x, self.y))
+
+    def __getstate__(self):
+        return self.x, self.y
+
+    def __setstate__(self, state):
+        # Pickles created before the introduction of __slots__ contain the attribute dictionary.
+        if isinstance(state, dict):
+            state = (state['x'], state['y'])
+        self.x, self.y = state
 
     def __str__(self):
         return '({}, {})'.format(self.x, self.y)
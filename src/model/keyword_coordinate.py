@@ -1,38 +1,109 @@
 from __future__ import annotations
 
-import logging
 import math
 import typing
 
 from src.model.coordinate import Coordinate
+from src.model.poi_table import PoiTable
+from src.model.vocabulary import vocabulary
 
 
 class KeywordCoordinate:
+    """
+    A KeywordCoordinate combines a physical 2D-location with associated keywords. It is either a lightweight view of a single row of a PoiTable or a standalone POI, whose single-row table is only created when needed. Just like the table it is immutable: create a new KeywordCoordinate instead of changing an existing one.
+    """
+
+    __slots__ = ('_table', '_row', '_name', '_id', '_coordinates', '_keywords', '_hash')
+
     def __init__(self, name: str, x: float, y: float, keyword_set: typing.List[str]):
         """
-        Constructs a KeywordCoordinate object. This object combines a physical 2D-location with associated keywords.
+        Constructs a standalone KeywordCoordinate object. It only keeps its values, the table with its single row is created the first time it is needed. Use PoiTable and create_dataset to create whole datasets.
         :param name: POI's name
         :param x: The x coordinate
         :param y: The y coordinate
-        :param keyword_set: A list with all the keywords
+        :param keyword_set: A list with all the keywords. Keywords given as a single string are split at whitespace.
+        """
+        if isinstance(keyword_set, str):
+            keyword_set = keyword_set.split()
+        self._set_values(name, x, y, list(keyword_set), 0)
+
+    @classmethod
+    def from_table(cls, table: PoiTable, row: int) -> KeywordCoordinate:
+        """
+        Creates a view of a row of a PoiTable.
+        :param table: The table
+        :param row: The row
+        :return: The KeywordCoordinate
         """
-        logger = logging.getLogger(__name__)
-        self.name: str = name
-        self.coordinates: Coordinate = Coordinate(x, y)
-        self.keywords: typing.List[str] = keyword_set
-        logger.debug('created at ({}, {}) with the keywords {}'.format(self.coordinates.x, self.coordinates.y, self.keywords))
+        kwc = cls.__new__(cls)
+        kwc._set_row(table, row)
+        return kwc
+
+    def _set_row(self, table: PoiTable, row: int):
+        self._table = table
+        self._row = row
+        self._name: str = None
+        self._id: int = None
+        self._coordinates: Coordinate = None
+        self._keywords: typing.List[str] = None
+        self._hash: int = None
+
+    def _set_values(self, name: str, x: float, y: float, keywords: typing.List[str], poi_id: int):
+        self._table: PoiTable = None
+        self._row = 0
+        self._name = name
+        self._id = poi_id
+        self._coordinates = Coordinate(x, y)
+        self._keywords = keywords
+        self._hash: int = None
+        # The keywords are interned right away, so the keyword ids do not depend on when the table is created
+        vocabulary.get_ids(keywords)
+
+    @property
+    def table(self) -> PoiTable:
+        if self._table is None:
+            self._table = PoiTable.from_row(self._name, self._coordinates.x, self._coordinates.y, self._keywords,
+                                            self._id)
+        return self._table
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    @property
+    def id(self) -> int:
+        if self._table is None:
+            return self._id
+        return int(self._table.ids[self._row])
+
+    @property
+    def name(self) -> str:
+        if self._table is None:
+            return self._name
+        return self._table.names[self._row]
+
+    @property
+    def coordinates(self) -> Coordinate:
+        if self._coordinates is None:
+            self._coordinates = Coordinate(float(self._table.x[self._row]), float(self._table.y[self._row]))
+        return self._coordinates
+
+    @property
+    def keywords(self) -> typing.List[str]:
+        if self._keywords is None:
+            self._keywords = self._table.get_keywords(self._row)
+        return self._keywords
 
     def __eq__(self, other: KeywordCoordinate):
+        if not isinstance(other, KeywordCoordinate):
+            return NotImplemented
+        if self._table is not None and self._table is other._table and self._row == other._row:
+            return True
         delta = 0.000000001
         if not (math.fabs(self.coordinates.x - other.coordinates.x) < delta) or not (
                 math.fabs(self.coordinates.y - other.coordinates.y) < delta):
             return False
-        if len(self.keywords) != len(other.keywords):
-            return False
-        for index in range(len(self.keywords)):
-            if self.keywords[index] != other.keywords[index]:
-                return False
-        return True
+        return self.keywords == other.keywords
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -42,7 +113,50 @@ class KeywordCoordinate:
         return round(self.coordinates.x, rounding), round(self.coordinates.y, rounding), tuple(self.keywords)
 
     def __hash__(self):
-        return hash(self.__key())
+        if self._hash is None:
+            self._hash = hash(self.__key())
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        # The rows of a shared table are pickled by reference. Everything else is pickled as the values of the row, so
+        # a single POI does not drag its whole table along. The weights are only needed if they are not the default.
+        if self._table is None:
+            return self.name, self.coordinates.x, self.coordinates.y, self.keywords, self.id
+        if self._table.is_shared:
+            return self._table, self._row
+        weights = self._table.get_keyword_weight_dict(self._row)
+        if all(weight == 1.0 for weight in weights.values()):
+            return self.name, self.coordinates.x, self.coordinates.y, self.keywords, self.id
+        return self.name, self.coordinates.x, self.coordinates.y, self.keywords, self.id, [
+            weights[keyword_id] for keyword_id in self._table.get_keyword_ids(self._row).tolist()]
+
+    def __setstate__(self, state):
+        # Pickles created before the introduction of the PoiTable contain the attribute dictionary.
+        if isinstance(state, dict):
+            coordinates = state['coordinates']
+            self._set_values(state.get('name'), coordinates.x, coordinates.y, list(state['keywords']), 0)
+        elif len(state) == 2:
+            self._set_row(*state)
+        elif len(state) == 5:
+            self._set_values(*state)
+        else:
+            name, x, y, keywords, poi_id, keyword_weights = state
+            self._set_row(PoiTable.from_row(name, x, y, keywords, poi_id, keyword_weights), 0)
 
     def __str__(self):
         return '({}, {}, {}), {}'.format(self.name, self.coordinates.x, self.coordinates.y, self.keywords)
+
+
+def create_dataset(table: PoiTable) -> typing.List[KeywordCoordinate]:
+    """
+    Creates a dataset with a view for every row of a table.
+    :param table: The table
+    :return: The dataset
+    """
+    return [KeywordCoordinate.from_table(table, row) for row in range(len(table))]
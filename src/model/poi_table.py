@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import math
+import typing
+
+import numpy as np
+
+from src.model.vocabulary import vocabulary
+from src.utils.shared_arrays import SharedArray
+
+
+def sort_keyword_ids(keyword_offsets: np.ndarray, keyword_ids: np.ndarray,
+                     keyword_weights: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculates the sorted and deduplicated keyword ids of every row of a CSR keyword structure. If a keyword appears multiple times in a row, the weight of its first occurrence is kept.
+    :param keyword_offsets: The CSR offsets
+    :param keyword_ids: The CSR keyword ids
+    :param keyword_weights: The weights of the keyword ids
+    :return: A tuple with the CSR offsets, the sorted keyword ids and their weights
+    """
+    number_of_rows = len(keyword_offsets) - 1
+    rows = np.repeat(np.arange(number_of_rows), np.diff(keyword_offsets))
+    order = np.lexsort((np.arange(len(keyword_ids)), keyword_ids, rows))
+    sorted_rows = rows[order]
+    sorted_ids = keyword_ids[order]
+    first_occurrence = np.ones(len(order), dtype=bool)
+    first_occurrence[1:] = (sorted_rows[1:] != sorted_rows[:-1]) | (sorted_ids[1:] != sorted_ids[:-1])
+    sorted_offsets = np.zeros(number_of_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sorted_rows[first_occurrence], minlength=number_of_rows), out=sorted_offsets[1:])
+    return sorted_offsets, sorted_ids[first_occurrence], keyword_weights[order][first_occurrence]
+
+
+class PoiTable:
+    """
+    The PoiTable stores a whole dataset of POIs in a columnar way: coordinate arrays, a name array, stable ids and the interned keyword ids in CSR format (the keywords of row i are keyword_ids[keyword_offsets[i]:keyword_offsets[i + 1]]). Besides the keywords in their original order, the table keeps the sorted, deduplicated keyword ids of every row together with their weights (e.g. TF-IDF scores) for the keyword similarity metrics. KeywordCoordinates are lightweight views of single rows. A table is immutable, so it can be shared freely between views, copies and processes.
+    """
+
+    __slots__ = ('x', 'y', 'names', 'ids', 'keyword_offsets', 'keyword_ids', 'sorted_keyword_offsets',
+                 'sorted_keyword_ids', 'sorted_keyword_weights', 'keyword_weight_norms', '_keyword_id_sets',
+                 '_keyword_weight_dicts', '_rescaled_tables', '_shared_arrays')
+
+    def __init__(self, names: typing.Sequence[str], x: typing.Sequence[float], y: typing.Sequence[float],
+                 keywords: typing.Sequence[typing.Sequence[str]], ids: typing.Sequence[int] = None,
+                 keyword_weights: typing.Sequence[typing.Sequence[float]] = None):
+        """
+        Constructs a new PoiTable object. All the sequences need to have the same length.
+        :param names: The names of the POIs
+        :param x: The x coordinates
+        :param y: The y coordinates
+        :param keywords: The keywords of every POI. Keywords given as a single string are split at whitespace.
+        :param ids: The stable ids of the POIs. By default the POIs are numbered in the given order.
+        :param keyword_weights: The weights of the keywords of every POI, e.g. their TF-IDF scores. By default every keyword has the weight 1.0.
+        """
+        keyword_offsets = np.zeros(len(keywords) + 1, dtype=np.int64)
+        keyword_ids: typing.List[int] = []
+        weights: typing.List[float] = []
+        for row, keyword_list in enumerate(keywords):
+            if isinstance(keyword_list, str):
+                keyword_list = keyword_list.split()
+            keyword_ids.extend(vocabulary.get_ids(keyword_list))
+            if keyword_weights is None:
+                weights.extend([1.0] * len(keyword_list))
+            elif len(keyword_weights[row]) != len(keyword_list):
+                msg = 'The number of keyword weights does not match the number of keywords in row {}.'.format(row)
+                raise ValueError(msg)
+            else:
+                weights.extend(keyword_weights[row])
+            keyword_offsets[row + 1] = len(keyword_ids)
+        if ids is None:
+            ids = np.arange(len(keywords), dtype=np.int64)
+        keyword_ids = np.asarray(keyword_ids, dtype=np.int32)
+        self._set_arrays(np.array(names, dtype=object), np.array(x, dtype=np.float64),
+                         np.array(y, dtype=np.float64), np.array(ids, dtype=np.int64), keyword_offsets, keyword_ids,
+                         sort_keyword_ids(keyword_offsets, keyword_ids, np.asarray(weights, dtype=np.float64)))
+
+    @classmethod
+    def from_arrays(cls, names: np.ndarray, x: np.ndarray, y: np.ndarray, ids: np.ndarray,
+                    keyword_offsets: np.ndarray, keyword_ids: np.ndarray,
+                    sorted_keywords: typing.Tuple[np.ndarray, np.ndarray, np.ndarray] = None) -> PoiTable:
+        """
+        Constructs a new PoiTable object from already interned arrays without copying them.
+        :param names: The name array
+        :param x: The x coordinate array
+        :param y: The y coordinate array
+        :param ids: The id array
+        :param keyword_offsets: The CSR offsets of the keywords
+        :param keyword_ids: The CSR keyword ids
+        :param sorted_keywords: A tuple with the CSR offsets, ids and weights of the sorted and deduplicated keyword ids as returned by sort_keyword_ids. By default they are calculated with the weight 1.0 for every keyword.
+        :return: The new PoiTable
+        """
+        if sorted_keywords is None:
+            sorted_keywords = sort_keyword_ids(keyword_offsets, keyword_ids,
+                                               np.ones(len(keyword_ids), dtype=np.float64))
+        table = cls.__new__(cls)
+        table._set_arrays(names, x, y, ids, keyword_offsets, keyword_ids, sorted_keywords)
+        return table
+
+    @classmethod
+    def from_row(cls, name: str, x: float, y: float, keywords: typing.Sequence[str], poi_id: int = 0,
+                 keyword_weights: typing.Sequence[float] = None) -> PoiTable:
+        """
+        Constructs a new PoiTable object with a single row. This avoids the CSR bookkeeping of the general constructor, which makes it considerably faster for the tables of standalone KeywordCoordinates.
+        :param name: The name of the POI
+        :param x: The x coordinate
+        :param y: The y coordinate
+        :param keywords: The keywords of the POI
+        :param poi_id: The stable id of the POI
+        :param keyword_weights: The weights of the keywords. By default every keyword has the weight 1.0.
+        :return: The new PoiTable
+        """
+        keyword_ids = np.array(vocabulary.get_ids(keywords), dtype=np.int32)
+        if keyword_weights is None:
+            weights = np.ones(len(keyword_ids), dtype=np.float64)
+        elif len(keyword_weights) != len(keyword_ids):
+            msg = 'The number of keyword weights does not match the number of keywords in row 0.'
+            raise ValueError(msg)
+        else:
+            weights = np.array(keyword_weights, dtype=np.float64)
+        # np.unique sorts stably, so the weight of the first occurrence of a keyword is kept like in sort_keyword_ids
+        sorted_keyword_ids, first_occurrence = np.unique(keyword_ids, return_index=True)
+        sorted_keyword_weights = weights[first_occurrence]
+        names = np.empty(1, dtype=object)
+        names[0] = name
+        table = cls.__new__(cls)
+        table._set_arrays(names, np.array([x], dtype=np.float64), np.array([y], dtype=np.float64),
+                          np.array([poi_id], dtype=np.int64), np.array([0, len(keyword_ids)], dtype=np.int64),
+                          keyword_ids, (np.array([0, len(sorted_keyword_ids)], dtype=np.int64), sorted_keyword_ids,
+                                        sorted_keyword_weights),
+                          np.array([math.sqrt(np.dot(sorted_keyword_weights, sorted_keyword_weights))]))
+        return table
+
+    @classmethod
+    def from_keyword_coordinates(cls, keyword_coordinates: typing.Sequence) -> PoiTable:
+        """
+        Constructs a new PoiTable object containing the rows of the given KeywordCoordinates in the given order.
+        :param keyword_coordinates: The KeywordCoordinates
+        :return: The new PoiTable
+        """
+        length = len(keyword_coordinates)
+        names = np.empty(length, dtype=object)
+        x = np.empty(length, dtype=np.float64)
+        y = np.empty(length, dtype=np.float64)
+        ids = np.empty(length, dtype=np.int64)
+        keyword_offsets = np.zeros(length + 1, dtype=np.int64)
+        sorted_keyword_offsets = np.zeros(length + 1, dtype=np.int64)
+        keyword_id_slices: typing.List[np.ndarray] = [np.zeros(0, dtype=np.int32)]
+        sorted_keyword_id_slices: typing.List[np.ndarray] = [np.zeros(0, dtype=np.int32)]
+        sorted_keyword_weight_slices: typing.List[np.ndarray] = [np.zeros(0, dtype=np.float64)]
+        for index, kwc in enumerate(keyword_coordinates):
+            table = kwc.table
+            row = kwc.row
+            names[index] = table.names[row]
+            x[index] = table.x[row]
+            y[index] = table.y[row]
+            ids[index] = table.ids[row]
+            start = table.keyword_offsets[row]
+            end = table.keyword_offsets[row + 1]
+            keyword_id_slices.append(table.keyword_ids[start:end])
+            keyword_offsets[index + 1] = keyword_offsets[index] + end - start
+            start = table.sorted_keyword_offsets[row]
+            end = table.sorted_keyword_offsets[row + 1]
+            sorted_keyword_id_slices.append(table.sorted_keyword_ids[start:end])
+            sorted_keyword_weight_slices.append(table.sorted_keyword_weights[start:end])
+            sorted_keyword_offsets[index + 1] = sorted_keyword_offsets[index] + end - start
+        return cls.from_arrays(names, x, y, ids, keyword_offsets, np.concatenate(keyword_id_slices),
+                               (sorted_keyword_offsets, np.concatenate(sorted_keyword_id_slices),
+                                np.concatenate(sorted_keyword_weight_slices)))
+
+    def _set_arrays(self, names: np.ndarray, x: np.ndarray, y: np.ndarray, ids: np.ndarray,
+                    keyword_offsets: np.ndarray, keyword_ids: np.ndarray,
+                    sorted_keywords: typing.Tuple[np.ndarray, np.ndarray, np.ndarray],
+                    keyword_weight_norms: np.ndarray = None):
+        if keyword_weight_norms is None:
+            sorted_offsets, sorted_ids, sorted_weights = sorted_keywords
+            cumulated_squared_weights = np.zeros(len(sorted_ids) + 1, dtype=np.float64)
+            np.cumsum(sorted_weights ** 2, out=cumulated_squared_weights[1:])
+            keyword_weight_norms = np.sqrt(cumulated_squared_weights[sorted_offsets[1:]] -
+                                           cumulated_squared_weights[sorted_offsets[:-1]])
+        for array in (names, x, y, ids, keyword_offsets, keyword_ids, keyword_weight_norms) + tuple(sorted_keywords):
+            array.flags.writeable = False
+        self.names = names
+        self.x = x
+        self.y = y
+        self.ids = ids
+        self.keyword_offsets = keyword_offsets
+        self.keyword_ids = keyword_ids
+        self.sorted_keyword_offsets, self.sorted_keyword_ids, self.sorted_keyword_weights = sorted_keywords
+        self.keyword_weight_norms = keyword_weight_norms
+        self._keyword_id_sets: typing.List[typing.FrozenSet[int]] = None
+        self._keyword_weight_dicts: typing.List[typing.Dict[int, float]] = None
+        self._rescaled_tables: typing.Dict[typing.Tuple[float, float, float, float], PoiTable] = dict()
+        # The SharedArrays of a shared table, the keyword ids they were created with and the words of these ids
+        self._shared_arrays: typing.Tuple[typing.Tuple[SharedArray, ...], np.ndarray, typing.List[str]] = None
+
+    def get_keyword_ids(self, row: int) -> np.ndarray:
+        """
+        Returns the interned keyword ids of a row.
+        :param row: The row
+        :return: The keyword ids in the original order of the keywords
+        """
+        return self.keyword_ids[self.keyword_offsets[row]:self.keyword_offsets[row + 1]]
+
+    def get_sorted_keyword_ids(self, row: int) -> np.ndarray:
+        """
+        Returns the sorted and deduplicated keyword ids of a row.
+        :param row: The row
+        :return: The sorted keyword ids
+        """
+        return self.sorted_keyword_ids[self.sorted_keyword_offsets[row]:self.sorted_keyword_offsets[row + 1]]
+
+    def get_keyword_id_set(self, row: int) -> typing.FrozenSet[int]:
+        """
+        Returns the keyword ids of a row as a set. The sets of all rows are created the first time a set is requested.
+        :param row: The row
+        :return: The set of keyword ids
+        """
+        if self._keyword_id_sets is None:
+            offsets = self.sorted_keyword_offsets.tolist()
+            keyword_ids = self.sorted_keyword_ids.tolist()
+            self._keyword_id_sets = [frozenset(keyword_ids[offsets[index]:offsets[index + 1]]) for index in
+                                     range(len(self))]
+        return self._keyword_id_sets[row]
+
+    def get_keyword_weight_dict(self, row: int) -> typing.Dict[int, float]:
+        """
+        Returns the weights of the keyword ids of a row. The dictionaries of all rows are created the first time a dictionary is requested.
+        :param row: The row
+        :return: A dictionary with the keyword ids as keys and their weights as values
+        """
+        if self._keyword_weight_dicts is None:
+            offsets = self.sorted_keyword_offsets.tolist()
+            keyword_ids = self.sorted_keyword_ids.tolist()
+            weights = self.sorted_keyword_weights.tolist()
+            self._keyword_weight_dicts = [dict(zip(keyword_ids[offsets[index]:offsets[index + 1]],
+                                                   weights[offsets[index]:offsets[index + 1]])) for index in
+                                          range(len(self))]
+        return self._keyword_weight_dicts[row]
+
+    def get_keywords(self, row: int) -> typing.List[str]:
+        """
+        Returns the keywords of a row.
+        :param row: The row
+        :return: A new list with the keywords
+        """
+        words = vocabulary.words
+        return [words[keyword_id] for keyword_id in self.get_keyword_ids(row).tolist()]
+
+    def with_coordinates(self, x: np.ndarray, y: np.ndarray) -> PoiTable:
+        """
+        Creates a new table with the same POIs at different coordinates. The name, id and keyword arrays are shared.
+        :param x: The new x coordinates
+        :param y: The new y coordinates
+        :return: The new PoiTable
+        """
+        table = PoiTable.__new__(PoiTable)
+        table._set_arrays(self.names, np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), self.ids,
+                          self.keyword_offsets, self.keyword_ids,
+                          (self.sorted_keyword_offsets, self.sorted_keyword_ids, self.sorted_keyword_weights),
+                          self.keyword_weight_norms)
+        return table
+
+    def get_rescaled(self, scale_x: float, offset_x: float, scale_y: float, offset_y: float) -> PoiTable:
+        """
+        Returns the table with all coordinates transformed to x * scale_x + offset_x and y * scale_y + offset_y. The result is cached, so rescaling single rows of the same table repeatedly (e.g. when denormalizing results) is cheap.
+        :param scale_x: The scale of the x coordinates
+        :param offset_x: The offset of the x coordinates
+        :param scale_y: The scale of the y coordinates
+        :param offset_y: The offset of the y coordinates
+        :return: The rescaled PoiTable
+        """
+        key = (scale_x, offset_x, scale_y, offset_y)
+        rescaled_table = self._rescaled_tables.get(key)
+        if rescaled_table is None:
+            rescaled_table = self.with_coordinates(self.x * scale_x + offset_x, self.y * scale_y + offset_y)
+            self._rescaled_tables[key] = rescaled_table
+        return rescaled_table
+
+    def share(self) -> PoiTable:
+        """
+        Creates a copy of the table whose arrays, apart from the names, are kept in shared memory (see SharedArray). Pickling the copy only transfers the names of the shared memory blocks, the names of the POIs and the words of the used keyword ids, so worker processes attach to the same arrays instead of unpickling their own copy. If the keywords are interned with other ids in a worker, its keyword id arrays are re-interned into private arrays.
+        :return: The shared PoiTable
+        """
+        if self._shared_arrays is not None:
+            return self
+        shared_arrays = tuple(SharedArray(array) for array in (
+            self.x, self.y, self.ids, self.keyword_offsets, self.keyword_ids, self.sorted_keyword_offsets,
+            self.sorted_keyword_ids, self.sorted_keyword_weights, self.keyword_weight_norms))
+        used_keyword_ids = np.unique(self.keyword_ids)
+        words = vocabulary.words
+        table = PoiTable.__new__(PoiTable)
+        table._set_shared_arrays(self.names, shared_arrays, used_keyword_ids,
+                                 [words[keyword_id] for keyword_id in used_keyword_ids.tolist()])
+        return table
+
+    def _set_shared_arrays(self, names: np.ndarray, shared_arrays: typing.Tuple[SharedArray, ...],
+                           used_keyword_ids: np.ndarray, used_words: typing.List[str]):
+        x, y, ids, keyword_offsets, keyword_ids, sorted_keyword_offsets, sorted_keyword_ids, sorted_keyword_weights, \
+            keyword_weight_norms = (shared_array.array for shared_array in shared_arrays)
+        interned_ids = np.asarray(vocabulary.get_ids(used_words), dtype=np.int32)
+        if np.array_equal(interned_ids, used_keyword_ids):
+            self._set_arrays(names, x, y, ids, keyword_offsets, keyword_ids,
+                             (sorted_keyword_offsets, sorted_keyword_ids, sorted_keyword_weights),
+                             keyword_weight_norms)
+        else:
+            self._set_arrays(names, x, y, ids, keyword_offsets,
+                             interned_ids[np.searchsorted(used_keyword_ids, keyword_ids)],
+                             sort_keyword_ids(sorted_keyword_offsets,
+                                              interned_ids[np.searchsorted(used_keyword_ids, sorted_keyword_ids)],
+                                              sorted_keyword_weights), keyword_weight_norms)
+        self._shared_arrays = (shared_arrays, used_keyword_ids, used_words)
+
+    @property
+    def is_shared(self) -> bool:
+        """
+        Whether the arrays of the table are kept in shared memory.
+        """
+        return self._shared_arrays is not None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the arrays of the table. The name strings themselves are not included.
+        """
+        return sum(array.nbytes for array in (self.names, self.x, self.y, self.ids, self.keyword_offsets,
+                                              self.keyword_ids, self.sorted_keyword_offsets,
+                                              self.sorted_keyword_ids, self.sorted_keyword_weights,
+                                              self.keyword_weight_norms))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getstate__(self):
+        if self._shared_arrays is not None:
+            return (self.names,) + self._shared_arrays
+        # Keyword ids are only valid inside a process, so the words of the used ids travel along with the table. The
+        # order of the sorted keyword ids changes with the ids, which is why they are sorted again after unpickling.
+        used_keyword_ids = np.unique(self.keyword_ids)
+        words = vocabulary.words
+        return (self.names, self.x, self.y, self.ids, self.keyword_offsets,
+                np.searchsorted(used_keyword_ids, self.keyword_ids).astype(np.int32), self.sorted_keyword_offsets,
+                np.searchsorted(used_keyword_ids, self.sorted_keyword_ids).astype(np.int32),
+                self.sorted_keyword_weights, [words[keyword_id] for keyword_id in used_keyword_ids.tolist()])
+
+    def __setstate__(self, state):
+        if len(state) == 4:
+            self._set_shared_arrays(*state)
+            return
+        names, x, y, ids, keyword_offsets, local_keyword_ids, sorted_keyword_offsets, local_sorted_keyword_ids, \
+            sorted_keyword_weights, local_words = state
+        interned_ids = np.asarray(vocabulary.get_ids(local_words), dtype=np.int32)
+        self._set_arrays(names, x, y, ids, keyword_offsets, interned_ids[local_keyword_ids],
+                         sort_keyword_ids(sorted_keyword_offsets, interned_ids[local_sorted_keyword_ids],
+                                          sorted_keyword_weights))
+
+    def __str__(self):
+        return 'PoiTable({} rows)'.format(len(self))
@@ -0,0 +1,53 @@
+import typing
+
+
+class Vocabulary:
+    """
+    The Vocabulary interns keywords. Every distinct keyword is assigned a stable integer id so that the keywords of the POIs can be stored and compared as integer arrays.
+    """
+
+    def __init__(self):
+        """
+        Constructs a new, empty Vocabulary object.
+        """
+        self.ids: typing.Dict[str, int] = dict()
+        self.words: typing.List[str] = []
+
+    def get_id(self, word: str) -> int:
+        """
+        Returns the id of a keyword. Unknown keywords are added to the vocabulary.
+        :param word: The keyword
+        :return: The id of the keyword
+        """
+        keyword_id = self.ids.get(word)
+        if keyword_id is None:
+            keyword_id = len(self.words)
+            self.ids[word] = keyword_id
+            self.words.append(word)
+        return keyword_id
+
+    def get_ids(self, words: typing.Iterable[str]) -> typing.List[int]:
+        """
+        Returns the ids of multiple keywords. Unknown keywords are added to the vocabulary.
+        :param words: The keywords
+        :return: A list with the ids in the same order as the keywords
+        """
+        return [self.get_id(word) for word in words]
+
+    def get_word(self, keyword_id: int) -> str:
+        """
+        Returns the keyword for a given id.
+        :param keyword_id: The id
+        :return: The keyword
+        """
+        return self.words[keyword_id]
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.ids
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+# The vocabulary shared by all the POI tables of the process. Ids are only valid inside the process, which is why tables re-intern their keywords when they are unpickled.
+vocabulary = Vocabulary()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import typing
+
+from src.costfunctions.costfunction import CostFunction
+from src.index.inverted_index import InvertedIndex
+from src.index.ir_tree import IRTree
+from src.metrics.embedding_backends import EmbeddingBackend
+from src.metrics.distance_metrics import denormalize_result_data
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.solvers.solver import Solver, is_minimal_cover
+from src.utils.logging_utils import dataset_comprehension, result_list_comprehension
+from src.utils.typing_definitions import dataset_type, solution_list
+
+logger = logging.getLogger(__name__)
+
+
+class DistanceOwnerSolver(Solver):
+    """
+    The DistanceOwnerSolver solves monotone cost functions (see CostFunction.is_monotone) like Type1 and Type2 by enumerating the distance owners of the subsets instead of the subsets themselves. The query distance owner is the POI with the maximum query-dataset distance of a subset, the pair owner is the pair of POIs with the maximum inter-dataset distance. Together they fix the query-dataset and inter-dataset distance of the subset, and every other POI of the subset lies within the disk of the query distance owner around the query and within the pair distance of both POIs of the pair owner. The disks are found with range searches of an IRTree of the candidates.
+    """
+
+    def __init__(self, query: KeywordCoordinate, data: dataset_type, cost_function: CostFunction,
+                 normalize: bool = True, result_length: int = 10, max_subset_size: int = math.inf,
+                 RADIUS: float = 2000, semantic_filtering: bool = True, embedding_backend: EmbeddingBackend = None,
+                 keyword_coverage: bool = False, keyword_filtering: bool = False,
+                 inverted_index: InvertedIndex = None,
+                 spatial_keyword_filtering: bool = False, ir_tree: IRTree = None,
+                 skyline_filtering: bool = False, max_candidates: int = None, threshold_filtering: bool = False,
+                 candidate_count_window: typing.Tuple[int, int] = None):
+        """
+        Constructs a new DistanceOwnerSolver object. The results are the same as the ones of a NaiveSolver with the same keyword_coverage. Precalculated values of the cost function are not used.
+        :param query: The query for which to solve for
+        :param data: The data for which to solve for
+        :param cost_function: The cost function to determine subset costs. Has to be monotone, like Type1 and Type2.
+        :param normalize: If the data should be normalized before being processed. The data will be denormalized before being returned.
+        :param result_length: The size of the results (Top-N)
+        :param max_subset_size: The maximum size of any subset used to calculate the solution
+        :param RADIUS: The maximum distance in meters between the query and any candidate
+        :param semantic_filtering: If candidates should be filtered by their semantic similarity to the query
+        :param embedding_backend: The EmbeddingBackend for the semantic filtering. Pass the EmbeddingBackend of the cost function to load only one model.
+        :param keyword_coverage: If True, only subsets whose keywords cover all the query keywords are considered (classic CoSKQ). The subsets are minimal covers: every POI of such a subset covers a query keyword which no other POI of the subset covers.
+        :param keyword_filtering: If candidates whose keyword distance alone rules them out of the results should be removed before the search
+        :param inverted_index: The InvertedIndex of the data for the keyword filtering. Pass the same index to all the solvers working on the same data to build it only once.
+        :param spatial_keyword_filtering: If candidates whose query-dataset distance and keyword distance alone rule them out of the results should be removed before the search. This replaces the keyword filtering.
+        :param ir_tree: The IRTree of the data for the spatial-keyword filtering. Pass the same tree to all the solvers working on the same data to build it only once.
+        :param skyline_filtering: If candidates which are dominated in query-dataset distance and keyword distance by result_length other candidates should be removed before the search
+        :param max_candidates: If set, only this many candidates with the lowest lower bounds of their single cost are kept. After solving, result_is_exact tells whether the results are provably exact.
+        :param threshold_filtering: If the thresholds of the cost function should be applied to the single candidates before the search and to the pair owners during the search, so that subsets with an infinite cost are not built
+        :param candidate_count_window: If set, the tuple of the minimum and the maximum number of candidates. The radius is adapted, starting with RADIUS, until the number of candidates falls into the window. The radius used is kept in effective_radius.
+        """
+        super().__init__(query, data, cost_function, normalize, result_length, max_subset_size, RADIUS=RADIUS,
+                         semantic_filtering=semantic_filtering, embedding_backend=embedding_backend,
+                         keyword_coverage=keyword_coverage, keyword_filtering=keyword_filtering,
+                         inverted_index=inverted_index, spatial_keyword_filtering=spatial_keyword_filtering,
+                         ir_tree=ir_tree, skyline_filtering=skyline_filtering, max_candidates=max_candidates,
+                         threshold_filtering=threshold_filtering, candidate_count_window=candidate_count_window)
+        if not self.cost_function.is_monotone:
+            msg = 'The DistanceOwnerSolver only supports monotone cost functions like Type1 and Type2, got {}'.format(
+                self.cost_function.__class__.__name__)
+            logger.error(msg)
+            raise ValueError(msg)
+        # The number of query distance owners and pair owners whose subsets were enumerated during the last solve
+        self.enumerated_owners = 0
+        self.enumerated_pair_owners = 0
+
+    def solve(self) -> solution_list:
+        """
+        Implements the solution algorithm.
+        :return: A list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('solving for query %s and dataset %s using cost function %s and result length %s', self.query,
+                        dataset_comprehension(self.data), self.cost_function, self.result_length)
+        query, data = self.prepare_candidates()
+        result_list = self.get_best_subsets_by_owners(query, data)
+        self.check_exactness(result_list)
+        if self.normalize_data:
+            result_list = denormalize_result_data(result_list, self.denormalize_max_x, self.denormalize_min_x,
+                                                  self.denormalize_max_y, self.denormalize_min_y)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('solved for %s with length %s', result_list_comprehension(result_list), self.result_length)
+        return result_list
+
+    def is_covering_subset(self, indices: typing.Sequence[int], masks: typing.List[int], full_mask: int) -> bool:
+        """
+        Checks whether a subset is one of the subsets of get_all_covering_subsets, a minimal cover of the query keywords (see is_minimal_cover).
+        :param indices: The positions of the POIs of the subset
+        :param masks: The query keyword masks of the candidates
+        :param full_mask: The mask of all the query keywords
+        :return: True if the subset is a minimal cover of the query keywords
+        """
+        return is_minimal_cover((masks[index] for index in indices), full_mask)
+
+    def get_best_subsets_by_owners(self, query: KeywordCoordinate, data: dataset_type) -> solution_list:
+        """
+        Calculates the best subsets for the given data owner by owner. The query distance owners are processed in the order of their query-dataset distance, the ties are broken by their position, and the other POIs of a subset have to come before their owner in this order. They are looked up with a range search of the IRTree of the candidates. For every query distance owner the pair owners are processed in the order of their inter-dataset distance, again with the ties broken by the positions, and the remaining POIs have to be closer to both POIs of the pair owner and to each other. Every subset is therefore enumerated exactly once, with its cost following from the distances of its owners and the maximum keyword distance. Since a monotone cost never decreases when a POI is added, owners and POIs whose lower bound cannot beat the current Top-N are skipped, and the enumeration stops at the first query distance owner which is too far away on its own.
+        :param query: The (normalized) query
+        :param data: The (normalized) data
+        :return: A sorted list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        self.enumerated_owners = 0
+        self.enumerated_pair_owners = 0
+        if self.result_length <= 0 or self.max_subset_size < 1 or len(data) == 0:
+            return []
+        distance_metric = self.cost_function.distance_metric
+        get_cost_from_components = self.cost_function.get_cost_from_components
+        query_distances = [distance_metric(query.coordinates, kwc.coordinates) for kwc in data]
+        # The maximum keyword distance of a subset is never below 0, just like in CostFunction.solve
+        keyword_distances = [max(0.0, self.cost_function.get_keyword_distance(query, kwc)) for kwc in data]
+        if self.keyword_coverage:
+            masks = self.get_query_keyword_masks(query, data)
+            full_mask = (1 << len(query.table.get_keyword_id_set(query.row))) - 1
+            if full_mask == 0:
+                return []
+        max_dataset_distance = self.get_neighbour_distance()
+        owner_order = sorted(range(len(data)), key=lambda index: (query_distances[index], index))
+        ranks = [0] * len(data)
+        for rank, index in enumerate(owner_order):
+            ranks[index] = rank
+        ir_tree = IRTree(data)
+        pair_distances: typing.Dict[typing.Tuple[int, int], float] = dict()
+
+        def get_pair_key(index1: int, index2: int) -> typing.Tuple[float, int, int]:
+            # Orders the pairs by their distance, the ties are broken by the positions of the POIs
+            if index1 > index2:
+                index1, index2 = index2, index1
+            distance = pair_distances.get((index1, index2))
+            if distance is None:
+                distance = distance_metric(data[index1].coordinates, data[index2].coordinates)
+                pair_distances[(index1, index2)] = distance
+            return distance, index1, index2
+
+        # Max-heap of the best subsets found so far, the counter keeps the order of equal costs stable
+        best_subsets: typing.List[typing.Tuple[float, int, typing.Tuple[int, ...]]] = []
+        counter = 0
+
+        def is_ruled_out(lower_bound: float) -> bool:
+            # Subsets with an infinite cost are kept as long as there are less than result_length results
+            return len(best_subsets) >= self.result_length and lower_bound >= -best_subsets[0][0]
+
+        def add_subset(indices: typing.Tuple[int, ...], cost: float):
+            nonlocal counter
+            if self.keyword_coverage and not self.is_covering_subset(indices, masks, full_mask):
+                return
+            if len(best_subsets) < self.result_length:
+                heapq.heappush(best_subsets, (-cost, -counter, indices))
+            elif cost < -best_subsets[0][0]:
+                heapq.heapreplace(best_subsets, (-cost, -counter, indices))
+            counter += 1
+
+        def extend(base: typing.Tuple[int, ...], lens: typing.List[int], pair_key: typing.Tuple[float, int, int],
+                   query_distance: float, added: typing.List[int], start: int, keyword_distance: float):
+            # Adds the POIs of the lens to the owners, only the keyword distance of the subsets grows
+            if len(base) + len(added) >= self.max_subset_size:
+                return
+            for offset in range(start, len(lens)):
+                index = lens[offset]
+                if any(get_pair_key(index, added_index) > pair_key for added_index in added):
+                    continue
+                new_keyword_distance = max(keyword_distance, keyword_distances[index])
+                cost = get_cost_from_components(query_distance, pair_key[0], new_keyword_distance)
+                if is_ruled_out(cost):
+                    continue
+                added.append(index)
+                add_subset(tuple(sorted(base + tuple(added))), cost)
+                extend(base, lens, pair_key, query_distance, added, offset + 1, new_keyword_distance)
+                added.pop()
+
+        for owner in owner_order:
+            query_distance = query_distances[owner]
+            if is_ruled_out(get_cost_from_components(query_distance, 0.0, 0.0)):
+                # The query-dataset distance alone rules out this owner and all the owners after it
+                break
+            owner_keyword_distance = keyword_distances[owner]
+            if is_ruled_out(get_cost_from_components(query_distance, 0.0, owner_keyword_distance)):
+                continue
+            self.enumerated_owners += 1
+            add_subset((owner,), get_cost_from_components(query_distance, 0.0, owner_keyword_distance))
+            if self.max_subset_size < 2:
+                continue
+            # Every other POI of the subsets of this owner is within its query-dataset distance and comes before it
+            members: typing.List[int] = []
+            for index in ir_tree.get_positions_within(query, query_distance, distance_metric).tolist():
+                if ranks[index] >= ranks[owner]:
+                    continue
+                distance = get_pair_key(owner, index)[0]
+                if max_dataset_distance is not None and distance > max_dataset_distance:
+                    continue
+                if not is_ruled_out(get_cost_from_components(query_distance, distance,
+                                                             max(owner_keyword_distance, keyword_distances[index]))):
+                    members.append(index)
+            if len(members) == 0:
+                continue
+            pair_owners = [(owner, index) for index in members]
+            for offset, index1 in enumerate(members):
+                for index2 in members[offset + 1:]:
+                    pair_key = get_pair_key(index1, index2)
+                    if max_dataset_distance is not None and pair_key[0] > max_dataset_distance:
+                        continue
+                    # The owner has to be within the distance of the pair owner itself
+                    if self.max_subset_size >= 3 and get_pair_key(owner, index1) < pair_key and \
+                            get_pair_key(owner, index2) < pair_key:
+                        pair_owners.append((index1, index2))
+            pair_owners.sort(key=lambda pair: get_pair_key(*pair))
+            for index1, index2 in pair_owners:
+                pair_key = get_pair_key(index1, index2)
+                dataset_distance = pair_key[0]
+                if is_ruled_out(get_cost_from_components(query_distance, dataset_distance, owner_keyword_distance)):
+                    # The pair owners after this one are not closer
+                    break
+                base = tuple(sorted({owner, index1, index2}))
+                keyword_distance = max(keyword_distances[index] for index in base)
+                if is_ruled_out(get_cost_from_components(query_distance, dataset_distance, keyword_distance)):
+                    continue
+                self.enumerated_pair_owners += 1
+                add_subset(base, get_cost_from_components(query_distance, dataset_distance, keyword_distance))
+                if len(base) >= self.max_subset_size:
+                    continue
+                # The remaining POIs are closer to every POI of the base than the POIs of the pair owner to each other
+                lens = [index for index in members if index not in base and
+                        all(get_pair_key(index, base_index) < pair_key for base_index in base) and
+                        not is_ruled_out(get_cost_from_components(query_distance, dataset_distance,
+                                                                  max(keyword_distance, keyword_distances[index])))]
+                extend(base, lens, pair_key, query_distance, [], 0, keyword_distance)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('enumerated %s owners and %s pair owners of %s candidates', self.enumerated_owners,
+                         self.enumerated_pair_owners, len(data))
+        best_subsets.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return [(-negative_cost, tuple(data[index] for index in indices)) for negative_cost, _, indices in best_subsets]
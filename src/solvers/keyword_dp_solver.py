@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import typing
+
+from src.costfunctions.costfunction import CostFunction
+from src.index.inverted_index import InvertedIndex
+from src.index.ir_tree import IRTree
+from src.metrics.embedding_backends import EmbeddingBackend
+from src.metrics.distance_metrics import denormalize_result_data
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.solvers.solver import Solver, add_to_minimal_cover
+from src.utils.logging_utils import dataset_comprehension, result_list_comprehension
+from src.utils.typing_definitions import dataset_type, solution_list
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordDPSolver(Solver):
+    """
+    The KeywordDPSolver solves the keyword coverage problem (classic CoSKQ) for Type1 and Type2 cost functions. Instead of enumerating all the combinations of POIs it processes the candidates one after another and keeps the partial subsets grouped by the query keywords they cover. With |q| query keywords there are only 2^|q| of these keyword-coverage states, which makes the solver a good fit for short queries.
+    """
+
+    def __init__(self, query: KeywordCoordinate, data: dataset_type, cost_function: CostFunction,
+                 normalize: bool = True, result_length: int = 10, max_subset_size: int = math.inf,
+                 RADIUS: float = 2000, semantic_filtering: bool = True, embedding_backend: EmbeddingBackend = None,
+                 max_partial_subsets_per_state: int = None, keyword_filtering: bool = False,
+                 inverted_index: InvertedIndex = None,
+                 spatial_keyword_filtering: bool = False, ir_tree: IRTree = None,
+                 skyline_filtering: bool = False, max_candidates: int = None, threshold_filtering: bool = False,
+                 candidate_count_window: typing.Tuple[int, int] = None):
+        """
+        Constructs a new KeywordDPSolver object. The results are the same as the ones of a NaiveSolver with keyword_coverage=True. Precalculated values of the cost function are not used.
+        :param query: The query for which to solve for
+        :param data: The data for which to solve for
+        :param cost_function: The cost function to determine subset costs. Has to be monotone (see CostFunction.is_monotone), like Type1 and Type2.
+        :param normalize: If the data should be normalized before being processed. The data will be denormalized before being returned.
+        :param result_length: The size of the results (Top-N)
+        :param max_subset_size: The maximum size of any subset used to calculate the solution
+        :param RADIUS: The maximum distance in meters between the query and any candidate
+        :param semantic_filtering: If candidates should be filtered by their semantic similarity to the query
+        :param embedding_backend: The EmbeddingBackend for the semantic filtering. Pass the EmbeddingBackend of the cost function to load only one model.
+        :param max_partial_subsets_per_state: If set, only this many partial subsets with the lowest lower bounds are kept per keyword-coverage state. This bounds the work by candidates * 2^|q| * max_partial_subsets_per_state, but the results are no longer guaranteed to be exact.
+        :param keyword_filtering: If candidates whose keyword distance alone rules them out of the results should be removed before the search
+        :param inverted_index: The InvertedIndex of the data for the keyword filtering. Pass the same index to all the solvers working on the same data to build it only once.
+        :param spatial_keyword_filtering: If candidates whose query-dataset distance and keyword distance alone rule them out of the results should be removed before the search. This replaces the keyword filtering.
+        :param ir_tree: The IRTree of the data for the spatial-keyword filtering. Pass the same tree to all the solvers working on the same data to build it only once.
+        :param skyline_filtering: If candidates which are dominated in query-dataset distance and keyword distance by result_length other candidates should be removed before the search
+        :param max_candidates: If set, only this many candidates with the lowest lower bounds of their single cost are kept. After solving, result_is_exact tells whether the results are provably exact.
+        :param threshold_filtering: If the thresholds of the cost function should be applied to the single candidates before the search and to the pairs of candidates during the search, so that subsets with an infinite cost are not built
+        :param candidate_count_window: If set, the tuple of the minimum and the maximum number of candidates. The radius is adapted, starting with RADIUS, until the number of candidates falls into the window. The radius used is kept in effective_radius.
+        """
+        super().__init__(query, data, cost_function, normalize, result_length, max_subset_size, RADIUS=RADIUS,
+                         semantic_filtering=semantic_filtering, embedding_backend=embedding_backend,
+                         keyword_coverage=True, keyword_filtering=keyword_filtering, inverted_index=inverted_index,
+                         spatial_keyword_filtering=spatial_keyword_filtering, ir_tree=ir_tree,
+                         skyline_filtering=skyline_filtering, max_candidates=max_candidates,
+                         threshold_filtering=threshold_filtering, candidate_count_window=candidate_count_window)
+        if not self.cost_function.is_monotone:
+            msg = 'The KeywordDPSolver only supports monotone cost functions like Type1 and Type2, got {}'.format(
+                self.cost_function.__class__.__name__)
+            logger.error(msg)
+            raise ValueError(msg)
+        self.max_partial_subsets_per_state = max_partial_subsets_per_state
+
+    def solve(self) -> solution_list:
+        """
+        Implements the solution algorithm.
+        :return: A list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('solving for query %s and dataset %s using cost function %s and result length %s', self.query,
+                        dataset_comprehension(self.data), self.cost_function, self.result_length)
+        query, data = self.prepare_candidates()
+        result_list = self.get_best_covering_subsets(query, data)
+        self.check_exactness(result_list)
+        if self.normalize_data:
+            result_list = denormalize_result_data(result_list, self.denormalize_max_x, self.denormalize_min_x,
+                                                  self.denormalize_max_y, self.denormalize_min_y)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('solved for %s with length %s', result_list_comprehension(result_list), self.result_length)
+        return result_list
+
+    def get_best_covering_subsets(self, query: KeywordCoordinate, data: dataset_type) -> solution_list:
+        """
+        Calculates the best subsets of the data which are minimal covers of the query keywords (see add_to_minimal_cover). The candidates are processed in the order of the data. Every partial subset is stored under the bitmask of the query keywords it covers, together with its maximum query-dataset distance, inter-dataset distance and keyword distance. These components never decrease when a POI is added, so the cost of the components and the cheapest way of covering the remaining query keywords bound the cost of every completion. Partial subsets and whole states whose completions cannot make it into the results are dropped.
+        :param query: The query
+        :param data: The data
+        :return: A sorted list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        masks = self.get_query_keyword_masks(query, data)
+        candidates = [kwc for kwc, mask in zip(data, masks) if mask != 0]
+        masks = [mask for mask in masks if mask != 0]
+        number_of_keywords = len(query.table.get_keyword_id_set(query.row))
+        full_mask = (1 << number_of_keywords) - 1
+        number_of_candidates = len(candidates)
+        if full_mask == 0 or self.result_length <= 0:
+            return []
+        distance_metric = self.cost_function.distance_metric
+        get_cost_from_components = self.cost_function.get_cost_from_components
+        query_distances = [distance_metric(query.coordinates, kwc.coordinates) for kwc in candidates]
+        keyword_distances = [self.cost_function.get_keyword_distance(query, kwc) for kwc in candidates]
+        max_dataset_distance = self.get_neighbour_distance()
+
+        # The keywords, the maximum number of keywords per POI and, for every query keyword, the lowest query and
+        # keyword distance with which the keyword can still be covered by the candidates from an index on
+        suffix_masks = [0] * (number_of_candidates + 1)
+        suffix_max_bits = [0] * (number_of_candidates + 1)
+        suffix_query_distances = [[math.inf] * number_of_keywords for _ in range(number_of_candidates + 1)]
+        suffix_keyword_distances = [[math.inf] * number_of_keywords for _ in range(number_of_candidates + 1)]
+        for index in range(number_of_candidates - 1, -1, -1):
+            suffix_masks[index] = suffix_masks[index + 1] | masks[index]
+            suffix_max_bits[index] = max(suffix_max_bits[index + 1], bin(masks[index]).count('1'))
+            suffix_query_distances[index] = list(suffix_query_distances[index + 1])
+            suffix_keyword_distances[index] = list(suffix_keyword_distances[index + 1])
+            for bit in range(number_of_keywords):
+                if masks[index] >> bit & 1:
+                    suffix_query_distances[index][bit] = min(suffix_query_distances[index][bit],
+                                                             query_distances[index])
+                    suffix_keyword_distances[index][bit] = min(suffix_keyword_distances[index][bit],
+                                                               keyword_distances[index])
+
+        def get_lower_bound(covered: int, query_distance: float, dataset_distance: float, keyword_distance: float,
+                            start: int, size: int) -> typing.Optional[float]:
+            uncovered = full_mask & ~covered
+            if suffix_masks[start] & uncovered != uncovered:
+                return None
+            if bin(uncovered).count('1') > (self.max_subset_size - size) * suffix_max_bits[start]:
+                return None
+            for bit in range(number_of_keywords):
+                if uncovered >> bit & 1:
+                    query_distance = max(query_distance, suffix_query_distances[start][bit])
+                    keyword_distance = max(keyword_distance, suffix_keyword_distances[start][bit])
+            return get_cost_from_components(query_distance, dataset_distance, keyword_distance)
+
+        pair_distances: typing.Dict[typing.Tuple[int, int], float] = dict()
+
+        def get_pair_distance(index1: int, index2: int) -> float:
+            key = (index1, index2)
+            distance = pair_distances.get(key)
+            if distance is None:
+                distance = distance_metric(candidates[index1].coordinates, candidates[index2].coordinates)
+                pair_distances[key] = distance
+            return distance
+
+        # A partial subset is a list of the candidate indices, the three cost components, the lower bound and the
+        # private masks of its POIs
+        states: typing.Dict[int, typing.List[typing.Tuple[typing.Tuple[int, ...], float, float, float, float,
+                                                          typing.Tuple[int, ...]]]] = dict()
+        # Max-heap of the best complete subsets found so far, the counter keeps the order of equal costs stable
+        best_subsets: typing.List[typing.Tuple[float, int, typing.Tuple[int, ...]]] = []
+        counter = 0
+        for index in range(number_of_candidates):
+            results_full = len(best_subsets) >= self.result_length
+            worst_cost = -best_subsets[0][0] if results_full else math.inf
+            for covered in [covered for covered in states if covered | suffix_masks[index] != full_mask]:
+                del states[covered]
+            mask = masks[index]
+            new_partial_subsets = [(mask, (index,), query_distances[index], 0.0, keyword_distances[index], (mask,))]
+            for covered, partial_subsets in states.items():
+                if mask & ~covered == 0:
+                    continue
+                for indices, query_distance, dataset_distance, keyword_distance, lower_bound, private_masks in \
+                        partial_subsets:
+                    if len(indices) >= self.max_subset_size or (results_full and lower_bound >= worst_cost):
+                        continue
+                    new_private_masks = add_to_minimal_cover(private_masks, covered, mask)
+                    if new_private_masks is None:
+                        continue
+                    for previous_index in indices:
+                        dataset_distance = max(dataset_distance, get_pair_distance(previous_index, index))
+                    if max_dataset_distance is not None and dataset_distance > max_dataset_distance:
+                        continue
+                    new_partial_subsets.append((covered | mask, indices + (index,),
+                                                max(query_distance, query_distances[index]), dataset_distance,
+                                                max(keyword_distance, keyword_distances[index]), new_private_masks))
+            for covered, indices, query_distance, dataset_distance, keyword_distance, private_masks in \
+                    new_partial_subsets:
+                if covered == full_mask:
+                    cost = get_cost_from_components(query_distance, dataset_distance, keyword_distance)
+                    if len(best_subsets) < self.result_length:
+                        heapq.heappush(best_subsets, (-cost, -counter, indices))
+                    elif cost < -best_subsets[0][0]:
+                        heapq.heapreplace(best_subsets, (-cost, -counter, indices))
+                    counter += 1
+                    continue
+                lower_bound = get_lower_bound(covered, query_distance, dataset_distance, keyword_distance, index + 1,
+                                              len(indices))
+                if lower_bound is None:
+                    continue
+                if len(best_subsets) >= self.result_length and lower_bound >= -best_subsets[0][0]:
+                    continue
+                states.setdefault(covered, []).append(
+                    (indices, query_distance, dataset_distance, keyword_distance, lower_bound, private_masks))
+            if self.max_partial_subsets_per_state is not None:
+                for covered, partial_subsets in states.items():
+                    if len(partial_subsets) > self.max_partial_subsets_per_state:
+                        partial_subsets.sort(key=lambda partial_subset: partial_subset[4])
+                        del partial_subsets[self.max_partial_subsets_per_state:]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found %s covering subsets for %s candidates with %s states left', len(best_subsets),
+                         number_of_candidates, len(states))
+        best_subsets.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return [(-negative_cost, tuple(candidates[index] for index in indices))
+                for negative_cost, _, indices in best_subsets]
@@ -4,29 +4,47 @@ import concurrent.futures
 import logging
 import math
 import copy
+import heapq
 import multiprocessing as mp
-import pandas as pd
+import typing
 
 from src.costfunctions.costfunction import CostFunction
-from src.metrics.distance_metrics import normalize_data, denormalize_result_data, geographic_distance
+from src.index.inverted_index import InvertedIndex
+from src.index.ir_tree import IRTree
+from src.metrics.embedding_backends import EmbeddingBackend
+from src.metrics.distance_metrics import normalize_data, denormalize_result_data
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.solvers.solver import Solver
+from src.utils.combinatorics import Combinations
 from src.utils.data_handler import split_subsets
 from src.utils.logging_utils import dataset_comprehension, result_list_comprehension
 from src.utils.typing_definitions import dataset_type, solution_list
 
+logger = logging.getLogger(__name__)
 
 class NaiveSolver(Solver):
     
     list_of_subsets = []
     normalised_query = ''
+    # The candidates and their neighbour graph for the enumerations which happen while solving
+    deferred_input = None
     """
     The NaiveSolver does not use any kind of heuristic. It calculates the cost for every possibility and returns the best results.
     """
     # Change max_number_of_concurrent_processes TO mp.cpu_count() if running in Linux-based (Multiprocessing doesn't work on Windows 10)
     def __init__(self, query: KeywordCoordinate, data: dataset_type, cost_function: CostFunction,
                  normalize: bool = True, result_length: int = 10, max_subset_size: int = math.inf,
-                 max_number_of_concurrent_processes: int = 5, rebalance_subsets: bool = True):
+                 max_number_of_concurrent_processes: int = 5, rebalance_subsets: bool = True,
+                 RADIUS: float = 2000, semantic_filtering: bool = True,
+                 embedding_backend: EmbeddingBackend = None, keyword_coverage: bool = False,
+                 keyword_filtering: bool = False, inverted_index: InvertedIndex = None,
+                 spatial_keyword_filtering: bool = False, ir_tree: IRTree = None,
+                 neighbour_distance: float = None, skyline_filtering: bool = False, max_candidates: int = None,
+                 threshold_filtering: bool = False, candidate_count_window: typing.Tuple[int, int] = None,
+                 level_wise: bool = False, incremental_enumeration: bool = False, parallel_scoring: bool = False,
+                 shared_memory: bool = False, parallel_enumeration: bool = False,
+                 dynamic_scheduling: bool = False, parallel_branch_and_bound: bool = False,
+                 execution_backend: str = 'process'):
         """
         Constructs a new NaiveSolver object.
         :param query: The query for which to solve for
@@ -36,30 +54,69 @@ class NaiveSolver(Solver):
         :param result_length: The size of the results (Top-N)
         :param max_subset_size: The maximum size of any subset used to calculate the solution
         :param rebalance_subsets: If the passed subsets should be rearranged to better distribute the workload among the processes
+        :param RADIUS: The maximum distance in meters between the query and any candidate
+        :param semantic_filtering: If candidates should be filtered by their semantic similarity to the query
+        :param embedding_backend: The EmbeddingBackend for the semantic filtering. Pass the EmbeddingBackend of the cost function to load only one model.
+        :param keyword_coverage: If True, only subsets whose keywords cover all the query keywords are considered (classic CoSKQ).
+        :param keyword_filtering: If candidates whose keyword distance alone rules them out of the results should be removed before the subsets are built
+        :param inverted_index: The InvertedIndex of the data for the keyword filtering. Pass the same index to all the solvers working on the same data to build it only once.
+        :param spatial_keyword_filtering: If candidates whose query-dataset distance and keyword distance alone rule them out of the results should be removed before the subsets are built. This replaces the keyword filtering.
+        :param ir_tree: The IRTree of the data for the spatial-keyword filtering. Pass the same tree to all the solvers working on the same data to build it only once.
+        :param neighbour_distance: If set, only subsets whose POIs are pairwise within this inter-dataset distance are considered (cliques of the NeighbourGraph of the candidates)
+        :param skyline_filtering: If candidates which are dominated in query-dataset distance and keyword distance by result_length other candidates should be removed before the subsets are built. Only supported for Type1 and Type2 cost functions.
+        :param max_candidates: If set, only this many candidates with the lowest lower bounds of their single cost are kept. After solving, result_is_exact tells whether the results are provably exact.
+        :param threshold_filtering: If the thresholds of the cost function should be applied to the single candidates and to the pairs of candidates, so that subsets with an infinite cost are not built
+        :param candidate_count_window: If set, the tuple of the minimum and the maximum number of candidates. The radius is adapted, starting with RADIUS, until the number of candidates falls into the window. The radius used is kept in effective_radius.
+        :param level_wise: If the subsets should be enumerated level by level of their size while solving, only extending the subsets which can still make it into the results. Only supported for Type1 and Type2 cost functions without keyword coverage. The survivors of every level are kept in level_survivors.
+        :param incremental_enumeration: If the subsets should be enumerated depth-first while solving, with their costs calculated incrementally from the shared prefixes. Precalculated values of the cost function are not used.
+        :param parallel_scoring: If the costs of the subsets should be calculated by the worker pool of the process (see src/utils/worker_pool.py) with max_number_of_concurrent_processes workers. The pool is preloaded with the cost function and the subsets, and it is shared with the precalculations of the solver.
+        :param shared_memory: If the word2vec model of the cost function and the tables of the subsets should be sent to the worker pool in shared memory instead of being pickled for every worker
+        :param dynamic_scheduling: If the worker pool should hand out the subsets to the workers in small chunks on demand, sized from the measured throughput, instead of splitting them up front. The UtilizationReport of the last solve call is kept in utilization_report.
+        :param parallel_branch_and_bound: If the subsets should be searched with a branch-and-bound search on max_number_of_concurrent_processes processes while solving, split by their first POI and pruned with a bound which the processes share (see Solver.get_best_subsets_by_parallel_branch_and_bound). Only supported for Type1 and Type2 cost functions. The number of pruned prefixes is kept in pruned_branches.
+        :param execution_backend: 'process' to calculate the costs for the parallel scoring and the precalculations on the worker pool of the process, 'thread' to calculate them in NumPy blocks on max_number_of_concurrent_processes threads (see src/utils/subset_blocks.py). The parallel enumeration always uses the worker pool.
+        :param parallel_enumeration: If the subsets should neither be built nor scored in this process. The worker pool only receives the candidates and a range of ranks per task; the workers generate the subsets of their ranges with the combinatorial number system (see src/utils/combinatorics.py) and send back only their best result_length costs. Not supported with keyword coverage, a neighbour distance, the level-wise or the incremental enumeration.
         """
-        logger = logging.getLogger(__name__)
-        logger.debug('creating with query {}, data {}, cost function {}, normalization {} and result length {}'.format(query, dataset_comprehension(data), cost_function, normalize, result_length))
         super().__init__(query, data, cost_function, normalize, result_length, max_subset_size,
-                         max_number_of_concurrent_processes, rebalance_subsets)
+                         max_number_of_concurrent_processes, rebalance_subsets, RADIUS=RADIUS,
+                         semantic_filtering=semantic_filtering, embedding_backend=embedding_backend,
+                         keyword_coverage=keyword_coverage, keyword_filtering=keyword_filtering,
+                         inverted_index=inverted_index,
+                         spatial_keyword_filtering=spatial_keyword_filtering, ir_tree=ir_tree,
+                         neighbour_distance=neighbour_distance, skyline_filtering=skyline_filtering,
+                         max_candidates=max_candidates, threshold_filtering=threshold_filtering,
+                         candidate_count_window=candidate_count_window, level_wise=level_wise,
+                         incremental_enumeration=incremental_enumeration, shared_memory=shared_memory,
+                         dynamic_scheduling=dynamic_scheduling, parallel_branch_and_bound=parallel_branch_and_bound,
+                         execution_backend=execution_backend)
+        self.parallel_scoring = parallel_scoring
+        if parallel_enumeration and (keyword_coverage or level_wise or incremental_enumeration or
+                                     parallel_branch_and_bound or self.get_neighbour_distance() is not None):
+            msg = 'The parallel enumeration only supports the enumeration of all the subsets, without keyword coverage, a neighbour distance, the level-wise, the incremental enumeration or the branch-and-bound search'
+            logger.error(msg)
+            raise ValueError(msg)
+        self.parallel_enumeration = parallel_enumeration
         
         if self.query.keywords[0] != '0': # Only for precalculate distance
             self.list_of_subsets, self.normalised_query = self.preprocess_input()
         
-        logger.debug('created with query {}, data {}, cost function {}, normalization {} and result length {}'.format(self.query, dataset_comprehension(self.data), self.cost_function, self.normalize_data, self.result_length))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('created with query %s, data %s, cost function %s, normalization %s and result length %s',
+                         self.query, dataset_comprehension(self.data), self.cost_function, self.normalize_data,
+                         self.result_length)
 
     def solve(self) -> solution_list:
         """
         Implements the solution algorithm.
         :return: A list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
         """
-        logger = logging.getLogger(__name__)
-        logger.info('solving for query {} and dataset {} using cost function {} and result length {}'.format(self.query,
-                                                                                                              dataset_comprehension(
-                                                                                                                  self.data),
-                                                                                                              self.cost_function,
-                                                                                                               self.result_length))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('solving for query %s and dataset %s using cost function %s and result length %s', self.query,
+                        dataset_comprehension(self.data), self.cost_function, self.result_length)
        
         result_list: solution_list = []
+        # The early aborts of the cost function are counted per solve call
+        self.cost_function.early_aborts = 0
+        self.cost_function.saved_evaluations = 0
         
         # UNCOMMENT FOR MULTIPROCESSING (DOES NOT WORK IN WINDOWS 10)
         # with concurrent.futures.ProcessPoolExecutor(
@@ -75,12 +132,42 @@ class NaiveSolver(Solver):
         # ONE PROCESSOR VERSION
         result_list = []
  
-        for subset in self.list_of_subsets: # list_of_split_subsets if multiprocessing enabled.
-            # print(i)
-            # i = i + 1
-            solution = self.get_cost_for_subset(self.normalised_query, subset)
-            result_list.append((solution, subset))
-            
+        if self.parallel_enumeration and len(self.list_of_subsets) > 0:
+            pool = self.get_worker_pool()
+            result_list = pool.calculate_best(self.normalised_query, self.result_length,
+                                              balance=self.rebalance_subsets, dynamic=self.dynamic_scheduling)
+            self.utilization_report = pool.utilization_report
+        elif self.parallel_scoring and len(self.list_of_subsets) > 0:
+            costs = self.calculate_for_subsets('solve', self.normalised_query)
+            result_list = list(zip(costs, self.list_of_subsets))
+        else:
+            # Max-heap of the result_length best costs so far. The subsets which cost more need no exact cost and
+            # are not kept, only the subsets which enter the heap can make it into the results.
+            best_costs: typing.List[float] = []
+            for subset in self.list_of_subsets:
+                # print(i)
+                # i = i + 1
+                if len(best_costs) < self.result_length:
+                    solution = self.get_cost_for_subset(self.normalised_query, subset)
+                    heapq.heappush(best_costs, -solution)
+                    result_list.append((solution, subset))
+                elif self.result_length > 0:
+                    solution = self.get_cost_for_subset(self.normalised_query, subset, -best_costs[0])
+                    if solution < -best_costs[0]:
+                        heapq.heapreplace(best_costs, -solution)
+                        result_list.append((solution, subset))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('early aborts of the cost function: %s, saved evaluations: %s',
+                            self.cost_function.early_aborts, self.cost_function.saved_evaluations)
+
+        if self.deferred_input is not None:
+            if self.level_wise:
+                result_list = self.get_best_subsets_level_wise(self.normalised_query, *self.deferred_input)
+            elif self.parallel_branch_and_bound:
+                result_list = self.get_best_subsets_by_parallel_branch_and_bound(self.normalised_query,
+                                                                                 *self.deferred_input)
+            else:
+                result_list = self.get_best_subsets_incrementally(self.normalised_query, *self.deferred_input)
             
         # MULTIPROCESSOR VERSION
         # for future in future_list:
@@ -90,97 +177,37 @@ class NaiveSolver(Solver):
         
         result_list.sort(key=lambda x: x[0])
         result_list = result_list[:self.result_length]
-        denormalized_result_list = denormalize_result_data(result_list, self.denormalize_max_x, self.denormalize_min_x,
-                                                           self.denormalize_max_y, self.denormalize_min_y)
-        logger.info('solved for {} with length {}'.format(result_list_comprehension(denormalized_result_list),
-                                                          self.result_length))
+        self.check_exactness(result_list)
+        if self.normalize_data:
+            denormalized_result_list = denormalize_result_data(result_list, self.denormalize_max_x,
+                                                               self.denormalize_min_x, self.denormalize_max_y,
+                                                               self.denormalize_min_y)
+        else:
+            denormalized_result_list = result_list
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('solved for %s with length %s', result_list_comprehension(denormalized_result_list),
+                        self.result_length)
         return denormalized_result_list
 
     def preprocess_input_precalculate_only(self):
-        
-        #  Calculates distances between any pair of locations (POIs)
-        distances = []
-        for kwc in self.data:
-            distance_list = []
-            # print(kwc.coordinates.x)
-            # print(kwc.coordinates.y)
-            distance_list.append(str(kwc.coordinates.x) + ',' + str(kwc.coordinates.y))
-            for kwc2 in self.data:
-                distance_list.append(geographic_distance(kwc.coordinates, kwc2.coordinates))
-            distances.append(distance_list)
-        
-        # Calculates distance list from query location to any POI
-        distances_to_query = []
-        for kwc in self.data:
-            distances_one_poi = []
-            distances_one_poi.append(str(kwc.coordinates.x) + ',' + str(kwc.coordinates.y))
-            distances_one_poi.append(geographic_distance(self.query.coordinates, kwc.coordinates))
-            distances_to_query.append(distances_one_poi)
-        
-        geographic_distances = pd.DataFrame(distances)
-        geographic_distances.set_index(0, inplace=True)
-        geographic_distances.columns = geographic_distances.index.tolist()
-        
-        # Calculates distances to query location from every POI
-        distances_to_query_df = pd.DataFrame(distances_to_query)
-        distances_to_query_df.set_index(0, inplace=True)
-        distances_to_query_df.columns = ['Distances2Query']
-        # print('>>>>>>> Query location ', self.query.coordinates.x, ',', self.query.coordinates.y)
-
-        # candidates_set = self.get_all_candidates_heuristic(self.data, distances_to_query_df)
-        return self.get_all_candidates_heuristic(self.data, distances_to_query_df)
+        return self.get_all_candidates_heuristic(self.data, self.get_candidate_query_distances())
 
     
     def preprocess_input(self):
-        
-        #  Calculates distances between any pair of locations (POIs)
-        distances = []
-        for kwc in self.data:
-            distance_list = []
-            # print(kwc.coordinates.x)
-            # print(kwc.coordinates.y)
-            distance_list.append(str(kwc.coordinates.x) + ','+str(kwc.coordinates.y))
-            for kwc2 in self.data:
-                distance_list.append(geographic_distance(kwc.coordinates, kwc2.coordinates))
-            distances.append(distance_list)
-        
-        # Calculates distance list from query location to any POI
-        distances_to_query = []
-        for kwc in self.data:
-            distances_one_poi = []
-            distances_one_poi.append(str(kwc.coordinates.x) + ',' + str(kwc.coordinates.y))
-            distances_one_poi.append(geographic_distance(self.query.coordinates, kwc.coordinates))
-            distances_to_query.append(distances_one_poi)
-        
-        geographic_distances = pd.DataFrame(distances)
-        geographic_distances.set_index(0, inplace=True)
-        geographic_distances.columns = geographic_distances.index.tolist()
-        
-        # Calculates distances to query location from every POI
-        distances_to_query_df = pd.DataFrame(distances_to_query)
-        distances_to_query_df.set_index(0, inplace=True)
-        distances_to_query_df.columns = ['Distances2Query']
-        
-        
-        
-        # candidates_set = self.get_all_candidates_heuristic(self.data, distances_to_query_df)
-        dataAux = self.get_all_candidates_heuristic(self.data, distances_to_query_df)
-    
-        # list_of_subsets = self.get_all_subsets(data)
-        
-        #  ONLY ONE PROCESSOR (NO BALANCING NEEDED)
-        # list_of_split_subsets = list_of_subsets
-        
-        # dataAux = [x for x in self.data if (str(x.coordinates.x)+','+str(x.coordinates.y)) in candidates_set]
-        
-        if self.normalize_data:
-            query, data, self.denormalize_max_x, self.denormalize_min_x, self.denormalize_max_y, self.denormalize_min_y = normalize_data(
-                self.query, dataAux)
+        query, data = self.prepare_candidates()
+        neighbour_graph = self.get_neighbour_graph(data)
+
+        if self.level_wise or self.incremental_enumeration or self.parallel_branch_and_bound:
+            # The subsets are only enumerated while solving, since they are scored and dropped right away
+            self.deferred_input = (data, neighbour_graph)
+            list_of_subsets = []
+        elif self.parallel_enumeration:
+            # The subsets are generated by the workers from their ranks
+            list_of_subsets = Combinations(data, self.max_subset_size)
+        elif self.keyword_coverage:
+            list_of_subsets = self.get_all_covering_subsets(query, data, neighbour_graph)
         else:
-            query = self.query
-            data = self.dataAux
-            
-        list_of_subsets = self.get_all_subsets(data)
+            list_of_subsets = self.get_all_subsets(data, neighbour_graph)
         
         #  UNCOMMENT IF MULTIPROCESSING
         # list_of_split_subsets = split_subsets(list_of_subsets, self.max_number_of_concurrent_processes,
@@ -188,28 +215,4 @@ class NaiveSolver(Solver):
 
         print('List of subsets length: ', len(list_of_subsets))
     
-        return list_of_subsets, query                                  
-
-    def get_cost_for_subset(self, query, subset):
-        """
-        Calculates the costs of all the subsets for a given query and cost function.
-        :param query: The query
-        :param subsets: The list of subsets
-        :param costfunction: The costfunction
-        :return: A list of solutions. Each solution being a cost and the corresponding subset
-        """
-        # results: solution_list = []
-        # print('***** subsets lenght: ', len(subset))
-        # i = 1;
-        # print('i = ', i)
-        # i = i + 1
-        
-        denormalized_result = denormalize_result_data([(0.0, subset)], self.denormalize_max_x,
-                                                      self.denormalize_min_x, self.denormalize_max_y,
-                                                      self.denormalize_min_y)
-        # print('Bottleneck 1')
-        denormalized_subset = denormalized_result[0][1]
-        current_result = self.cost_function.solve(query, subset, denormalized_subset)
-        # print('Bottleneck 2')
-        # results.append((current_result, subset))
-        return current_result
+        return list_of_subsets, query
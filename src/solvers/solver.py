@@ -1,20 +1,251 @@
 from __future__ import annotations
 
-import concurrent.futures
+import bisect
+import heapq
 import logging
 import math
 import time
-import spacy
-import en_core_web_lg
+import typing
 import multiprocessing as mp
 
+import numpy as np
+
 from src.costfunctions.costfunction import CostFunction
-from src.metrics.distance_metrics import normalize_data, denormalize_result_data
+from src.index.inverted_index import InvertedIndex
+from src.index.ir_tree import IRTree
+from src.index.neighbour_graph import NeighbourGraph
+from src.metrics.embedding_backends import EmbeddingBackend, SpacyEmbeddingBackend
+from src.metrics.distance_metrics import normalize_data, denormalize_result_data, geographic_distance
 from src.metrics.similarity_metrics import find_subsets, semantic_similarity
-from src.model.keyword_coordinate import KeywordCoordinate
-from src.utils.data_handler import split_subsets
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
 from src.utils.logging_utils import dataset_comprehension
 from src.utils.typing_definitions import dataset_type, precalculated_dict_type, solution_list
+from src.utils.scheduler import UtilizationReport
+from src.utils.shared_arrays import SharedArray
+from src.utils.subset_blocks import calculate_in_threads
+from src.utils.worker_pool import CHUNKS_PER_WORKER, WorkerPool, get_worker_payload, get_worker_pool
+
+logger = logging.getLogger(__name__)
+
+# The backends which calculate the values of the subsets, see calculate_for_subsets
+EXECUTION_BACKENDS = ('process', 'thread')
+
+# Relative tolerance for comparing lower bounds with costs, which are calculated with different floating point operations
+BOUND_TOLERANCE = 0.000000001
+
+
+def get_bound_tolerance(bound: float) -> float:
+    """
+    Calculates the absolute tolerance for comparisons with a bound.
+    :param bound: The bound
+    :return: The tolerance
+    """
+    return BOUND_TOLERANCE * max(1.0, abs(bound))
+
+
+def add_to_minimal_cover(private_masks: typing.Tuple[int, ...], covered: int,
+                         mask: int) -> typing.Optional[typing.Tuple[int, ...]]:
+    """
+    Adds a POI to a partial minimal cover of the query keywords. In a minimal cover every POI covers a query keyword which no other POI of the subset covers, so which subsets are minimal covers does not depend on the order of the POIs. The private masks of the POIs only shrink when POIs are added, so a POI which leaves another POI without a private keyword can not be part of any minimal cover with it.
+    :param private_masks: The query keywords which only this POI covers, for every POI of the partial subset
+    :param covered: The query keywords covered by the partial subset
+    :param mask: The query keywords of the new POI
+    :return: The private masks of the extended subset, or None if the new POI covers no uncovered query keyword or takes the last private keyword of another POI
+    """
+    new_private_mask = mask & ~covered
+    if new_private_mask == 0:
+        return None
+    new_private_masks = []
+    for private_mask in private_masks:
+        private_mask &= ~mask
+        if private_mask == 0:
+            return None
+        new_private_masks.append(private_mask)
+    new_private_masks.append(new_private_mask)
+    return tuple(new_private_masks)
+
+
+def is_minimal_cover(masks: typing.Iterable[int], full_mask: int) -> bool:
+    """
+    Checks whether the POIs of a subset are a minimal cover of the query keywords (see add_to_minimal_cover).
+    :param masks: The query keyword masks of the POIs of the subset
+    :param full_mask: The mask of all the query keywords
+    :return: True if the subset covers all the query keywords and every POI covers one which no other POI covers
+    """
+    private_masks: typing.Tuple[int, ...] = ()
+    covered = 0
+    for mask in masks:
+        private_masks = add_to_minimal_cover(private_masks, covered, mask & full_mask)
+        if private_masks is None:
+            return False
+        covered |= mask
+    return covered & full_mask == full_mask
+
+
+def get_query_keyword_masks(query: KeywordCoordinate, data: dataset_type) -> typing.List[int]:
+    """
+    Calculates which query keywords are covered by every POI. Bit i of a mask is set if the POI has the i-th query keyword.
+    :param query: The query
+    :param data: The data
+    :return: A list with the bitmask of every POI in the same order as the data
+    """
+    query_keyword_ids = sorted(query.table.get_keyword_id_set(query.row))
+    bits = {keyword_id: 1 << index for index, keyword_id in enumerate(query_keyword_ids)}
+    masks: typing.List[int] = []
+    for kwc in data:
+        mask = 0
+        for keyword_id in kwc.table.get_keyword_id_set(kwc.row):
+            mask |= bits.get(keyword_id, 0)
+        masks.append(mask)
+    return masks
+
+
+def get_best_subset_indices(cost_function: CostFunction, query: KeywordCoordinate, data: dataset_type,
+                            result_length: int, max_subset_size: int, keyword_coverage: bool,
+                            neighbour_graph: NeighbourGraph = None, first_indices: typing.Iterable[int] = None,
+                            shared_bound: SharedArray = None) -> typing.Tuple[
+        typing.List[typing.Tuple[float, typing.Tuple[int, ...]]], int]:
+    """
+    Walks the subsets depth-first and returns the indices of the POIs of the best subsets (see Solver.get_best_subset_indices_incrementally). The walk can be restricted to the subsets starting with some POIs and turned into a branch-and-bound search: since monotone costs (see CostFunction.is_monotone) like Type1 and Type2 never decrease when a POI is added, the cost of a prefix is a lower bound of all the subsets extending it, and prefixes which are more expensive than the current result_length-th best cost are not extended. Only the arguments are used, so the walk can run in a worker process without the solver.
+    :param cost_function: The cost function
+    :param query: The (normalized) query
+    :param data: The (normalized) data
+    :param result_length: The number of subsets to return
+    :param max_subset_size: The maximum number of POIs of a subset
+    :param keyword_coverage: If only the subsets which are minimal covers of the query keywords are walked (see add_to_minimal_cover)
+    :param neighbour_graph: If given, only the subsets whose POIs are pairwise neighbours are walked
+    :param first_indices: If given, only the subsets whose first POI has one of these indices are walked
+    :param shared_bound: If given, a writeable SharedArray with a single value, the lowest result_length-th best cost known to any process, which enables the branch-and-bound search. It is lowered as soon as this walk finds result_length cheaper subsets. Only supported for monotone cost functions like Type1 and Type2.
+    :return: A tuple with a sorted list of tuples, each with a cost and the indices of the POIs of the subset, and the number of pruned prefixes
+    """
+    pruned_branches = 0
+    if result_length <= 0:
+        return [], 0
+    distance_metric = cost_function.distance_metric
+    get_cost_from_aggregates = cost_function.get_cost_from_aggregates
+    query_distances = [distance_metric(query.coordinates, kwc.coordinates) for kwc in data]
+    keyword_distances = [cost_function.get_keyword_distance(query, kwc) for kwc in data]
+    query_distance_powers = cost_function.get_query_distance_powers(np.array(query_distances, dtype=np.float64)).tolist()
+    if keyword_coverage:
+        masks = get_query_keyword_masks(query, data)
+        full_mask = (1 << len(query.table.get_keyword_id_set(query.row))) - 1
+        if full_mask == 0:
+            return [], 0
+        # The keywords and the maximum number of keywords that can still be covered by the POIs from an index on
+        suffix_masks = [0] * (len(data) + 1)
+        suffix_max_bits = [0] * (len(data) + 1)
+        for index in range(len(data) - 1, -1, -1):
+            suffix_masks[index] = suffix_masks[index + 1] | masks[index]
+            suffix_max_bits[index] = max(suffix_max_bits[index + 1], bin(masks[index]).count('1'))
+    if shared_bound is not None:
+        if not cost_function.is_monotone:
+            msg = 'The branch-and-bound search only supports monotone cost functions like Type1 and Type2, got {}'.format(
+                cost_function.__class__.__name__)
+            logger.error(msg)
+            raise ValueError(msg)
+        # The bound is read and lowered without a lock. Every value written is the result_length-th best cost of
+        # some walk, so a lost update only leaves a looser bound, never a wrong one.
+        bound_values = shared_bound.array.data
+    # Max-heap of the best subsets found so far, the counter keeps the order of equal costs stable
+    best_subsets: typing.List[typing.Tuple[float, int, typing.Tuple[int, ...]]] = []
+    counter = 0
+    members: typing.List[int] = []
+
+    def get_bound() -> float:
+        bound = bound_values[0]
+        if len(best_subsets) >= result_length and -best_subsets[0][0] < bound:
+            bound = -best_subsets[0][0]
+            bound_values[0] = bound
+        return bound
+
+    def extend(start: int, covered: int, allowed: typing.FrozenSet[int], maximum_query_distance: float,
+               minimum_query_distance: float, query_distance_power_sum: float, dataset_distance: float,
+               keyword_distance: float, private_masks: typing.Tuple[int, ...], indices: typing.Iterable[int] = None):
+        nonlocal counter, pruned_branches
+        if len(members) >= max_subset_size:
+            return
+        if keyword_coverage:
+            uncovered = full_mask & ~covered
+            if suffix_masks[start] & uncovered != uncovered or \
+                    bin(uncovered).count('1') > (max_subset_size - len(members)) * suffix_max_bits[start]:
+                return
+        for index in (range(start, len(data)) if indices is None else indices):
+            if allowed is not None and index not in allowed:
+                continue
+            if keyword_coverage:
+                if masks[index] & uncovered == 0:
+                    continue
+                new_private_masks = add_to_minimal_cover(private_masks, covered, masks[index])
+                if new_private_masks is None:
+                    continue
+            else:
+                new_private_masks = private_masks
+            new_dataset_distance = dataset_distance
+            for member in members:
+                pair_distance = distance_metric(data[member].coordinates, data[index].coordinates)
+                if pair_distance > new_dataset_distance:
+                    new_dataset_distance = pair_distance
+            new_maximum_query_distance = max(maximum_query_distance, query_distances[index])
+            new_minimum_query_distance = min(minimum_query_distance, query_distances[index])
+            new_query_distance_power_sum = query_distance_power_sum + query_distance_powers[index]
+            new_keyword_distance = max(keyword_distance, keyword_distances[index])
+            if shared_bound is not None and get_cost_from_aggregates(
+                    new_maximum_query_distance, new_minimum_query_distance, new_query_distance_power_sum,
+                    new_dataset_distance, new_keyword_distance) > get_bound():
+                pruned_branches += 1
+                continue
+            members.append(index)
+            if not keyword_coverage or covered | masks[index] == full_mask:
+                cost = get_cost_from_aggregates(new_maximum_query_distance, new_minimum_query_distance,
+                                                new_query_distance_power_sum, new_dataset_distance,
+                                                new_keyword_distance)
+                if len(best_subsets) < result_length:
+                    heapq.heappush(best_subsets, (-cost, -counter, tuple(members)))
+                elif cost < -best_subsets[0][0]:
+                    heapq.heapreplace(best_subsets, (-cost, -counter, tuple(members)))
+                counter += 1
+            if not keyword_coverage or covered | masks[index] != full_mask:
+                if neighbour_graph is None:
+                    new_allowed = None
+                elif allowed is None:
+                    new_allowed = neighbour_graph.get_neighbour_set(index)
+                else:
+                    new_allowed = allowed & neighbour_graph.get_neighbour_set(index)
+                extend(index + 1, covered | masks[index] if keyword_coverage else 0, new_allowed,
+                       new_maximum_query_distance, new_minimum_query_distance, new_query_distance_power_sum,
+                       new_dataset_distance, new_keyword_distance, new_private_masks)
+            members.pop()
+
+    extend(0, 0, None, 0.0, math.inf, 0.0, 0.0, 0.0, (), first_indices)
+    if shared_bound is not None:
+        get_bound()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('walked %s subsets of %s candidates and pruned %s branches', counter, len(data),
+                     pruned_branches)
+    best_subsets.sort(key=lambda entry: (-entry[0], -entry[1]))
+    return [(-negative_cost, indices) for negative_cost, _, indices in best_subsets], pruned_branches
+
+
+def search_branches(query: KeywordCoordinate, table: PoiTable, neighbour_graph: typing.Optional[NeighbourGraph],
+                    result_length: int, max_subset_size: int, keyword_coverage: bool, shared_bound: SharedArray,
+                    first_indices: typing.Iterable[int]) -> typing.Tuple[
+        typing.List[typing.Tuple[float, typing.Tuple[int, ...]]], int]:
+    """
+    This function gets executed inside the worker processes of a WorkerPool. Searches the subsets starting with some POIs with the cost function of the pool.
+    :param query: The (normalized) query
+    :param table: The table of the (normalized) candidates
+    :param neighbour_graph: The NeighbourGraph of the candidates or None
+    :param result_length: The number of subsets to return
+    :param max_subset_size: The maximum number of POIs of a subset
+    :param keyword_coverage: If only the minimal covers of the query keywords are searched
+    :param shared_bound: The writeable SharedArray with the result_length-th best cost known to any worker
+    :param first_indices: The indices of the first POIs
+    :return: A tuple with the best subsets of the branches (costs and indices of their POIs) and the number of pruned prefixes
+    """
+    cost_function = get_worker_payload()[0]
+    return get_best_subset_indices(cost_function, query, create_dataset(table), result_length, max_subset_size,
+                                   keyword_coverage, neighbour_graph, first_indices, shared_bound)
 
 
 class Solver:
@@ -22,11 +253,20 @@ class Solver:
     The Solver solves a given CostFunction for a given query and dataset.
     """
     # MAX_ROUTE_DISTANCE = 10000 # 10km as max route distance for the user. If works move it to constructor.
+    list_of_subsets = []
 
     def __init__(self, query: KeywordCoordinate, data: dataset_type, cost_function: CostFunction,
                  normalize: bool = True, result_length: int = 10, max_subset_size: int = math.inf,
                  max_number_of_concurrent_processes: int = mp.cpu_count(), rebalance_subsets: bool = True,
-                 RADIUS: float = 2000, semantic_filtering: bool = True):
+                 RADIUS: float = 2000, semantic_filtering: bool = True,
+                 embedding_backend: EmbeddingBackend = None, keyword_coverage: bool = False,
+                 keyword_filtering: bool = False, inverted_index: InvertedIndex = None,
+                 spatial_keyword_filtering: bool = False, ir_tree: IRTree = None,
+                 neighbour_distance: float = None, skyline_filtering: bool = False, max_candidates: int = None,
+                 threshold_filtering: bool = False, candidate_count_window: typing.Tuple[int, int] = None,
+                 level_wise: bool = False, incremental_enumeration: bool = False, shared_memory: bool = False,
+                 dynamic_scheduling: bool = False, parallel_branch_and_bound: bool = False,
+                 execution_backend: str = 'process'):
         """
         Constructs a new Solver object. The Solver class should never be directly instantiated. Instead use a class that inherits from the Solver class and implements the solve() method.
         :param query: The query for which to solve for
@@ -36,6 +276,25 @@ class Solver:
         :param result_length: The size of the results (Top-N)
         :param max_subset_size: The maximum size of any subset used to calculate the solution
         :param rebalance_subsets: If the passed subsets should be rearranged to better distribute the workload among the processes
+        :param RADIUS: The maximum distance in meters between the query and any candidate
+        :param semantic_filtering: If candidates should be filtered by their semantic similarity to the query
+        :param embedding_backend: The EmbeddingBackend for the semantic filtering. If None, the EmbeddingBackend of the cost function is reused if there is one, otherwise the spaCy model is used.
+        :param keyword_coverage: If True, only subsets whose keywords cover all the query keywords are considered (classic CoSKQ). The subsets are minimal covers: every POI of such a subset covers a query keyword which no other POI of the subset covers (see add_to_minimal_cover), so they do not depend on the order of the data.
+        :param keyword_filtering: If candidates whose keyword distance alone rules them out of the results should be removed before the subsets are built
+        :param inverted_index: The InvertedIndex of the data for the keyword filtering. If None, the index is built the first time it is needed. Pass the same index to all the solvers working on the same data to build it only once.
+        :param spatial_keyword_filtering: If candidates whose query-dataset distance and keyword distance alone rule them out of the results should be removed before the subsets are built. Whole regions of the IRTree are skipped. This replaces the keyword filtering.
+        :param ir_tree: The IRTree of the data for the spatial-keyword filtering. If None, the tree is built the first time it is needed.
+        :param neighbour_distance: If set, only subsets whose POIs are pairwise within this inter-dataset distance are considered. These subsets are the cliques of the NeighbourGraph of the (normalized) candidates. With the dataset distance threshold of the cost function as neighbour distance, only subsets with an infinite cost are left out.
+        :param skyline_filtering: If candidates which are dominated in query-dataset distance and keyword distance by result_length other candidates should be removed before the subsets are built. Only supported for Type1 and Type2 cost functions. The number of removed candidates is kept in eliminated_by_skyline.
+        :param max_candidates: If set, only this many candidates with the lowest lower bounds of their single cost are kept. After solving, result_is_exact tells whether the results are provably exact.
+        :param threshold_filtering: If the thresholds of the cost function should be applied to the single candidates and to the pairs of candidates, so that subsets with an infinite cost are not built
+        :param candidate_count_window: If set, the tuple of the minimum and the maximum number of candidates. The radius is adapted, starting with RADIUS, until the number of candidates falls into the window. The radius used is kept in effective_radius.
+        :param level_wise: If the subsets should be enumerated level by level of their size while solving, only extending the subsets which can still make it into the results (see get_best_subsets_level_wise). Only supported for Type1 and Type2 cost functions without keyword coverage. The survivors of every level are kept in level_survivors.
+        :param incremental_enumeration: If the subsets should be enumerated depth-first while solving, with their costs calculated incrementally from the shared prefixes (see get_best_subsets_incrementally). Precalculated values of the cost function are not used.
+        :param shared_memory: If the word2vec model of the cost function and the tables of the subsets should be sent to the worker pool in shared memory, so that the workers attach to a single copy instead of unpickling one each
+        :param dynamic_scheduling: If the calculations of the worker pool should be handed out to the workers in small chunks on demand, sized from the measured throughput, instead of being split up front (see src/utils/scheduler.py). The UtilizationReport of the last solve call is kept in utilization_report.
+        :param parallel_branch_and_bound: If the subsets should be searched depth-first by max_number_of_concurrent_processes processes, split by their first POI, while the result_length-th best cost known to any process is kept in shared memory to prune the prefixes which can not make it into the results (see get_best_subsets_by_parallel_branch_and_bound). Only supported for monotone cost functions like Type1 and Type2.
+        :param execution_backend: 'process' to calculate the values of the subsets for the precalculations (and the parallel scoring of the NaiveSolver) on the worker pool of the process, 'thread' to calculate them in NumPy blocks on max_number_of_concurrent_processes threads which share the same arrays (see src/utils/subset_blocks.py). Threads avoid the pickling and the start-up of the processes, processes scale better when the costs can not be vectorized.
         """
         self.query: KeywordCoordinate = query
         self.data: dataset_type = data
@@ -52,7 +311,63 @@ class Solver:
         self.RADIUS = RADIUS
         self.semantic_filtering = semantic_filtering
         self.SEMANTIC_THRESHOLD = 0.6
-        logging.getLogger(__name__).debug('created with query {}, data {}, cost function {}, normalization {} and result length {}'.format(self.query, dataset_comprehension(self.data), self.cost_function, self.normalize_data, self.result_length))
+        self.embedding_backend: EmbeddingBackend = embedding_backend
+        self.keyword_coverage = keyword_coverage
+        self.keyword_filtering = keyword_filtering
+        self.inverted_index: InvertedIndex = inverted_index
+        self.spatial_keyword_filtering = spatial_keyword_filtering
+        self.ir_tree: IRTree = ir_tree
+        self.neighbour_distance = neighbour_distance
+        self.skyline_filtering = skyline_filtering
+        self.eliminated_by_skyline = 0
+        self.max_candidates = max_candidates
+        # The number and the lowest lower bound of the candidates removed by max_candidates
+        self.removed_candidates = 0
+        self.removed_candidates_bound = math.inf
+        self.result_is_exact = True
+        self.threshold_filtering = threshold_filtering
+        if candidate_count_window is not None and not 0 <= candidate_count_window[0] <= candidate_count_window[1]:
+            msg = 'The candidate count window has to consist of a minimum and a maximum with 0 <= minimum <= maximum, got {}'.format(
+                candidate_count_window)
+            logger.error(msg)
+            raise ValueError(msg)
+        self.candidate_count_window = candidate_count_window
+        self.effective_radius = RADIUS
+        if level_wise and (keyword_coverage or not self.cost_function.is_monotone):
+            msg = 'The level-wise enumeration only supports monotone cost functions like Type1 and Type2 without keyword coverage, got {} with keyword coverage {}'.format(
+                self.cost_function.__class__.__name__, keyword_coverage)
+            logger.error(msg)
+            raise ValueError(msg)
+        self.level_wise = level_wise
+        self.incremental_enumeration = incremental_enumeration
+        self.shared_memory = shared_memory
+        self.dynamic_scheduling = dynamic_scheduling
+        self.utilization_report: UtilizationReport = None
+        if parallel_branch_and_bound and (level_wise or not self.cost_function.is_monotone):
+            msg = 'The parallel branch-and-bound search only supports monotone cost functions like Type1 and Type2 without the level-wise enumeration, got {}'.format(
+                self.cost_function.__class__.__name__)
+            logger.error(msg)
+            raise ValueError(msg)
+        self.parallel_branch_and_bound = parallel_branch_and_bound
+        if execution_backend not in EXECUTION_BACKENDS:
+            msg = 'The execution backend has to be one of {}, got {}'.format(EXECUTION_BACKENDS, execution_backend)
+            logger.error(msg)
+            raise ValueError(msg)
+        self.execution_backend = execution_backend
+        # The number of prefixes pruned by the last branch-and-bound search and its final shared bound
+        self.pruned_branches = 0
+        self.shared_bound = math.inf
+        # The number of subsets of every size which were extended by the level-wise enumeration
+        self.level_survivors: typing.List[int] = []
+        if skyline_filtering and not self.cost_function.is_monotone:
+            msg = 'The skyline filtering only supports monotone cost functions like Type1 and Type2, got {}'.format(
+                self.cost_function.__class__.__name__)
+            logger.error(msg)
+            raise ValueError(msg)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('created with query %s, data %s, cost function %s, normalization %s and result length %s',
+                         self.query, dataset_comprehension(self.data), self.cost_function, self.normalize_data,
+                         self.result_length)
 
     def solve(self) -> solution_list:
         """
@@ -84,23 +399,16 @@ class Solver:
             data = self.data
         result_dict: precalculated_dict_type = dict()
         # list_of_subsets = self.get_all_subsets(data)
-        split_ss = split_subsets(self.list_of_subsets, self.max_number_of_concurrent_processes, self.rebalance_subsets)
-        results = []
-        with concurrent.futures.ProcessPoolExecutor(
-                max_workers=self.max_number_of_concurrent_processes) as executor:
-            for subset in split_ss:
-                future = executor.submit(get_max_inter_dataset_distances, self.cost_function, subset)
-                results.append(future)
-        for result_list in results:
-            for subset in result_list.result():
-                if self.normalize_data:
-                    denormalized_result = denormalize_result_data([(0.0, subset[1])], denorm_x_max, denorm_x_min,
-                                                                  denorm_y_max, denorm_y_min)
-                    denormalized_subset = denormalized_result[0][1]
-                    dict_key = denormalized_subset
-                else:
-                    dict_key = subset[1]
-                result_dict[frozenset(dict_key)] = subset[0]
+        costs = self.calculate_for_subsets('get_maximum_for_dataset')
+        for cost, subset in zip(costs, self.list_of_subsets):
+            if self.normalize_data:
+                denormalized_result = denormalize_result_data([(0.0, subset)], denorm_x_max, denorm_x_min,
+                                                              denorm_y_max, denorm_y_min)
+                denormalized_subset = denormalized_result[0][1]
+                dict_key = denormalized_subset
+            else:
+                dict_key = subset
+            result_dict[frozenset(dict_key)] = cost
         return result_dict
 
     def get_min_inter_dataset_distance(self) -> precalculated_dict_type:
@@ -119,23 +427,16 @@ class Solver:
             data = self.data
         result_dict: precalculated_dict_type = dict()
         # list_of_subsets = self.get_all_subsets(data)
-        split_ss = split_subsets(self.list_of_subsets, self.max_number_of_concurrent_processes, self.rebalance_subsets)
-        results = []
-        with concurrent.futures.ProcessPoolExecutor(
-                max_workers=self.max_number_of_concurrent_processes) as executor:
-            for subset in split_ss:
-                future = executor.submit(get_min_inter_dataset_distances, self.cost_function, subset)
-                results.append(future)
-        for result_list in results:
-            for subset in result_list.result():
-                if self.normalize_data:
-                    denormalized_result = denormalize_result_data([(0.0, subset[1])], denorm_x_max, denorm_x_min,
-                                                                  denorm_y_max, denorm_y_min)
-                    denormalized_subset = denormalized_result[0][1]
-                    dict_key = denormalized_subset
-                else:
-                    dict_key = subset[1]
-                result_dict[frozenset(dict_key)] = subset[0]
+        costs = self.calculate_for_subsets('get_minimum_for_dataset')
+        for cost, subset in zip(costs, self.list_of_subsets):
+            if self.normalize_data:
+                denormalized_result = denormalize_result_data([(0.0, subset)], denorm_x_max, denorm_x_min,
+                                                              denorm_y_max, denorm_y_min)
+                denormalized_subset = denormalized_result[0][1]
+                dict_key = denormalized_subset
+            else:
+                dict_key = subset
+            result_dict[frozenset(dict_key)] = cost
         return result_dict
 
     def get_query_dataset_distance(self) -> precalculated_dict_type:
@@ -162,16 +463,9 @@ class Solver:
             data = self.data
         result_dict: precalculated_dict_type = dict()
         # list_of_subsets = self.get_all_subsets(data)
-        split_ss = split_subsets(self.list_of_subsets, self.max_number_of_concurrent_processes, self.rebalance_subsets)
-        results = []
-        with concurrent.futures.ProcessPoolExecutor(
-                max_workers=self.max_number_of_concurrent_processes) as executor:
-            for subset in split_ss:
-                future = executor.submit(get_max_query_dataset_distances, self.cost_function, query, subset)
-                results.append(future)
-        for result_list in results:
-            for subset in result_list.result():
-                result_dict[frozenset(subset[1])] = subset[0]
+        costs = self.calculate_for_subsets('get_maximum_for_query', query)
+        for cost, subset in zip(costs, self.list_of_subsets):
+            result_dict[frozenset(subset)] = cost
         return result_dict
 
     def get_min_query_dataset_distance(self) -> precalculated_dict_type:
@@ -188,16 +482,9 @@ class Solver:
             data = self.data
         result_dict: precalculated_dict_type = dict()
         # list_of_subsets = self.get_all_subsets(data)
-        split_ss = split_subsets(self.list_of_subsets, self.max_number_of_concurrent_processes, self.rebalance_subsets)
-        results = []
-        with concurrent.futures.ProcessPoolExecutor(
-                max_workers=self.max_number_of_concurrent_processes) as executor:
-            for subset in split_ss:
-                future = executor.submit(get_min_query_dataset_distances, self.cost_function, query, subset)
-                results.append(future)
-        for result_list in results:
-            for subset in result_list.result():
-                result_dict[frozenset(subset[1])] = subset[0]
+        costs = self.calculate_for_subsets('get_minimum_for_query', query)
+        for cost, subset in zip(costs, self.list_of_subsets):
+            result_dict[frozenset(subset)] = cost
         return result_dict
 
     def get_keyword_similarity(self) -> precalculated_dict_type:
@@ -221,39 +508,79 @@ class Solver:
             data = self.data
         result_dict: precalculated_dict_type = dict()
         # list_of_subsets = self.get_all_subsets(data)
-        split_ss = split_subsets(self.list_of_subsets, self.max_number_of_concurrent_processes, self.rebalance_subsets)
-        results = []
-        with concurrent.futures.ProcessPoolExecutor(
-                max_workers=self.max_number_of_concurrent_processes) as executor:
-            for subset in split_ss:
-                future = executor.submit(get_max_keyword_similarity, self.cost_function, query, subset)
-                results.append(future)
-        for result_list in results:
-            for subset in result_list.result():
-                result_dict[frozenset(subset[1])] = subset[0]
+        costs = self.calculate_for_subsets('get_maximum_keyword_distance', query)
+        for cost, subset in zip(costs, self.list_of_subsets):
+            result_dict[frozenset(subset)] = cost
         return result_dict
 
     # def append_coordinates(self, lat, lon):
     #     return str(lat)+','+str(lon)
 
-    def get_all_candidates_heuristic(self, data, geographic_distances):
-        # print('Geographic_distances: ', geographic_distances)
-        candidates = geographic_distances[(0 < geographic_distances)  &
-                                          (geographic_distances < self.RADIUS)].apply(lambda x: x.dropna().index.tolist())
-        
-        # print('Candidates --> ', candidates)
-        candidates_set = set()
-        for values in candidates.values:
-            for v in values:
-                candidates_set.add(v)
-    
-        # candidates_list = list(candidates_set)
-        # print('+++++++ Values: ', candidates_set)
-    
+    def get_query_distances(self) -> typing.List[float]:
+        """
+        Calculates the geographic distance between the query and every POI of the data.
+        :return: A list with the distances in meters in the same order as the data
+        """
+        return [geographic_distance(self.query.coordinates, kwc.coordinates) for kwc in self.data]
+
+    def get_candidate_query_distances(self) -> typing.List[float]:
+        """
+        Calculates the query distances for the candidate search and sets the effective radius. Without a candidate count window, the effective radius is RADIUS.
+        :return: A list with the distances in meters in the same order as the data. POIs which are certainly not within the effective radius may have a distance of math.inf.
+        """
+        if self.candidate_count_window is None:
+            self.effective_radius = self.RADIUS
+            return self.get_query_distances()
+        return self.get_adaptive_query_distances()
+
+    def get_adaptive_query_distances(self) -> typing.List[float]:
+        """
+        Adapts the radius of the candidate search to the candidate count window and sets the effective radius. Starting with RADIUS, the radius is doubled with range searches of the IRTree of the data until at least the minimum number of POIs is within the radius or all POIs have been found. If there are more POIs than the maximum, the radius is shrunk to the largest number of POIs within the window, using the sorted distances of the POIs found. POIs at the same distance are always kept together, so the window may not be met exactly.
+        :return: A list with the distances in meters in the same order as the data. The distance of the POIs outside of the searched range is math.inf.
+        """
+        minimum_count, maximum_count = self.candidate_count_window
+        ir_tree = self.get_ir_tree()
+        radius = self.RADIUS
+        while True:
+            positions = ir_tree.get_positions_within(self.query, radius, geographic_distance).tolist()
+            distances = [geographic_distance(self.query.coordinates, self.data[position].coordinates)
+                         for position in positions]
+            all_found = len(positions) == len(self.data)
+            count = sum(1 for distance in distances if 0 < distance < radius)
+            if count >= minimum_count or all_found:
+                break
+            radius = radius * 2 if radius > 0 else 1.0
+        if all_found:
+            # All POIs are known, so the radius can as well be set to include the farthest of them
+            available = sorted(distance for distance in distances if distance > 0)
+        else:
+            available = sorted(distance for distance in distances if 0 < distance < radius)
+        if len(available) < minimum_count and len(available) > 0:
+            radius = math.nextafter(available[-1], math.inf)
+        elif len(available) > maximum_count:
+            # The largest count within the window, or else the smallest count above it, that does not split POIs at the same distance
+            counts = list(range(maximum_count, minimum_count - 1, -1)) + list(range(maximum_count + 1, len(available)))
+            for count in counts:
+                if count == 0:
+                    radius = available[0]
+                    break
+                if available[count - 1] < available[count]:
+                    radius = math.nextafter(available[count - 1], math.inf)
+                    break
+        self.effective_radius = radius
+        query_distances = [math.inf] * len(self.data)
+        for position, distance in zip(positions, distances):
+            query_distances[position] = distance
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('adapted the radius from %s to %s for a candidate count window of %s', self.RADIUS, radius,
+                        self.candidate_count_window)
+        return query_distances
+
+    def get_all_candidates_heuristic(self, data, query_distances):
         print('***** Longitud inicial: ', len(data))
     
         start_time = time.time()
-        data = [x for x in data if (str(x.coordinates.x)+','+str(x.coordinates.y)) in candidates_set] 
+        data = [x for x, distance in zip(data, query_distances) if 0 < distance < self.effective_radius]
         finish_time = time.time()
         print("Tiempo empleado en filtrado físico: ", finish_time - start_time)
         
@@ -262,16 +589,9 @@ class Solver:
 
         if self.semantic_filtering:
             start_time = time.time()
-            nlp = en_core_web_lg.load()
-            
-            # Build NLP representation
-            query_string = ''
-            for kw in self.query.keywords:
-                query_string = query_string + ' ' + kw
-            doc_query = nlp(query_string)
-            ###########################
-            
-            data = [x for x in data if semantic_similarity(doc_query, x, nlp) > self.SEMANTIC_THRESHOLD]
+            embedding_backend = self.get_embedding_backend()
+            query_vector = embedding_backend.get_document_vector(self.query.keywords)
+            data = [x for x in data if semantic_similarity(query_vector, x, embedding_backend) > self.SEMANTIC_THRESHOLD]
             
             finish_time = time.time()
             print("Tiempo empleado en filtrado semántico: ", finish_time - start_time)       
@@ -280,6 +600,332 @@ class Solver:
         # return candidates_set
         return data
 
+    def prepare_candidates(self) -> typing.Tuple[KeywordCoordinate, dataset_type]:
+        """
+        Filters the data down to the candidates of the query and normalizes the query and the candidates if normalization is enabled. The denormalization parameters of the solver are set accordingly.
+        :return: A tuple with the (normalized) query and the (normalized) candidates
+        """
+        candidates = self.get_all_candidates_heuristic(self.data, self.get_candidate_query_distances())
+
+        if self.normalize_data:
+            query, data, self.denormalize_max_x, self.denormalize_min_x, self.denormalize_max_y, self.denormalize_min_y = normalize_data(
+                self.query, candidates)
+        else:
+            query = self.query
+            data = candidates
+        if self.keyword_filtering or self.spatial_keyword_filtering:
+            # The candidates keep the order of the data, which allows to recover their positions in a single pass
+            positions = []
+            for position, kwc in enumerate(self.data):
+                if len(positions) < len(candidates) and candidates[len(positions)] is kwc:
+                    positions.append(position)
+            if self.spatial_keyword_filtering:
+                data = self.filter_candidates_by_index_bound(query, data, np.asarray(positions, dtype=np.int64))
+            else:
+                data = self.filter_candidates_by_keyword_bound(query, data, np.asarray(positions, dtype=np.int64))
+        if self.threshold_filtering:
+            data = self.filter_candidates_by_thresholds(query, data)
+        if self.skyline_filtering:
+            data = self.filter_candidates_by_skyline(query, data)
+        if self.max_candidates is not None:
+            data = self.limit_candidates(query, data)
+        return query, data
+
+    def limit_candidates(self, query: KeywordCoordinate, data: dataset_type) -> dataset_type:
+        """
+        Keeps the max_candidates candidates with the lowest lower bounds of their single cost. The lower bound of a candidate bounds the cost of every subset containing it, so the number and the lowest lower bound of the removed candidates are kept in removed_candidates and removed_candidates_bound for check_exactness.
+        :param query: The (normalized) query
+        :param data: The (normalized) candidates
+        :return: The remaining candidates in the same order
+        """
+        self.removed_candidates = 0
+        self.removed_candidates_bound = math.inf
+        if len(data) <= self.max_candidates:
+            return data
+        lower_bounds = [self.cost_function.get_lower_bound(
+            self.cost_function.distance_metric(query.coordinates, kwc.coordinates),
+            self.cost_function.get_keyword_distance(query, kwc)) for kwc in data]
+        order = sorted(range(len(data)), key=lambda index: lower_bounds[index])
+        keep = set(order[:self.max_candidates])
+        self.removed_candidates = len(data) - self.max_candidates
+        self.removed_candidates_bound = lower_bounds[order[self.max_candidates]]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('kept %s of %s candidates, the removed candidates have a lower bound of %s',
+                        self.max_candidates, len(data), self.removed_candidates_bound)
+        return [kwc for index, kwc in enumerate(data) if index in keep]
+
+    def check_exactness(self, result_list: solution_list) -> bool:
+        """
+        Checks whether the results are provably the same as without max_candidates. This is the case if there are result_length results and none of them is more expensive than the lower bound of the removed candidates. The outcome is kept in result_is_exact.
+        :param result_list: The sorted results
+        :return: True if the results are exact, False if they may be approximate
+        """
+        bound = self.removed_candidates_bound
+        if self.removed_candidates == 0:
+            self.result_is_exact = True
+        elif len(result_list) < self.result_length:
+            self.result_is_exact = False
+        elif bound == math.inf:
+            self.result_is_exact = True
+        else:
+            self.result_is_exact = result_list[self.result_length - 1][0] <= bound - get_bound_tolerance(bound)
+        if self.max_candidates is not None and logger.isEnabledFor(logging.INFO):
+            logger.info('the results are %s', 'exact' if self.result_is_exact else 'approximate')
+        return self.result_is_exact
+
+    def filter_candidates_by_thresholds(self, query: KeywordCoordinate, data: dataset_type) -> dataset_type:
+        """
+        Removes the candidates which exceed a threshold of the cost function on their own. The keyword threshold is applied for cost functions with subset thresholds (CostFunction.has_subset_thresholds, all the cost types), the query distance threshold only if it is compared with the maximum query-dataset distance (CostFunction.has_maximum_query_distance_threshold, all the cost types but Type3). Every subset with such a candidate would have an infinite cost. Other cost functions are not filtered.
+        :param query: The (normalized) query
+        :param data: The (normalized) candidates
+        :return: The remaining candidates in the same order
+        """
+        if self.cost_function.disable_thresholds or not self.cost_function.has_subset_thresholds:
+            return data
+        filtered_data = []
+        for kwc in data:
+            if self.cost_function.get_keyword_distance(query, kwc) > self.cost_function.keyword_similarity_threshold:
+                continue
+            if self.cost_function.has_maximum_query_distance_threshold and self.cost_function.distance_metric(
+                    query.coordinates, kwc.coordinates) > self.cost_function.query_distance_threshold:
+                continue
+            filtered_data.append(kwc)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('threshold filtering removed %s of %s candidates', len(data) - len(filtered_data), len(data))
+        return filtered_data
+
+    def get_skyline_layers(self, query: KeywordCoordinate, data: dataset_type, max_layers: int = math.inf,
+                           eligible: typing.Sequence[bool] = None) -> typing.List[int]:
+        """
+        Calculates the skyline layer of every candidate with respect to its query-dataset distance and keyword distance. A candidate dominates another one if neither distance is larger and the two are not equal. Candidates which are not dominated by an eligible candidate are in layer 0, all others are in the layer after the highest layer of an eligible candidate dominating them. So a candidate in layer j is dominated by a chain of j eligible candidates. The candidates are processed in ascending order of their distances, keeping the smallest keyword distance of the eligible candidates of every layer.
+        :param query: The (normalized) query
+        :param data: The (normalized) candidates
+        :param max_layers: Layers from this one on are not told apart, their candidates get max_layers as layer
+        :param eligible: Which candidates may dominate other candidates. If None, all candidates may.
+        :return: The layer of every candidate in the same order as the data
+        """
+        query_distances = [self.cost_function.distance_metric(query.coordinates, kwc.coordinates) for kwc in data]
+        keyword_distances = [self.cost_function.get_keyword_distance(query, kwc) for kwc in data]
+        order = sorted(range(len(data)), key=lambda index: (query_distances[index], keyword_distances[index]))
+        layers = [0] * len(data)
+        # The smallest keyword distance of an eligible candidate of every layer, which never decreases with the layer
+        layer_minima: typing.List[float] = []
+        start = 0
+        while start < len(order):
+            # Equal candidates do not dominate each other, so they are inserted after their layers are known
+            end = start + 1
+            while end < len(order) and query_distances[order[end]] == query_distances[order[start]] and \
+                    keyword_distances[order[end]] == keyword_distances[order[start]]:
+                end += 1
+            layer = min(bisect.bisect_right(layer_minima, keyword_distances[order[start]]), max_layers)
+            for index in order[start:end]:
+                layers[index] = layer
+            if layer < max_layers and any(eligible is None or eligible[index] for index in order[start:end]):
+                if layer == len(layer_minima):
+                    layer_minima.append(keyword_distances[order[start]])
+                else:
+                    layer_minima[layer] = keyword_distances[order[start]]
+            start = end
+        return layers
+
+    def filter_candidates_by_skyline(self, query: KeywordCoordinate, data: dataset_type) -> dataset_type:
+        """
+        Removes the candidates which are in the skyline layer result_length or higher. The cost of a Type1 or Type2 subset is at least the cost of any of its POIs as a single candidate, and that cost never decreases with the query-dataset distance or the keyword distance. A candidate in layer result_length is dominated by a chain of result_length candidates whose single costs are not higher, so no subset containing it is needed for the results. With keyword coverage only the candidates covering all the query keywords on their own may dominate others. The number of removed candidates is kept in eliminated_by_skyline.
+        :param query: The (normalized) query
+        :param data: The (normalized) candidates
+        :return: The remaining candidates in the same order
+        """
+        if self.result_length <= 0:
+            return data
+        eligible = None
+        if self.keyword_coverage:
+            full_mask = (1 << len(query.table.get_keyword_id_set(query.row))) - 1
+            eligible = [mask == full_mask for mask in self.get_query_keyword_masks(query, data)]
+        layers = self.get_skyline_layers(query, data, self.result_length, eligible)
+        filtered_data = [kwc for kwc, layer in zip(data, layers) if layer < self.result_length]
+        self.eliminated_by_skyline = len(data) - len(filtered_data)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('skyline filtering removed %s of %s candidates', self.eliminated_by_skyline, len(data))
+        return filtered_data
+
+    def filter_candidates_by_index_bound(self, query: KeywordCoordinate, data: dataset_type,
+                                         positions: np.ndarray) -> dataset_type:
+        """
+        Removes the candidates which cannot be part of any of the best subsets because of their query-dataset distance and keyword distance. The leaves of the IRTree are visited in ascending order of their lower bounds until result_length single candidates are known that are cheaper than all the remaining regions. The result_length-th lowest of their costs bounds the cost of the results. Afterwards only the regions within this bound are visited to collect the candidates whose own lower bound does not exceed it.
+        :param query: The (normalized) query
+        :param data: The (normalized) candidates
+        :param positions: The positions of the candidates in the data of the solver
+        :return: The remaining candidates in the same order
+        """
+        if len(data) == 0 or self.result_length <= 0:
+            return data
+        ir_tree = self.get_ir_tree()
+        if self.normalize_data:
+            normalization = (self.denormalize_max_x, self.denormalize_min_x, self.denormalize_max_y,
+                             self.denormalize_min_y)
+        else:
+            normalization = None
+        candidate_indices = np.full(ir_tree.number_of_pois, -1, dtype=np.int64)
+        candidate_indices[positions] = np.arange(len(data))
+        if self.keyword_coverage:
+            full_mask = (1 << len(query.table.get_keyword_id_set(query.row))) - 1
+            masks = self.get_query_keyword_masks(query, data)
+        # Max-heap of the result_length lowest costs of single candidates
+        costs: typing.List[float] = []
+        for lower_bound, leaf in ir_tree.get_leaves_by_lower_bound(query, self.cost_function, normalization):
+            if len(costs) >= self.result_length and lower_bound > -costs[0] + get_bound_tolerance(-costs[0]):
+                break
+            for index in candidate_indices[leaf.positions].tolist():
+                if index < 0 or (self.keyword_coverage and masks[index] != full_mask):
+                    continue
+                cost = self.get_cost_for_subset(query, (data[index],))
+                if len(costs) < self.result_length:
+                    heapq.heappush(costs, -cost)
+                elif cost < -costs[0]:
+                    heapq.heapreplace(costs, -cost)
+        if len(costs) < self.result_length or -costs[0] == math.inf:
+            return data
+        bound = -costs[0] + get_bound_tolerance(-costs[0])
+        keep = np.zeros(len(data), dtype=bool)
+        for leaf in ir_tree.get_leaves(query, self.cost_function, bound, normalization):
+            for index in candidate_indices[leaf.positions].tolist():
+                if index < 0:
+                    continue
+                query_distance = self.cost_function.distance_metric(query.coordinates, data[index].coordinates)
+                keyword_distance = self.cost_function.get_keyword_distance(query, data[index])
+                keep[index] = self.cost_function.get_lower_bound(query_distance, keyword_distance) <= bound
+        filtered_data = [kwc for kwc, kept in zip(data, keep.tolist()) if kept]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('spatial-keyword filtering removed %s of %s candidates with a bound of %s',
+                        len(data) - len(filtered_data), len(data), bound)
+        return filtered_data
+
+    def filter_candidates_by_keyword_bound(self, query: KeywordCoordinate, data: dataset_type,
+                                           positions: np.ndarray) -> dataset_type:
+        """
+        Removes the candidates which cannot be part of any of the best subsets because of their keyword distance. Every single candidate is a subset itself, so the result_length-th lowest cost of the single candidates bounds the cost of the results. A candidate is removed if its keyword distance alone leads to a higher cost. With the keyword id based similarity metrics only the candidates in the posting lists of the query keywords need to be looked at, all the other candidates have a keyword distance of 1.
+        :param query: The (normalized) query
+        :param data: The (normalized) candidates
+        :param positions: The positions of the candidates in the data of the solver
+        :return: The remaining candidates in the same order
+        """
+        if len(data) == 0 or self.result_length <= 0:
+            return data
+        if self.cost_function.similarity_metric.__name__ in ('combined_cosine_similarity',
+                                                            'keyword_id_cosine_similarity', 'tfidf_cosine_similarity'):
+            shares_keywords = np.isin(positions, self.get_inverted_index().get_query_positions(self.query))
+        else:
+            # The keyword distance of the other metrics is not known without calculating it
+            shares_keywords = np.ones(len(data), dtype=bool)
+        if self.keyword_coverage:
+            full_mask = (1 << len(query.table.get_keyword_id_set(query.row))) - 1
+            masks = self.get_query_keyword_masks(query, data)
+        keyword_distances: typing.List[float] = [1.0] * len(data)
+        costs: typing.List[float] = []
+        for index in np.flatnonzero(shares_keywords).tolist():
+            keyword_distances[index] = self.cost_function.get_keyword_distance(query, data[index])
+            if not self.keyword_coverage or masks[index] == full_mask:
+                costs.append(self.get_cost_for_subset(query, (data[index],)))
+        if len(costs) < self.result_length:
+            return data
+        bound = heapq.nsmallest(self.result_length, costs)[-1]
+        filtered_data = [kwc for kwc, keyword_distance in zip(data, keyword_distances)
+                         if self.cost_function.get_keyword_lower_bound(keyword_distance) <= bound]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('keyword filtering removed %s of %s candidates with a bound of %s', len(data) - len(filtered_data),
+                        len(data), bound)
+        return filtered_data
+
+    def get_cost_for_subset(self, query: KeywordCoordinate, subset: typing.Sequence[KeywordCoordinate],
+                            bound: float = math.inf) -> float:
+        """
+        Calculates the cost of a subset. The denormalized subset is passed on to the cost function for the matching of precalculated values.
+        :param query: The (normalized) query
+        :param subset: The (normalized) subset
+        :param bound: The cost above which the exact cost is not needed. Subsets which cost more may get math.inf instead of their cost.
+        :return: The cost of the subset
+        """
+        if self.normalize_data:
+            denormalized_subset = denormalize_result_data([(0.0, subset)], self.denormalize_max_x,
+                                                          self.denormalize_min_x, self.denormalize_max_y,
+                                                          self.denormalize_min_y)[0][1]
+        else:
+            denormalized_subset = subset
+        return self.cost_function.solve(query, subset, denormalized_subset, bound)
+
+    def get_ir_tree(self) -> IRTree:
+        """
+        Returns the IRTree of the data. The tree is built on first use.
+        :return: The IRTree
+        """
+        if self.ir_tree is None:
+            self.ir_tree = IRTree(self.data)
+        elif self.ir_tree.number_of_pois != len(self.data):
+            msg = 'The IR-tree was built for {} POIs, but the data contains {} POIs'.format(
+                self.ir_tree.number_of_pois, len(self.data))
+            logger.error(msg)
+            raise ValueError(msg)
+        return self.ir_tree
+
+    def get_inverted_index(self) -> InvertedIndex:
+        """
+        Returns the InvertedIndex of the data. The index is built on first use.
+        :return: The InvertedIndex
+        """
+        if self.inverted_index is None:
+            self.inverted_index = InvertedIndex(self.data)
+        elif self.inverted_index.number_of_pois != len(self.data):
+            msg = 'The inverted index was built for {} POIs, but the data contains {} POIs'.format(
+                self.inverted_index.number_of_pois, len(self.data))
+            logger.error(msg)
+            raise ValueError(msg)
+        return self.inverted_index
+
+    def get_embedding_backend(self) -> EmbeddingBackend:
+        """
+        Returns the EmbeddingBackend for the semantic filtering. A backend shared with the cost function is preferred over loading the spaCy model.
+        :return: The EmbeddingBackend
+        """
+        if self.embedding_backend is None:
+            if isinstance(self.cost_function.model, EmbeddingBackend):
+                self.embedding_backend = self.cost_function.model
+            else:
+                self.embedding_backend = SpacyEmbeddingBackend()
+        return self.embedding_backend
+
+    def calculate_for_subsets(self, method_name: str, query: KeywordCoordinate = None) -> typing.List[float]:
+        """
+        Calculates a value for every subset of the solver with the execution backend of the solver.
+        :param method_name: The name of the method of the cost function (e.g. get_maximum_for_dataset) or 'solve' for the cost of the subsets
+        :param query: The (normalized) query, if the method needs it
+        :return: The values in the same order as the subsets
+        """
+        if self.execution_backend == 'thread':
+            return calculate_in_threads(method_name, self.cost_function, self.list_of_subsets, query,
+                                        self.max_number_of_concurrent_processes, self.get_denormalization())
+        pool = self.get_worker_pool()
+        costs = pool.calculate(method_name, query, balance=self.rebalance_subsets, dynamic=self.dynamic_scheduling)
+        if self.dynamic_scheduling:
+            self.utilization_report = pool.utilization_report
+        return costs
+
+    def get_denormalization(self) -> typing.Optional[typing.Tuple[float, float, float, float]]:
+        """
+        Returns the parameters to denormalize the subsets of the solver.
+        :return: The maximum x, minimum x, maximum y and minimum y or None if the data is not normalized
+        """
+        if self.normalize_data:
+            return self.denormalize_max_x, self.denormalize_min_x, self.denormalize_max_y, self.denormalize_min_y
+        return None
+
+    def get_worker_pool(self) -> WorkerPool:
+        """
+        Returns the worker pool of the process preloaded with the cost function and the subsets of the solver. The pool is shared by the precalculations and the solve calls as long as the cost function and the subsets stay the same.
+        :return: The WorkerPool
+        """
+        return get_worker_pool(self.max_number_of_concurrent_processes, self.cost_function, self.list_of_subsets,
+                               self.get_denormalization(), self.shared_memory)
+
     # def get_all_subsets_heuristic(self, data):
     #     """
     #     Calculates all the possible subsets for the given data. Takes the set maximum length for subsets into account.
@@ -302,12 +948,15 @@ class Solver:
     #     return list_of_subsets
     
     
-    def get_all_subsets(self, data):
+    def get_all_subsets(self, data, neighbour_graph: NeighbourGraph = None):
         """
         Calculates all the possible subsets for the given data. Takes the set maximum length for subsets into account.
         :param data: The data
+        :param neighbour_graph: If given, only the subsets whose POIs are pairwise neighbours are calculated
         :return: A list of all possible subsets
         """
+        if neighbour_graph is not None:
+            return self.get_all_clique_subsets(data, neighbour_graph)
         max_length = min(len(data), self.max_subset_size)
         list_of_subsets = []
 
@@ -322,78 +971,234 @@ class Solver:
 
         return list_of_subsets
 
-    def __str__(self):
-        return '{}(query: {}, dataset: {}, cost function: {}, result length {})'.format(type(self).__name__, self.query, dataset_comprehension(self.data), self.cost_function, self.result_length)
+    def get_best_subsets_level_wise(self, query: KeywordCoordinate, data: dataset_type,
+                                    neighbour_graph: NeighbourGraph = None) -> solution_list:
+        """
+        Calculates the best subsets for the given data level by level of their size (Apriori). The Type1 and Type2 costs never decrease when a POI is added, so a subset which is not cheaper than the current result_length-th best subset cannot be extended into a better one. Only the other subsets survive a level, and a subset of the next level is only built if all its subsets with one POI less survived. The number of survivors of every level is kept in level_survivors.
+        :param query: The (normalized) query
+        :param data: The (normalized) data
+        :param neighbour_graph: If given, only the subsets whose POIs are pairwise neighbours are built
+        :return: A sorted list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        self.level_survivors = []
+        if self.result_length <= 0:
+            return []
+        # Max-heap of the best subsets found so far, the counter keeps the order of equal costs stable
+        best_subsets: typing.List[typing.Tuple[float, int, typing.Tuple[int, ...]]] = []
+        counter = 0
+        level: typing.List[typing.Tuple[int, ...]] = [(index,) for index in range(len(data))]
+        size = 1
+        while len(level) > 0:
+            costs: typing.List[float] = []
+            for indices in level:
+                # Subsets which cost more than the current result_length-th best subset do not survive the level
+                bound = -best_subsets[0][0] if len(best_subsets) >= self.result_length else math.inf
+                cost = self.get_cost_for_subset(query, tuple(data[index] for index in indices), bound)
+                costs.append(cost)
+                if len(best_subsets) < self.result_length:
+                    heapq.heappush(best_subsets, (-cost, -counter, indices))
+                elif cost < -best_subsets[0][0]:
+                    heapq.heapreplace(best_subsets, (-cost, -counter, indices))
+                counter += 1
+            results_full = len(best_subsets) >= self.result_length
+            worst_cost = -best_subsets[0][0] if results_full else math.inf
+            survivors = [indices for indices, cost in zip(level, costs) if not results_full or cost < worst_cost]
+            self.level_survivors.append(len(survivors))
+            if size >= self.max_subset_size:
+                break
+            survivor_set = set(survivors)
+            next_level: typing.List[typing.Tuple[int, ...]] = []
+            for indices in survivors:
+                for index in range(indices[-1] + 1, len(data)):
+                    if neighbour_graph is not None and \
+                            any(index not in neighbour_graph.get_neighbour_set(member) for member in indices):
+                        continue
+                    subset = indices + (index,)
+                    # Leaving out the last POI gives the surviving subset itself
+                    if all(subset[:position] + subset[position + 1:] in survivor_set for position in range(size)):
+                        next_level.append(subset)
+            level = next_level
+            size += 1
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('level-wise enumeration of %s candidates, survivors per level: %s', len(data),
+                        self.level_survivors)
+        best_subsets.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return [(-negative_cost, tuple(data[index] for index in indices)) for negative_cost, _, indices in best_subsets]
+
+    def get_best_subsets_incrementally(self, query: KeywordCoordinate, data: dataset_type,
+                                       neighbour_graph: NeighbourGraph = None) -> solution_list:
+        """
+        Calculates the best subsets for the given data by walking the same subsets as get_all_subsets, get_all_clique_subsets or get_all_covering_subsets depth-first. The aggregates of the cost types (see CostFunction.get_cost_from_aggregates) are carried along the current prefix, so adding a POI only takes the distances to the POIs before it instead of scoring the whole subset again. The subsets are never stored, only the best result_length of them are kept.
+        :param query: The (normalized) query
+        :param data: The (normalized) data
+        :param neighbour_graph: If given, only the subsets whose POIs are pairwise neighbours are walked
+        :return: A sorted list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        best_subsets = self.get_best_subset_indices_incrementally(query, data, neighbour_graph)
+        return [(cost, tuple(data[index] for index in indices)) for cost, indices in best_subsets]
 
+    def get_best_subset_indices_incrementally(self, query: KeywordCoordinate, data: dataset_type,
+                                              neighbour_graph: NeighbourGraph = None,
+                                              first_indices: typing.Iterable[int] = None,
+                                              shared_bound: SharedArray = None) -> typing.List[typing.Tuple[float, typing.Tuple[int, ...]]]:
+        """
+        Walks the subsets depth-first like get_best_subsets_incrementally, but returns the indices of the POIs of the best subsets. The walk can be restricted to the subsets starting with some POIs and turned into a branch-and-bound search: since monotone costs (see CostFunction.is_monotone) like Type1 and Type2 never decrease when a POI is added, the cost of a prefix is a lower bound of all the subsets extending it, and prefixes which are more expensive than the current result_length-th best cost are not extended. The number of pruned prefixes is kept in pruned_branches. The walk itself is done by get_best_subset_indices.
+        :param query: The (normalized) query
+        :param data: The (normalized) data
+        :param neighbour_graph: If given, only the subsets whose POIs are pairwise neighbours are walked
+        :param first_indices: If given, only the subsets whose first POI has one of these indices are walked
+        :param shared_bound: If given, a writeable SharedArray with a single value, the lowest result_length-th best cost known to any process, which enables the branch-and-bound search. It is lowered as soon as this walk finds result_length cheaper subsets. Only supported for monotone cost functions like Type1 and Type2.
+        :return: A sorted list with tuples. Every tuple contains a cost and the indices of the POIs of the subset.
+        """
+        best_subsets, self.pruned_branches = get_best_subset_indices(
+            self.cost_function, query, data, self.result_length, self.max_subset_size, self.keyword_coverage,
+            neighbour_graph, first_indices, shared_bound)
+        return best_subsets
 
-def get_max_inter_dataset_distances(costfunction: CostFunction, subsets):
-    """
-    This function gets executed inside every maximum inter-dataset distance process.
-    :param costfunction: The CostFunction
-    :param subsets: The subsets for the process
-    :return: A list with tuples of the costs and their corresponding subset
-    """
-    results = []
-    for subset in subsets:
-        current_cost = costfunction.get_maximum_for_dataset(subset)
-        results.append((current_cost, subset))
-    return results
+    def get_best_subsets_by_parallel_branch_and_bound(self, query: KeywordCoordinate, data: dataset_type,
+                                                      neighbour_graph: NeighbourGraph = None) -> solution_list:
+        """
+        Calculates the best subsets for the given data with a branch-and-bound search on the worker pool of the solver (see get_worker_pool), which already holds the cost function. The search tree is split by the first POI of the subsets into CHUNKS_PER_WORKER tasks per worker, each with every n-th first POI, so the large branches of the first POIs are spread over all the tasks and the idle workers pick up the next one. A task only carries the query, a table of the candidates and the neighbour graph. The result_length-th best cost known to any worker is kept in shared memory, so a good subset found by one worker immediately tightens the pruning of all the others (see get_best_subset_indices). The final bound is kept in shared_bound and the number of pruned prefixes of all the workers in pruned_branches.
+        :param query: The (normalized) query
+        :param data: The (normalized) data
+        :param neighbour_graph: If given, only the subsets whose POIs are pairwise neighbours are searched
+        :return: A sorted list with tuples. Every tuple contains a cost and the corresponding subset of KeywordCoordinates.
+        """
+        self.pruned_branches = 0
+        if self.result_length <= 0 or len(data) == 0:
+            return []
+        pool = self.get_worker_pool()
+        table = PoiTable.from_keyword_coordinates(data)
+        shared_bound = SharedArray(np.array([math.inf]), writeable=True)
+        number_of_tasks = min(len(data), self.max_number_of_concurrent_processes * CHUNKS_PER_WORKER)
+        futures = [pool.submit(search_branches, query, table, neighbour_graph, self.result_length,
+                               self.max_subset_size, self.keyword_coverage, shared_bound,
+                               range(first_index, len(data), number_of_tasks))
+                   for first_index in range(number_of_tasks)]
+        best_subsets: typing.List[typing.Tuple[float, typing.Tuple[int, ...]]] = []
+        for future in futures:
+            branch_subsets, pruned_branches = future.result()
+            best_subsets.extend(branch_subsets)
+            self.pruned_branches += pruned_branches
+        self.shared_bound = float(shared_bound.array[0])
+        shared_bound.close()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('searched %s branches in %s tasks with the final bound %s and pruned %s branches', len(data),
+                         number_of_tasks, self.shared_bound, self.pruned_branches)
+        best_subsets = heapq.nsmallest(self.result_length, best_subsets, key=lambda entry: entry[0])
+        return [(cost, tuple(data[index] for index in indices)) for cost, indices in best_subsets]
 
+    def get_neighbour_distance(self) -> float:
+        """
+        Returns the maximum inter-dataset distance of two POIs of a subset. With threshold filtering, this is at most the dataset distance threshold of cost functions with subset thresholds (CostFunction.has_subset_thresholds), which compare it with the maximum inter-dataset distance.
+        :return: The distance or None if the distance is not limited
+        """
+        distance = self.neighbour_distance
+        if self.threshold_filtering and not self.cost_function.disable_thresholds and \
+                self.cost_function.has_subset_thresholds:
+            threshold = self.cost_function.dataset_distance_threshold
+            distance = threshold if distance is None else min(distance, threshold)
+        return distance
 
-def get_min_inter_dataset_distances(costfunction: CostFunction, subsets):
-    """
-    This function gets executed inside every minimum inter-dataset distance process.
-    :param costfunction: The CostFunction
-    :param subsets: The subsets for the process
-    :return: A list with tuples of the costs and their corresponding subset
-    """
-    results = []
-    for subset in subsets:
-        current_cost = costfunction.get_minimum_for_dataset(subset)
-        results.append((current_cost, subset))
-    return results
+    def get_neighbour_graph(self, data: dataset_type) -> NeighbourGraph:
+        """
+        Builds the NeighbourGraph of the candidates with the neighbour distance and the distance metric of the cost function.
+        :param data: The (normalized) candidates
+        :return: The NeighbourGraph or None if the distance between the POIs of a subset is not limited
+        """
+        distance = self.get_neighbour_distance()
+        if distance is None:
+            return None
+        return NeighbourGraph(data, distance, self.cost_function.distance_metric)
 
+    def get_all_clique_subsets(self, data: dataset_type, neighbour_graph: NeighbourGraph) -> typing.List[typing.Tuple]:
+        """
+        Calculates all the subsets for the given data whose POIs are pairwise neighbours (the cliques of the graph). Takes the set maximum length for subsets into account. Subsets are built in the order of the data and a POI is only added if it is a neighbour of every POI before it, so the pairs which are too far apart are never combined.
+        :param data: The data
+        :param neighbour_graph: The NeighbourGraph of the data
+        :return: A list of all the clique subsets
+        """
+        list_of_subsets: typing.List[typing.Tuple] = []
+        current_subset: typing.List[KeywordCoordinate] = []
 
-def get_max_query_dataset_distances(costfunction: CostFunction, query: KeywordCoordinate, subsets):
-    """
-    This function gets executed inside every maximum query-dataset distance process.
-    :param costfunction: The CostFunction
-    :param query: The Query
-    :param subsets: The subsets for the process
-    :return: A list with tuples of the costs and their corresponding subset
-    """
-    results = []
-    for subset in subsets:
-        current_cost = costfunction.get_maximum_for_query(query, subset)
-        results.append((current_cost, subset))
-    return results
+        def extend(allowed: typing.List[int]):
+            if len(current_subset) >= self.max_subset_size:
+                return
+            for offset, index in enumerate(allowed):
+                current_subset.append(data[index])
+                list_of_subsets.append(tuple(current_subset))
+                neighbours = neighbour_graph.get_neighbour_set(index)
+                extend([later_index for later_index in allowed[offset + 1:] if later_index in neighbours])
+                current_subset.pop()
 
+        extend(list(range(len(data))))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found %s clique subsets for %s candidates', len(list_of_subsets), len(data))
+        return list_of_subsets
 
-def get_min_query_dataset_distances(costfunction: CostFunction, query: KeywordCoordinate, subsets):
-    """
-    This function gets executed inside every minimum query-dataset distance process.
-    :param costfunction: The CostFunction
-    :param query: The Query
-    :param subsets: The subsets for the process
-    :return: A list with tuples of the costs and their corresponding subset
-    """
-    results = []
-    for subset in subsets:
-        current_cost = costfunction.get_minimum_for_query(query, subset)
-        results.append((current_cost, subset))
-    return results
+    def get_query_keyword_masks(self, query: KeywordCoordinate, data: dataset_type) -> typing.List[int]:
+        """
+        Calculates which query keywords are covered by every POI. Bit i of a mask is set if the POI has the i-th query keyword.
+        :param query: The query
+        :param data: The data
+        :return: A list with the bitmask of every POI in the same order as the data
+        """
+        return get_query_keyword_masks(query, data)
+
+    def get_all_covering_subsets(self, query: KeywordCoordinate, data: dataset_type,
+                                 neighbour_graph: NeighbourGraph = None) -> typing.List[typing.Tuple]:
+        """
+        Calculates all the subsets for the given data which are minimal covers of the query keywords (see add_to_minimal_cover). Takes the set maximum length for subsets into account. Subsets are built in the order of the data and a POI is only added if it covers a query keyword which is not covered yet and leaves every POI before it a query keyword of its own. Branches which can no longer cover all the query keywords with the remaining POIs and subset slots are pruned.
+        :param query: The query
+        :param data: The data
+        :param neighbour_graph: If given, a POI is only added if it is a neighbour of every POI before it
+        :return: A list of all the covering subsets
+        """
+        masks = self.get_query_keyword_masks(query, data)
+        candidates = [(position, kwc, mask) for position, (kwc, mask) in enumerate(zip(data, masks)) if mask != 0]
+        full_mask = (1 << len(query.table.get_keyword_id_set(query.row))) - 1
+        number_of_candidates = len(candidates)
+        # The keywords and the maximum number of keywords that can still be covered by the candidates from an index on
+        suffix_masks = [0] * (number_of_candidates + 1)
+        suffix_max_bits = [0] * (number_of_candidates + 1)
+        for index in range(number_of_candidates - 1, -1, -1):
+            suffix_masks[index] = suffix_masks[index + 1] | candidates[index][2]
+            suffix_max_bits[index] = max(suffix_max_bits[index + 1], bin(candidates[index][2]).count('1'))
+        list_of_subsets: typing.List[typing.Tuple] = []
+        if full_mask == 0:
+            return list_of_subsets
+        current_subset: typing.List[KeywordCoordinate] = []
 
+        def extend(start: int, covered: int, allowed: typing.FrozenSet[int], private_masks: typing.Tuple[int, ...]):
+            uncovered = full_mask & ~covered
+            free_slots = self.max_subset_size - len(current_subset)
+            if free_slots <= 0 or suffix_masks[start] & uncovered != uncovered:
+                return
+            if bin(uncovered).count('1') > free_slots * suffix_max_bits[start]:
+                return
+            for index in range(start, number_of_candidates):
+                position, kwc, mask = candidates[index]
+                if mask & uncovered == 0 or (allowed is not None and position not in allowed):
+                    continue
+                new_private_masks = add_to_minimal_cover(private_masks, covered, mask)
+                if new_private_masks is None:
+                    continue
+                current_subset.append(kwc)
+                if (covered | mask) == full_mask:
+                    list_of_subsets.append(tuple(current_subset))
+                elif neighbour_graph is None:
+                    extend(index + 1, covered | mask, None, new_private_masks)
+                else:
+                    neighbours = neighbour_graph.get_neighbour_set(position)
+                    extend(index + 1, covered | mask, neighbours if allowed is None else allowed & neighbours,
+                           new_private_masks)
+                current_subset.pop()
+
+        extend(0, 0, None, ())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('found %s covering subsets for %s candidates', len(list_of_subsets), number_of_candidates)
+        return list_of_subsets
+
+    def __str__(self):
+        return '{}(query: {}, dataset: {}, cost function: {}, result length {})'.format(type(self).__name__, self.query, dataset_comprehension(self.data), self.cost_function, self.result_length)
 
-def get_max_keyword_similarity(costfunction: CostFunction, query: KeywordCoordinate, subsets):
-    """
-    This function gets executed inside every maximum keyword similarity process.
-    :param costfunction: The CostFunction
-    :param query: The Query
-    :param subsets: The subsets for the process
-    :return: A list with tuples of the costs and their corresponding subset
-    """
-    results = []
-    for subset in subsets:
-        current_cost = costfunction.get_maximum_keyword_distance(query, subset)
-        results.append((current_cost, subset))
-    return results
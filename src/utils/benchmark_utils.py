@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+import typing
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../..')
+
+
+def measure_import_time(module_name: str, watched_module_names: typing.List[str] = None) -> typing.Tuple[
+        float, typing.List[str]]:
+    """
+    Measures the time it takes to import a module in a fresh interpreter.
+    :param module_name: The name of the module, e.g. src.solvers.naive_solver
+    :param watched_module_names: Names of modules which should be reported if they got imported along the way
+    :return: A tuple with the import time in seconds and the watched modules which have been imported
+    """
+    if watched_module_names is None:
+        watched_module_names = []
+    script = ('import json, sys, time\n'
+              'start = time.perf_counter()\n'
+              'import {}\n'
+              'duration = time.perf_counter() - start\n'
+              'print(json.dumps([duration, [name for name in {} if name in sys.modules]]))\n').format(
+        module_name, watched_module_names)
+    output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT, check=True, capture_output=True,
+                            text=True).stdout
+    duration, loaded_modules = json.loads(output.strip().splitlines()[-1])
+    return duration, loaded_modules
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import math
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+def count_combinations(number_of_items: int, max_size: int) -> int:
+    """
+    Calculates the number of non-empty combinations of a set of items up to a maximum size.
+    :param number_of_items: The number of items
+    :param max_size: The maximum size of a combination
+    :return: The number of combinations
+    """
+    max_size = min(number_of_items, max_size)
+    return sum(math.comb(number_of_items, size) for size in range(1, max_size + 1))
+
+
+def unrank_combination(rank: int, number_of_items: int, size: int) -> typing.Tuple[int, ...]:
+    """
+    Calculates the combination of a given rank with the combinatorial number system. The combinations are ranked in lexicographic order, which is the order of itertools.combinations(range(number_of_items), size).
+    :param rank: The rank, 0 <= rank < comb(number_of_items, size)
+    :param number_of_items: The number of items
+    :param size: The size of the combination
+    :return: The sorted indices of the items of the combination
+    """
+    if not 0 <= rank < math.comb(number_of_items, size):
+        msg = 'The rank {} is out of range for combinations of {} out of {} items'.format(rank, size,
+                                                                                           number_of_items)
+        logger.error(msg)
+        raise ValueError(msg)
+    combination: typing.List[int] = []
+    item = 0
+    for position in range(size):
+        while True:
+            # The number of combinations starting with the chosen items followed by this item
+            count = math.comb(number_of_items - item - 1, size - position - 1)
+            if rank < count:
+                break
+            rank -= count
+            item += 1
+        combination.append(item)
+        item += 1
+    return tuple(combination)
+
+
+def rank_combination(combination: typing.Sequence[int], number_of_items: int) -> int:
+    """
+    Calculates the rank of a combination in lexicographic order. This is the inverse of unrank_combination.
+    :param combination: The sorted indices of the items of the combination
+    :param number_of_items: The number of items
+    :return: The rank
+    """
+    size = len(combination)
+    rank = 0
+    previous = -1
+    for position, item in enumerate(combination):
+        for skipped in range(previous + 1, item):
+            rank += math.comb(number_of_items - skipped - 1, size - position - 1)
+        previous = item
+    return rank
+
+
+def next_combination(combination: typing.List[int], number_of_items: int) -> bool:
+    """
+    Advances a combination to its successor in lexicographic order, in place.
+    :param combination: The sorted indices of the items of the combination
+    :param number_of_items: The number of items
+    :return: False if the combination was the last one of its size and was left unchanged, otherwise True
+    """
+    size = len(combination)
+    position = size - 1
+    while position >= 0 and combination[position] == number_of_items - size + position:
+        position -= 1
+    if position < 0:
+        return False
+    combination[position] += 1
+    for following in range(position + 1, size):
+        combination[following] = combination[following - 1] + 1
+    return True
+
+
+def iterate_combinations(number_of_items: int, max_size: int, start_rank: int,
+                         end_rank: int) -> typing.Iterator[typing.Tuple[int, ...]]:
+    """
+    Generates the combinations of a range of ranks. The combinations are ranked by their size first and in lexicographic order within the same size. Only the first combination is unranked, the others are generated as successors.
+    :param number_of_items: The number of items
+    :param max_size: The maximum size of a combination
+    :param start_rank: The first rank (inclusive)
+    :param end_rank: The last rank (exclusive)
+    :return: An iterator over the sorted indices of the items of the combinations
+    """
+    max_size = min(number_of_items, max_size)
+    offset = 0
+    size = 1
+    while size <= max_size and start_rank >= offset + math.comb(number_of_items, size):
+        offset += math.comb(number_of_items, size)
+        size += 1
+    if size > max_size or start_rank >= end_rank:
+        return
+    combination = list(unrank_combination(start_rank - offset, number_of_items, size))
+    for _ in range(start_rank, end_rank):
+        yield tuple(combination)
+        if not next_combination(combination, number_of_items):
+            size += 1
+            if size > max_size:
+                return
+            combination = list(range(size))
+
+
+class Combinations(typing.Sequence[typing.Tuple]):
+    """
+    Combinations is a read-only sequence of all the non-empty combinations of a list of items up to a maximum size, which are generated when they are accessed instead of being kept in memory. The combinations are ordered by their size first and lexicographically by the positions of their items within the same size. Pickling only transfers the items, so a worker which receives the sequence and a range of ranks generates its combinations locally.
+    """
+
+    def __init__(self, items: typing.Sequence, max_size: int = math.inf):
+        """
+        Constructs a new Combinations object.
+        :param items: The items. Items are combined by their position, equal items at different positions are not merged.
+        :param max_size: The maximum size of a combination
+        """
+        self.items = list(items)
+        self.max_size = int(min(len(self.items), max_size))
+        self.length = count_combinations(len(self.items), self.max_size)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return [self[rank] for rank in range(start, stop, step)]
+            return list(self.iterate(start, stop))
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('Combinations index out of range')
+        return next(self.iterate(index, index + 1))
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple]:
+        return self.iterate(0, self.length)
+
+    def iterate(self, start_rank: int, end_rank: int) -> typing.Iterator[typing.Tuple]:
+        """
+        Generates the combinations of a range of ranks.
+        :param start_rank: The first rank (inclusive)
+        :param end_rank: The last rank (exclusive)
+        :return: An iterator over the combinations as tuples of items
+        """
+        items = self.items
+        for combination in iterate_combinations(len(items), self.max_size, start_rank, end_rank):
+            yield tuple(items[index] for index in combination)
+
+    def __str__(self):
+        return 'Combinations({} items, maximum size {}, {} combinations)'.format(len(self.items), self.max_size,
+                                                                                self.length)
@@ -1,7 +1,9 @@
 import logging
 import random
+import typing
 
-from src.model.keyword_coordinate import KeywordCoordinate
+from src.model.keyword_coordinate import create_dataset
+from src.model.poi_table import PoiTable
 from src.utils.data_handler import write_pickle
 from src.utils.logging_utils import dataset_comprehension
 from src.utils.typing_definitions import dataset_type, keyword_dataset_type
@@ -45,7 +47,10 @@ class DataGenerator:
         """
         logger = logging.getLogger(__name__)
         logger.debug('generating dataset of size {}'.format(data_size))
-        dataset: dataset_type = []
+        names: typing.List[str] = []
+        coordinates_x: typing.List[float] = []
+        coordinates_y: typing.List[float] = []
+        keywords: typing.List[keyword_dataset_type] = []
         for data_counter in range(data_size):
             possible_keywords_copy = self.possible_keywords.copy()
             current_keywords: keyword_dataset_type = []
@@ -59,8 +64,11 @@ class DataGenerator:
                     break
                 possible_keywords_copy.remove(current_keyword)
                 current_keywords.append(current_keyword)
-            new_entry = KeywordCoordinate(current_x, current_y, current_keywords)
-            dataset.append(new_entry)
+            names.append(str(data_counter))
+            coordinates_x.append(current_x)
+            coordinates_y.append(current_y)
+            keywords.append(current_keywords)
+        dataset: dataset_type = create_dataset(PoiTable(names, coordinates_x, coordinates_y, keywords))
         logger.debug('generated dataset {}'.format(dataset_comprehension(dataset)))
         return dataset
 
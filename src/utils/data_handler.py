@@ -7,13 +7,11 @@ import typing
 
 import json
 import ast
-import numpy as np
-import pandas as pd
 import re
 
-from src.model.keyword_coordinate import KeywordCoordinate
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
 from src.utils.typing_definitions import dataset_type, keyword_dataset_type
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer, TfidfTransformer
 
 # Auxiliar functions
 def reviews2OneString(reviews):
@@ -189,6 +187,12 @@ def load_csv(file_name: str, x_coordinate_index: int, y_coordinate_index: int, k
     :param path_relative_to_project_root: The flag if the file name is relative to the project folder
     :return: The dataset of the csv
     """
+    # pandas and scikit-learn are only required for the csv ingestion. They are imported here to keep them out of the
+    # start-up time of everything that only loads pickles.
+    import numpy as np
+    import pandas as pd
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+
     df = pd.read_csv(os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../../files/' + file_name), delimiter = ';', error_bad_lines=False, encoding = "unicode_escape")
     
     # Calculates topN keywords using TF-IDF
@@ -233,7 +237,6 @@ def load_csv(file_name: str, x_coordinate_index: int, y_coordinate_index: int, k
     
     ###########################################
     
-    dataset: dataset_type = []
     # max_read_length -= 1  # because the length doesn't start counting at 0
     # if path_relative_to_project_root:
     #     file_path = os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/../../files/' + file_name)
@@ -258,11 +261,19 @@ def load_csv(file_name: str, x_coordinate_index: int, y_coordinate_index: int, k
     #             continue
     #         raw_keyword_list = row[keywords_index].split(keywords_delimiter)
             
+    names = []
+    coordinates_x = []
+    coordinates_y = []
+    keywords: typing.List[keyword_dataset_type] = []
+    keyword_weights: typing.List[typing.List[float]] = []
     for i in df.index:
-        current_POI_name = df['name'][i]
-        current_coordinate_x = float(df['lat'][i])
-        current_coordinate_y = float(df['lng'][i])
-        current_keywords: keyword_dataset_type = ' '.join(df['Top-Keywords-TFIDF'][i])
+        names.append(df['name'][i])
+        coordinates_x.append(float(df['lat'][i]))
+        coordinates_y.append(float(df['lng'][i]))
+        # The top keywords are a dictionary of the keywords and their TF-IDF scores.
+        top_keywords = df['Top-Keywords-TFIDF'][i] or dict()
+        keywords.append(list(top_keywords.keys()))
+        keyword_weights.append(list(top_keywords.values()))
     
             # current_keywords: keyword_dataset_type = []
             # for keyword in raw_keyword_list:
@@ -270,8 +281,8 @@ def load_csv(file_name: str, x_coordinate_index: int, y_coordinate_index: int, k
             #     if len(stripped_keyword) > 0:
             #         current_keywords.append(stripped_keyword)
             # current_keyword_coordinate = KeywordCoordinate(current_POI_name, current_coordinate_x, current_coordinate_y, current_keywords)
-        current_keyword_coordinate = KeywordCoordinate(current_POI_name, current_coordinate_x, current_coordinate_y, current_keywords)
-        dataset.append(current_keyword_coordinate)
+    dataset: dataset_type = create_dataset(PoiTable(names, coordinates_x, coordinates_y, keywords,
+                                                    keyword_weights=keyword_weights))
 
     return dataset
 
@@ -1,9 +1,88 @@
+import atexit
+import logging
+import logging.handlers
+import multiprocessing as mp
 import typing
 
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.utils.typing_definitions import dataset_type, solution_list
 
 
+def enable_debug_tracing(enabled: bool = True) -> None:
+    """
+    Enables or disables the debug tracing of the application. The hot paths (distance metrics, similarity metrics and cost functions) only build their debug messages if the debug level is enabled for their logger, so tracing is free unless it is switched on. Note that the handlers need to accept debug records as well for the messages to show up.
+    :param enabled: True to log debug messages of the application, False to fall back to the level of the root logger
+    """
+    logging.getLogger('src').setLevel(logging.DEBUG if enabled else logging.NOTSET)
+
+
+_logging_queue: mp.Queue = None
+_queue_listener: logging.handlers.QueueListener = None
+
+
+def start_queue_logging() -> mp.Queue:
+    """
+    Switches the logging of the application to asynchronous mode. The handlers of the root logger are moved to a QueueListener thread and replaced by a single QueueHandler. Processes started by the solvers send their records through the same queue, so file I/O and handler locks stay out of the compute processes. The listener is stopped and flushed on exit.
+    :return: The queue the records are sent through
+    """
+    global _logging_queue, _queue_listener
+    if _queue_listener is not None:
+        return _logging_queue
+    root_logger = logging.getLogger()
+    handlers = list(root_logger.handlers)
+    _logging_queue = mp.Queue(-1)
+    _queue_listener = logging.handlers.QueueListener(_logging_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(_logging_queue))
+    _queue_listener.start()
+    atexit.register(stop_queue_logging)
+    return _logging_queue
+
+
+def stop_queue_logging() -> None:
+    """
+    Stops the asynchronous logging after all queued records have been handled and restores the original handlers of the root logger.
+    """
+    global _logging_queue, _queue_listener
+    if _queue_listener is None:
+        return
+    _queue_listener.stop()
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root_logger.removeHandler(handler)
+    for handler in _queue_listener.handlers:
+        root_logger.addHandler(handler)
+    _queue_listener = None
+    _logging_queue = None
+
+
+def get_worker_logging_arguments() -> typing.Tuple[typing.Optional[mp.Queue], int, int]:
+    """
+    Collects the arguments for initialize_worker_logging. They have to be passed as initargs when creating a process pool.
+    :return: A tuple with the logging queue (None if the logging is synchronous), the level of the root logger and the level of the application loggers
+    """
+    return _logging_queue, logging.getLogger().level, logging.getLogger('src').level
+
+
+def initialize_worker_logging(logging_queue: typing.Optional[mp.Queue], root_level: int, level: int) -> None:
+    """
+    Initializer of the worker processes. If asynchronous logging is enabled, all records of the worker are sent to the listener of the parent process instead of being written by the worker itself.
+    :param logging_queue: The queue of the parent process or None if the logging is synchronous
+    :param root_level: The level of the root logger in the parent process
+    :param level: The level of the application loggers in the parent process
+    """
+    logging.getLogger('src').setLevel(level)
+    if logging_queue is None:
+        return
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(logging_queue))
+    root_logger.setLevel(root_level)
+
+
 def dataset_comprehension(dataset: dataset_type) -> str:
     """
     Unrolls a dataset for easily comprehensible log entries.
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import math
+import os
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+# The time a chunk should take a worker. Shorter chunks balance the workers better, longer chunks cost less overhead.
+TARGET_CHUNK_SECONDS = 0.05
+
+# The size of the first chunks, before the throughput of the workers is known
+INITIAL_CHUNK_SIZE = 16
+
+# The number of chunks handed out per worker at the same time, so that a worker which finishes a chunk finds the
+# next one already queued instead of waiting for the scheduler
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+def run_timed(function: typing.Callable, *args) -> typing.Tuple[typing.Tuple[int, int], float, float, typing.Any]:
+    """
+    This function gets executed inside the workers. Calls a function and measures its time.
+    :param function: The function
+    :param args: The arguments of the function
+    :return: A tuple with the process and thread id of the worker, the start and end time of the call (time.perf_counter) and the result of the function
+    """
+    start_time = time.perf_counter()
+    result = function(*args)
+    return (os.getpid(), threading.get_ident()), start_time, time.perf_counter(), result
+
+
+class ChunkSizer:
+    """
+    The ChunkSizer calculates the size of the next chunk from the measured throughput of the workers. The chunks take about target_chunk_seconds, but never more than a share of the remaining items, so the last chunks get smaller and the workers finish at nearly the same time (guided self-scheduling).
+    """
+
+    def __init__(self, number_of_workers: int, target_chunk_seconds: float = TARGET_CHUNK_SECONDS,
+                 initial_chunk_size: int = INITIAL_CHUNK_SIZE, min_chunk_size: int = 1):
+        """
+        Constructs a new ChunkSizer object.
+        :param number_of_workers: The number of workers
+        :param target_chunk_seconds: The time a chunk should take
+        :param initial_chunk_size: The size of the chunks until a throughput was measured
+        :param min_chunk_size: The minimum size of a chunk
+        """
+        self.number_of_workers = number_of_workers
+        self.target_chunk_seconds = target_chunk_seconds
+        self.initial_chunk_size = initial_chunk_size
+        self.min_chunk_size = min_chunk_size
+        # The exponential moving average of the items per second of a worker
+        self.throughput: float = None
+
+    def record(self, number_of_items: int, seconds: float):
+        """
+        Records the time a worker took for a chunk.
+        :param number_of_items: The size of the chunk
+        :param seconds: The time
+        """
+        if number_of_items <= 0:
+            return
+        throughput = number_of_items / max(seconds, 0.000001)
+        if self.throughput is None:
+            self.throughput = throughput
+        else:
+            self.throughput = 0.5 * self.throughput + 0.5 * throughput
+
+    def get_chunk_size(self, remaining_items: int) -> int:
+        """
+        Calculates the size of the next chunk.
+        :param remaining_items: The number of items which were not handed out yet
+        :return: The size of the chunk
+        """
+        if self.throughput is None:
+            size = self.initial_chunk_size
+        else:
+            size = int(self.throughput * self.target_chunk_seconds)
+        size = min(size, math.ceil(remaining_items / (CHUNKS_IN_FLIGHT_PER_WORKER * self.number_of_workers)))
+        return max(self.min_chunk_size, min(size, remaining_items))
+
+
+class UtilizationReport:
+    """
+    The UtilizationReport describes how busy the workers were during a run of the DynamicScheduler. It compares the idle time of the workers with an estimate of the idle time a static split into one range per worker would have caused. Both idle times of this comparison are calculated from the measured times of the chunks only, the dispatch, pickling and communication overhead of the run is only part of idle_time.
+    """
+
+    def __init__(self, number_of_workers: int, number_of_items: int, wall_time: float,
+                 busy_times: typing.Dict[typing.Hashable, float], chunks: typing.List[typing.Tuple[int, int, float]]):
+        """
+        Constructs a new UtilizationReport object.
+        :param number_of_workers: The number of workers
+        :param number_of_items: The number of items
+        :param wall_time: The time of the whole run
+        :param busy_times: The time every worker (by process and thread id) spent on chunks
+        :param chunks: The start (inclusive), end (exclusive) and time of every chunk
+        """
+        self.number_of_workers = number_of_workers
+        self.number_of_items = number_of_items
+        self.wall_time = wall_time
+        self.busy_times = busy_times
+        self.chunks = sorted(chunks)
+
+    @property
+    def busy_time(self) -> float:
+        """
+        The time all the workers together spent on chunks.
+        """
+        return sum(self.busy_times.values())
+
+    @property
+    def idle_time(self) -> float:
+        """
+        The time the workers were waiting during the run, including the time the chunks were dispatched and their arguments and results were sent.
+        """
+        return max(0.0, self.number_of_workers * self.wall_time - self.busy_time)
+
+    @property
+    def utilization(self) -> float:
+        """
+        The share of the time of the run the workers were busy.
+        """
+        if self.wall_time <= 0.0:
+            return 1.0
+        return min(1.0, self.busy_time / (self.number_of_workers * self.wall_time))
+
+    def get_static_busy_times(self) -> typing.List[float]:
+        """
+        Estimates how long every worker would have been busy with a static split of the items into one range per worker. The time of a chunk is assumed to be spread evenly over its items.
+        :return: The estimated time of every range
+        """
+        length = max(1, math.ceil(self.number_of_items / self.number_of_workers))
+        static_busy_times = [0.0] * self.number_of_workers
+        for start, end, seconds in self.chunks:
+            seconds_per_item = seconds / max(1, end - start)
+            for worker in range(start // length, (end - 1) // length + 1):
+                overlap = min(end, (worker + 1) * length) - max(start, worker * length)
+                static_busy_times[worker] += overlap * seconds_per_item
+        return static_busy_times
+
+    @property
+    def static_idle_time(self) -> float:
+        """
+        The estimated time the workers would have been waiting for the slowest range of a static split.
+        """
+        static_busy_times = self.get_static_busy_times()
+        return self.number_of_workers * max(static_busy_times, default=0.0) - sum(static_busy_times)
+
+    @property
+    def compute_idle_time(self) -> float:
+        """
+        The time the workers were waiting for the busiest worker, calculated from the times of the chunks only, just like static_idle_time.
+        """
+        busy_times = self.busy_times.values()
+        return self.number_of_workers * max(busy_times, default=0.0) - sum(busy_times)
+
+    @property
+    def removed_idle_time(self) -> float:
+        """
+        The estimated idle time of a static split which the dynamic scheduling avoided. Since the estimate of the static split does not include any overhead, it is compared with compute_idle_time instead of idle_time. The estimate is never negative.
+        """
+        return max(0.0, self.static_idle_time - self.compute_idle_time)
+
+    def __str__(self):
+        return 'UtilizationReport({} workers, {} items in {} chunks, {:.3f}s, utilization {:.1%}, idle {:.3f}s, static idle {:.3f}s, estimated removed idle {:.3f}s)'.format(
+            self.number_of_workers, self.number_of_items, len(self.chunks), self.wall_time, self.utilization,
+            self.idle_time, self.static_idle_time, self.removed_idle_time)
+
+
+class DynamicScheduler:
+    """
+    The DynamicScheduler distributes a range of items among the workers of an executor in small chunks which are handed out on demand. Only a few chunks per worker are queued at a time, so a worker which finishes early takes over the remaining items instead of idling while another worker still works on a large static range. The chunk sizes adapt to the measured throughput (see ChunkSizer).
+    """
+
+    def __init__(self, executor: concurrent.futures.Executor, number_of_workers: int,
+                 target_chunk_seconds: float = TARGET_CHUNK_SECONDS, initial_chunk_size: int = INITIAL_CHUNK_SIZE,
+                 min_chunk_size: int = 1):
+        """
+        Constructs a new DynamicScheduler object.
+        :param executor: The executor of the workers
+        :param number_of_workers: The number of workers of the executor
+        :param target_chunk_seconds: The time a chunk should take
+        :param initial_chunk_size: The size of the chunks until a throughput was measured
+        :param min_chunk_size: The minimum size of a chunk
+        """
+        self.executor = executor
+        self.number_of_workers = number_of_workers
+        self.target_chunk_seconds = target_chunk_seconds
+        self.initial_chunk_size = initial_chunk_size
+        self.min_chunk_size = min_chunk_size
+        # The UtilizationReport of the last run
+        self.report: UtilizationReport = None
+
+    def run(self, function: typing.Callable, args: typing.Tuple, number_of_items: int) -> typing.List[typing.Any]:
+        """
+        Calls a function for all the items in chunks. The function gets executed inside the workers with the arguments, followed by the start (inclusive) and the end (exclusive) of a chunk.
+        :param function: The module-level function
+        :param args: The arguments of the function before the start and end of the chunk
+        :param number_of_items: The number of items
+        :return: The results of the function for the chunks, in the order of the items
+        """
+        chunk_sizer = ChunkSizer(self.number_of_workers, self.target_chunk_seconds, self.initial_chunk_size,
+                                 self.min_chunk_size)
+        results: typing.Dict[int, typing.Any] = dict()
+        busy_times: typing.Dict[int, float] = dict()
+        chunks: typing.List[typing.Tuple[int, int, float]] = []
+        pending: typing.Dict[concurrent.futures.Future, typing.Tuple[int, int]] = dict()
+        next_item = 0
+        start_time = time.perf_counter()
+        while next_item < number_of_items or len(pending) > 0:
+            while next_item < number_of_items and \
+                    len(pending) < CHUNKS_IN_FLIGHT_PER_WORKER * self.number_of_workers:
+                end = next_item + chunk_sizer.get_chunk_size(number_of_items - next_item)
+                future = self.executor.submit(run_timed, function, *args, next_item, end)
+                pending[future] = (next_item, end)
+                next_item = end
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                start, end = pending.pop(future)
+                worker, chunk_start_time, chunk_end_time, result = future.result()
+                seconds = chunk_end_time - chunk_start_time
+                chunk_sizer.record(end - start, seconds)
+                busy_times[worker] = busy_times.get(worker, 0.0) + seconds
+                chunks.append((start, end, seconds))
+                results[start] = result
+        self.report = UtilizationReport(self.number_of_workers, number_of_items, time.perf_counter() - start_time,
+                                        busy_times, chunks)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('scheduled %s', self.report)
+        return [results[start] for start in sorted(results)]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import typing
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SharedArray:
+    """
+    The SharedArray keeps a NumPy array in a block of shared memory (multiprocessing.shared_memory). The process which creates it owns the block and frees it when the SharedArray is closed, garbage collected or the process exits. Pickling a SharedArray only transfers the name, shape and data type of the block. Unpickling it in a worker process attaches to the same memory, read-only unless the SharedArray was created writeable, so any number of workers use a single copy of the data. Only child processes should attach, since they share the resource tracker of the owner.
+    """
+
+    __slots__ = ('array', 'name', 'is_owner', '_shared_memory', '_finalizer', '__weakref__')
+
+    def __init__(self, array: np.ndarray, writeable: bool = False):
+        """
+        Constructs a new SharedArray object by copying an array into a new block of shared memory.
+        :param array: The array. Arrays of Python objects can not be shared.
+        :param writeable: If the array can be changed by all the processes, e.g. to share a bound between workers. The writes are not synchronized.
+        """
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            msg = 'Arrays of Python objects can not be kept in shared memory, got an array of {}'.format(array.dtype)
+            logger.error(msg)
+            raise ValueError(msg)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self._set_block(block, array.shape, array.dtype, True, writeable)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('created shared memory block %s with %s bytes', self.name, array.nbytes)
+
+    @classmethod
+    def attach(cls, name: str, shape: typing.Tuple[int, ...], dtype: str, writeable: bool = False) -> SharedArray:
+        """
+        Attaches to an existing block of shared memory.
+        :param name: The name of the block
+        :param shape: The shape of the array
+        :param dtype: The data type of the array
+        :param writeable: If the array can be changed
+        :return: The SharedArray
+        """
+        shared_array = cls.__new__(cls)
+        shared_array._set_block(shared_memory.SharedMemory(name=name), shape, np.dtype(dtype), False, writeable)
+        return shared_array
+
+    def _set_block(self, block: shared_memory.SharedMemory, shape: typing.Tuple[int, ...], dtype: np.dtype,
+                   is_owner: bool, writeable: bool):
+        self._shared_memory = block
+        self.name = block.name
+        self.is_owner = is_owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        self.array.flags.writeable = writeable
+        self._finalizer = weakref.finalize(self, release_shared_memory, block, is_owner)
+
+    def close(self):
+        """
+        Detaches from the shared memory. The owner also frees the block, the processes which are still attached keep their mapping. The array must not be used afterwards.
+        """
+        self.array = None
+        self._finalizer()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes of the array.
+        """
+        return self.array.nbytes
+
+    def __reduce__(self):
+        return SharedArray.attach, (self.name, self.array.shape, self.array.dtype.str, self.array.flags.writeable)
+
+    def __str__(self):
+        return 'SharedArray({}, shape {}, {})'.format(self.name, self.array.shape, self.array.dtype)
+
+
+def release_shared_memory(block: shared_memory.SharedMemory, is_owner: bool) -> None:
+    """
+    Detaches from a block of shared memory and frees it if the process owns it.
+    :param block: The block
+    :param is_owner: If the process created the block
+    """
+    try:
+        block.close()
+    except BufferError:
+        # Views of the block are still in use, the mapping is released together with them
+        pass
+    if is_owner:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
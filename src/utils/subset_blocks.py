@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import math
+import typing
+
+import numpy as np
+
+from src.costfunctions.costfunction import CostFunction
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.utils.worker_pool import DATASET_METHODS, QUERY_METHODS, solve_subset
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of subsets of a block. Larger blocks spend less time in Python and more time in NumPy, which
+# releases the GIL, but need more memory: a block of subsets of size s holds BLOCK_SIZE * s * s pair distances.
+BLOCK_SIZE = 4096
+
+# The distance metrics which can be calculated for whole arrays of coordinates
+VECTORIZED_DISTANCE_METRICS = ('euclidean_distance', 'geographic_distance')
+
+# The last list of subsets, its length and its SubsetBlocks, which are reused by the calculations on the same subsets.
+# The list is kept so that its id can not be reused by another list while the blocks are cached, like the subsets of
+# the WorkerPool.
+_subset_blocks: typing.Tuple[typing.Sequence[typing.Tuple], int, SubsetBlocks] = None
+
+
+def get_distances(x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray,
+                  distance_metric_name: str) -> np.ndarray:
+    """
+    Calculates the distances between arrays of coordinates, element-wise with NumPy broadcasting, with the same formula as the distance metric.
+    :param x1: The x values of the first coordinates
+    :param y1: The y values of the first coordinates
+    :param x2: The x values of the second coordinates
+    :param y2: The y values of the second coordinates
+    :param distance_metric_name: The name of the distance metric, see VECTORIZED_DISTANCE_METRICS
+    :return: The distances
+    """
+    if distance_metric_name == 'euclidean_distance':
+        return np.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+    elif distance_metric_name == 'geographic_distance':
+        latitude1 = np.radians(x1)
+        latitude2 = np.radians(x2)
+        a = np.sin((latitude2 - latitude1) / 2) ** 2 + \
+            np.cos(latitude1) * np.cos(latitude2) * np.sin((np.radians(y2) - np.radians(y1)) / 2) ** 2
+        return 6373.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) * 1000
+    else:
+        msg = 'The distance metric {} can not be calculated for arrays, supported are {}'.format(
+            distance_metric_name, VECTORIZED_DISTANCE_METRICS)
+        logger.error(msg)
+        raise ValueError(msg)
+
+
+class SubsetBlocks:
+    """
+    The SubsetBlocks arrange a list of subsets for vectorized calculations. The distinct POIs of the subsets are kept in coordinate arrays and every block holds up to BLOCK_SIZE subsets of the same size as a matrix of POI indices, together with the positions of these subsets in the list.
+    """
+
+    def __init__(self, subsets: typing.Sequence[typing.Tuple], block_size: int = BLOCK_SIZE):
+        """
+        Constructs a new SubsetBlocks object.
+        :param subsets: The subsets
+        :param block_size: The maximum number of subsets of a block
+        """
+        self.number_of_subsets = len(subsets)
+        poi_indices: typing.Dict[KeywordCoordinate, int] = dict()
+        self.pois: typing.List[KeywordCoordinate] = []
+        rows_by_size: typing.Dict[int, typing.Tuple[typing.List[int], typing.List[typing.List[int]]]] = dict()
+        for position, subset in enumerate(subsets):
+            row = []
+            for kwc in subset:
+                index = poi_indices.get(kwc)
+                if index is None:
+                    index = len(self.pois)
+                    poi_indices[kwc] = index
+                    self.pois.append(kwc)
+                row.append(index)
+            positions, rows = rows_by_size.setdefault(len(row), ([], []))
+            positions.append(position)
+            rows.append(row)
+        self.x = np.array([kwc.coordinates.x for kwc in self.pois], dtype=np.float64)
+        self.y = np.array([kwc.coordinates.y for kwc in self.pois], dtype=np.float64)
+        # Tuples of the positions of the subsets in the list and the matrix of their POI indices
+        self.blocks: typing.List[typing.Tuple[np.ndarray, np.ndarray]] = []
+        for size in sorted(rows_by_size):
+            positions, rows = rows_by_size[size]
+            for start in range(0, len(rows), block_size):
+                self.blocks.append((np.array(positions[start:start + block_size], dtype=np.int64),
+                                    np.array(rows[start:start + block_size], dtype=np.int64).reshape(-1, size)))
+
+    def get_dataset_distances(self, indices: np.ndarray, distance_metric_name: str) -> typing.Tuple[
+            np.ndarray, np.ndarray]:
+        """
+        Calculates the maximum and the minimum inter-dataset distance of the subsets of a block. Like the cost functions, subsets with a single POI have a distance of 0.
+        :param indices: The matrix of POI indices of the block
+        :param distance_metric_name: The name of the distance metric
+        :return: A tuple with the maximum and the minimum distances
+        """
+        size = indices.shape[1]
+        if size <= 1:
+            zeros = np.zeros(len(indices))
+            return zeros, zeros.copy()
+        x = self.x[indices]
+        y = self.y[indices]
+        first, second = np.triu_indices(size, 1)
+        distances = get_distances(x[:, first], y[:, first], x[:, second], y[:, second], distance_metric_name)
+        # The cost functions start the maximum at 0 and the minimum at 9999999.9
+        return np.maximum(distances.max(axis=1), 0.0), np.minimum(distances.min(axis=1), 9999999.9)
+
+    def get_query_distances(self, query: KeywordCoordinate, distance_metric_name: str) -> np.ndarray:
+        """
+        Calculates the query-dataset distances of the POIs.
+        :param query: The query
+        :param distance_metric_name: The name of the distance metric
+        :return: The distance of every POI
+        """
+        return get_distances(np.float64(query.coordinates.x), np.float64(query.coordinates.y), self.x, self.y,
+                             distance_metric_name)
+
+    def __str__(self):
+        return 'SubsetBlocks({} subsets, {} POIs, {} blocks)'.format(self.number_of_subsets, len(self.pois),
+                                                                    len(self.blocks))
+
+
+def get_subset_blocks(subsets: typing.Sequence[typing.Tuple]) -> SubsetBlocks:
+    """
+    Returns the SubsetBlocks of a list of subsets. The blocks of the last list are reused as long as the same list object with the same length is passed.
+    :param subsets: The subsets
+    :return: The SubsetBlocks
+    """
+    global _subset_blocks
+    if _subset_blocks is None or _subset_blocks[0] is not subsets or _subset_blocks[1] != len(subsets):
+        _subset_blocks = (subsets, len(subsets), SubsetBlocks(subsets))
+    return _subset_blocks[2]
+
+
+def is_vectorized(cost_function: CostFunction) -> bool:
+    """
+    Checks if the values of a cost function can be calculated for blocks of subsets. This requires a distance metric of VECTORIZED_DISTANCE_METRICS and no precalculated values, which are looked up per subset.
+    :param cost_function: The cost function
+    :return: True if the blocks can be calculated with NumPy
+    """
+    return cost_function.distance_metric.__name__ in VECTORIZED_DISTANCE_METRICS and \
+        cost_function.precalculated_query_dataset_dict is None and \
+        cost_function.precalculated_inter_dataset_dict is None and \
+        cost_function.precalculated_keyword_similarity_dict is None
+
+
+def calculate_block(method_name: str, cost_function: CostFunction, subset_blocks: SubsetBlocks,
+                    indices: np.ndarray, query_distances: typing.Optional[np.ndarray],
+                    keyword_distances: typing.Optional[np.ndarray]) -> np.ndarray:
+    """
+    Calculates a value for every subset of a block with NumPy operations on the whole block.
+    :param method_name: The name of the method of the cost function (see DATASET_METHODS and QUERY_METHODS) or 'solve' for the cost of the subsets
+    :param cost_function: The cost function
+    :param subset_blocks: The SubsetBlocks
+    :param indices: The matrix of POI indices of the block
+    :param query_distances: The query-dataset distance of every POI, if the method needs the query
+    :param keyword_distances: The keyword distance of every POI, if the method needs the keywords
+    :return: The values
+    """
+    distance_metric_name = cost_function.distance_metric.__name__
+    if method_name == 'get_maximum_for_dataset':
+        return subset_blocks.get_dataset_distances(indices, distance_metric_name)[0]
+    elif method_name == 'get_minimum_for_dataset':
+        return subset_blocks.get_dataset_distances(indices, distance_metric_name)[1]
+    elif method_name == 'get_maximum_for_query':
+        return np.maximum(query_distances[indices].max(axis=1), 0.0)
+    elif method_name == 'get_minimum_for_query':
+        return np.minimum(query_distances[indices].min(axis=1), 99999999.0)
+    elif method_name == 'get_maximum_keyword_distance':
+        return np.maximum(keyword_distances[indices].max(axis=1), 0.0)
+    block_query_distances = query_distances[indices]
+    return cost_function.get_costs_from_aggregates(
+        np.maximum(block_query_distances.max(axis=1), 0.0), block_query_distances.min(axis=1),
+        cost_function.get_query_distance_powers(block_query_distances).sum(axis=1), subset_blocks.get_dataset_distances(indices, distance_metric_name)[0],
+        np.maximum(keyword_distances[indices].max(axis=1), 0.0))
+
+
+def calculate_in_threads(method_name: str, cost_function: CostFunction, subsets: typing.Sequence[typing.Tuple],
+                         query: KeywordCoordinate = None, max_workers: int = 1,
+                         denormalization: typing.Tuple[float, float, float, float] = None) -> typing.List[float]:
+    """
+    Calculates a value for every subset on a thread pool. The subsets are arranged in SubsetBlocks and every block is calculated with NumPy operations by one of the threads. The threads share the arrays of the blocks, nothing is copied or pickled, and NumPy releases the GIL during the operations on the arrays. Cost functions which can not be vectorized (see is_vectorized) are calculated subset by subset on the threads, which gives the same results without the speed-up.
+    :param method_name: The name of the method of the cost function (see DATASET_METHODS and QUERY_METHODS) or 'solve' for the cost of the subsets
+    :param cost_function: The cost function
+    :param subsets: The (normalized) subsets
+    :param query: The (normalized) query. Not needed for the methods in DATASET_METHODS.
+    :param max_workers: The number of threads
+    :param denormalization: The maximum x, minimum x, maximum y and minimum y to denormalize the subsets for the matching of precalculated values, or None
+    :return: The values in the same order as the subsets
+    """
+    if method_name not in DATASET_METHODS + QUERY_METHODS + ('solve',):
+        msg = 'The threads can not calculate {}'.format(method_name)
+        logger.error(msg)
+        raise ValueError(msg)
+    if len(subsets) == 0:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if not is_vectorized(cost_function):
+            if method_name == 'solve':
+                def calculate_range(start: int, end: int) -> typing.List[float]:
+                    return [solve_subset(cost_function, query, subsets[index], denormalization)
+                            for index in range(start, end)]
+            else:
+                method = getattr(cost_function, method_name)
+
+                def calculate_range(start: int, end: int) -> typing.List[float]:
+                    if method_name in DATASET_METHODS:
+                        return [method(subsets[index]) for index in range(start, end)]
+                    return [method(query, subsets[index]) for index in range(start, end)]
+            length = math.ceil(len(subsets) / max_workers)
+            futures = [executor.submit(calculate_range, start, min(start + length, len(subsets)))
+                       for start in range(0, len(subsets), length)]
+            return [value for future in futures for value in future.result()]
+        subset_blocks = get_subset_blocks(subsets)
+        query_distances = None
+        keyword_distances = None
+        if method_name != 'get_maximum_keyword_distance' and method_name not in DATASET_METHODS:
+            query_distances = subset_blocks.get_query_distances(query, cost_function.distance_metric.__name__)
+        if method_name in ('get_maximum_keyword_distance', 'solve'):
+            # The keyword distances depend on the similarity metric and are calculated once per POI
+            keyword_distances = np.array([cost_function.get_keyword_distance(query, kwc)
+                                          for kwc in subset_blocks.pois], dtype=np.float64)
+        futures = [(positions, executor.submit(calculate_block, method_name, cost_function, subset_blocks, indices,
+                                               query_distances, keyword_distances))
+                   for positions, indices in subset_blocks.blocks]
+        values = np.empty(len(subsets), dtype=np.float64)
+        for positions, future in futures:
+            values[positions] = future.result()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('calculated %s for %s with %s threads', method_name, subset_blocks, max_workers)
+    return values.tolist()
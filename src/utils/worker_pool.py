@@ -0,0 +1,343 @@
+import atexit
+import concurrent.futures
+import copy
+import heapq
+import logging
+import math
+import typing
+
+from src.costfunctions.costfunction import CostFunction
+from src.metrics.distance_metrics import denormalize_result_data
+from src.metrics.embedding_backends import SharedEmbeddingBackend, Word2VecEmbeddingBackend
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.utils.combinatorics import Combinations
+from src.utils.logging_utils import get_worker_logging_arguments, initialize_worker_logging
+from src.utils.scheduler import DynamicScheduler, UtilizationReport
+
+logger = logging.getLogger(__name__)
+
+# The number of index ranges per worker if the workload should be balanced between the workers
+CHUNKS_PER_WORKER = 4
+
+# The methods of the cost function which can be calculated by the workers for a range of subsets
+DATASET_METHODS = ('get_maximum_for_dataset', 'get_minimum_for_dataset')
+QUERY_METHODS = ('get_maximum_for_query', 'get_minimum_for_query', 'get_maximum_keyword_distance')
+
+# The state installed in a worker process by initialize_worker: the cost function, the subsets and the
+# denormalization parameters of the subsets
+_worker_state: typing.Tuple[CostFunction, typing.Sequence[typing.Tuple], typing.Optional[typing.Tuple]] = None
+
+# The worker pool of the parent process
+_worker_pool: 'WorkerPool' = None
+
+
+class WorkerPool:
+    """
+    The WorkerPool is a process pool whose workers are preloaded with a cost function and a list of subsets. Both are sent to every worker once, when the worker is started, so the tasks only carry the query and a range of subset indices and only the costs are sent back. The pool stays alive as long as it is used with the same payload (see get_worker_pool). With shared memory, the word2vec model of the cost function and the tables of the subsets are kept in shared memory, which the workers attach to instead of holding a copy each.
+    """
+
+    def __init__(self, max_workers: int, cost_function: CostFunction, subsets: typing.Sequence[typing.Tuple],
+                 denormalization: typing.Tuple[float, float, float, float] = None, shared_memory: bool = False):
+        """
+        Constructs a new WorkerPool object and starts its workers.
+        :param max_workers: The number of worker processes
+        :param cost_function: The cost function, including its model and precalculated values
+        :param subsets: The (normalized) subsets
+        :param denormalization: The maximum x, minimum x, maximum y and minimum y to denormalize the subsets for the matching of precalculated values, or None if the subsets are not normalized
+        :param shared_memory: If the word2vec model and the tables of the subsets should be sent to the workers in shared memory (see get_shared_payload)
+        """
+        self.max_workers = max_workers
+        self.cost_function = cost_function
+        self.subsets = subsets
+        self.denormalization = denormalization
+        self.shared_memory = shared_memory
+        self.payload_key = get_payload_key(max_workers, cost_function, subsets, denormalization, shared_memory)
+        self.number_of_tasks = 0
+        if shared_memory:
+            # The shared copies have to stay alive as long as the workers may attach to them
+            self.shared_payload = get_shared_payload(cost_function, subsets)
+        else:
+            self.shared_payload = (cost_function, subsets)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, initializer=initialize_worker,
+            initargs=(get_worker_logging_arguments(),) + self.shared_payload + (denormalization,))
+        self.scheduler = DynamicScheduler(self.executor, max_workers)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('started worker pool with %s workers preloaded with %s subsets', max_workers, len(subsets))
+
+    def calculate(self, method_name: str, query: KeywordCoordinate = None, balance: bool = True,
+                  dynamic: bool = False) -> typing.List[float]:
+        """
+        Calculates a value for every subset of the pool. The subsets are split into index ranges, which are calculated by the workers.
+        :param method_name: The name of the method of the cost function (see DATASET_METHODS and QUERY_METHODS) or 'solve' for the cost of the subsets
+        :param query: The (normalized) query. Not needed for the methods in DATASET_METHODS.
+        :param balance: If the subsets should be split into CHUNKS_PER_WORKER ranges per worker, which distributes the workload better among the workers, instead of a single range per worker
+        :param dynamic: If the ranges should be handed out on demand by the DynamicScheduler, with sizes adapted to the measured throughput, instead of being split up front. This replaces balance.
+        :return: The values in the same order as the subsets
+        """
+        results: typing.List[float] = []
+        for range_results in self.run(calculate_range, (method_name, query), balance, dynamic):
+            results.extend(range_results)
+        return results
+
+    def calculate_best(self, query: KeywordCoordinate, result_length: int, balance: bool = True,
+                       dynamic: bool = False) -> typing.List[typing.Tuple[float, typing.Tuple]]:
+        """
+        Calculates the subsets with the lowest costs. Every worker only sends back the result_length best costs of its range of subsets together with their indices, so the results which are sent back do not grow with the number of subsets. With Combinations as subsets, the workers also generate the subsets of their ranges themselves.
+        :param query: The (normalized) query
+        :param result_length: The number of subsets to return
+        :param balance: If the subsets should be split into CHUNKS_PER_WORKER ranges per worker instead of a single range per worker
+        :param dynamic: If the ranges should be handed out on demand by the DynamicScheduler instead of being split up front
+        :return: A sorted list with tuples. Every tuple contains a cost and the corresponding subset.
+        """
+        if result_length <= 0:
+            return []
+        best_costs = heapq.nsmallest(result_length, (
+            cost_and_index for range_results in self.run(calculate_best_range, (query, result_length), balance,
+                                                          dynamic)
+            for cost_and_index in range_results))
+        return [(cost, self.subsets[index]) for cost, index in best_costs]
+
+    def submit(self, function: typing.Callable, *args) -> concurrent.futures.Future:
+        """
+        Submits a single task to the workers. The module-level worker function can use the payload of the pool with get_worker_payload.
+        :param function: The module-level worker function
+        :param args: The arguments
+        :return: The Future of the task
+        """
+        self.number_of_tasks += 1
+        return self.executor.submit(function, *args)
+
+    def run(self, function: typing.Callable, args: typing.Tuple, balance: bool,
+            dynamic: bool) -> typing.List[typing.Any]:
+        """
+        Calls a worker function for all the index ranges of the subsets.
+        :param function: The module-level worker function, which is called with the arguments followed by the start and the end of a range
+        :param args: The arguments
+        :param balance: If the subsets should be split into CHUNKS_PER_WORKER ranges per worker instead of a single range per worker
+        :param dynamic: If the ranges should be handed out on demand by the DynamicScheduler
+        :return: The results of the ranges in the order of the subsets
+        """
+        if dynamic:
+            results = self.scheduler.run(function, args, len(self.subsets))
+            self.number_of_tasks += len(self.scheduler.report.chunks)
+            return results
+        number_of_chunks = self.max_workers * CHUNKS_PER_WORKER if balance else self.max_workers
+        futures = []
+        for start, end in get_index_ranges(len(self.subsets), number_of_chunks):
+            futures.append(self.executor.submit(function, *args, start, end))
+        self.number_of_tasks += len(futures)
+        return [future.result() for future in futures]
+
+    @property
+    def utilization_report(self) -> UtilizationReport:
+        """
+        The UtilizationReport of the last dynamically scheduled calculation, or None.
+        """
+        return self.scheduler.report
+
+    def shutdown(self):
+        """
+        Stops the workers of the pool. The shared memory of the payload is freed once it is no longer referenced.
+        """
+        self.executor.shutdown()
+        self.shared_payload = None
+
+    def __str__(self):
+        return 'WorkerPool({} workers, {} subsets, {} tasks)'.format(self.max_workers, len(self.subsets),
+                                                                   self.number_of_tasks)
+
+
+def get_payload_key(max_workers: int, cost_function: CostFunction, subsets: typing.Sequence[typing.Tuple],
+                    denormalization: typing.Optional[typing.Tuple], shared_memory: bool = False) -> typing.Tuple:
+    """
+    Calculates the key which identifies the payload of a worker pool. The cost function and the subsets are compared by identity, together with the model and the precalculated dicts of the cost function, which may be replaced after the pool was started.
+    :param max_workers: The number of worker processes
+    :param cost_function: The cost function
+    :param subsets: The subsets
+    :param denormalization: The denormalization parameters
+    :param shared_memory: If the payload is sent in shared memory
+    :return: The key
+    """
+    return (max_workers, id(cost_function), id(cost_function.model),
+            id(cost_function.precalculated_query_dataset_dict), id(cost_function.precalculated_inter_dataset_dict),
+            id(cost_function.precalculated_keyword_similarity_dict), id(subsets), len(subsets), denormalization,
+            shared_memory)
+
+
+def get_shared_payload(cost_function: CostFunction, subsets: typing.Sequence[typing.Tuple]) -> typing.Tuple[
+        CostFunction, typing.Sequence[typing.Tuple]]:
+    """
+    Copies the payload of a worker pool into shared memory. A word2vec model, given as dictionary or Word2VecEmbeddingBackend, is replaced by a SharedEmbeddingBackend in a shallow copy of the cost function. The POIs of the subsets are replaced by views of shared copies of their tables (see PoiTable.share). The cost function and the subsets themselves are not changed.
+    :param cost_function: The cost function
+    :param subsets: The subsets
+    :return: A tuple with the cost function and the subsets to send to the workers
+    """
+    if isinstance(cost_function.model, (dict, Word2VecEmbeddingBackend)):
+        shared_cost_function = copy.copy(cost_function)
+        shared_cost_function.model = SharedEmbeddingBackend(cost_function.model)
+    else:
+        shared_cost_function = cost_function
+    shared_tables = dict()
+
+    def share(kwc: KeywordCoordinate) -> KeywordCoordinate:
+        shared_table = shared_tables.get(id(kwc.table))
+        if shared_table is None:
+            shared_table = kwc.table.share()
+            shared_tables[id(kwc.table)] = shared_table
+        return KeywordCoordinate.from_table(shared_table, kwc.row)
+
+    if isinstance(subsets, Combinations):
+        # Only the items are sent, the workers generate the combinations themselves
+        shared_subsets = Combinations([share(kwc) for kwc in subsets.items], subsets.max_size)
+    else:
+        shared_subsets = [tuple(share(kwc) for kwc in subset) for subset in subsets]
+    if logger.isEnabledFor(logging.INFO):
+        logger.info('copied the model %s and %s tables into shared memory', shared_cost_function.model,
+                    len(shared_tables))
+    return shared_cost_function, shared_subsets
+
+
+def get_worker_pool(max_workers: int, cost_function: CostFunction, subsets: typing.Sequence[typing.Tuple],
+                    denormalization: typing.Tuple[float, float, float, float] = None,
+                    shared_memory: bool = False) -> WorkerPool:
+    """
+    Returns the worker pool of the process for a payload. The pool is reused as long as it is requested with the same payload, otherwise it is replaced by a new pool. The pool is shut down on exit.
+    :param max_workers: The number of worker processes
+    :param cost_function: The cost function
+    :param subsets: The (normalized) subsets
+    :param denormalization: The maximum x, minimum x, maximum y and minimum y to denormalize the subsets, or None
+    :param shared_memory: If the word2vec model and the tables of the subsets should be sent to the workers in shared memory
+    :return: The WorkerPool
+    """
+    global _worker_pool
+    if _worker_pool is not None:
+        if _worker_pool.payload_key == get_payload_key(max_workers, cost_function, subsets, denormalization,
+                                                       shared_memory):
+            return _worker_pool
+        _worker_pool.shutdown()
+    else:
+        atexit.register(shutdown_worker_pool)
+    _worker_pool = WorkerPool(max_workers, cost_function, subsets, denormalization, shared_memory)
+    return _worker_pool
+
+
+def shutdown_worker_pool() -> None:
+    """
+    Stops the worker pool of the process, if there is one.
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        return
+    _worker_pool.shutdown()
+    _worker_pool = None
+
+
+def get_index_ranges(number_of_items: int, number_of_chunks: int) -> typing.List[typing.Tuple[int, int]]:
+    """
+    Splits the indices of a list into contiguous ranges of nearly equal length.
+    :param number_of_items: The length of the list
+    :param number_of_chunks: The maximum number of ranges
+    :return: A list with the start (inclusive) and the end (exclusive) of every range
+    """
+    if number_of_items <= 0:
+        return []
+    number_of_chunks = max(1, min(number_of_chunks, number_of_items))
+    length = math.ceil(number_of_items / number_of_chunks)
+    return [(start, min(start + length, number_of_items)) for start in range(0, number_of_items, length)]
+
+
+def initialize_worker(logging_arguments: typing.Tuple, cost_function: CostFunction,
+                      subsets: typing.Sequence[typing.Tuple], denormalization: typing.Optional[typing.Tuple]) -> None:
+    """
+    Initializer of the worker processes. Installs the payload of the pool in the worker.
+    :param logging_arguments: The arguments for initialize_worker_logging
+    :param cost_function: The cost function
+    :param subsets: The subsets
+    :param denormalization: The denormalization parameters
+    """
+    global _worker_state
+    initialize_worker_logging(*logging_arguments)
+    _worker_state = (cost_function, subsets, denormalization)
+
+
+def get_worker_payload() -> typing.Tuple[CostFunction, typing.Sequence[typing.Tuple], typing.Optional[typing.Tuple]]:
+    """
+    Returns the payload installed in a worker process by initialize_worker.
+    :return: A tuple with the cost function, the subsets and the denormalization parameters
+    """
+    return _worker_state
+
+
+def calculate_range(method_name: str, query: typing.Optional[KeywordCoordinate], start: int,
+                    end: int) -> typing.List[float]:
+    """
+    This function gets executed inside the worker processes. Calculates a value for the subsets of a range of indices.
+    :param method_name: The name of the method of the cost function or 'solve' for the cost of the subsets
+    :param query: The (normalized) query
+    :param start: The first index (inclusive)
+    :param end: The last index (exclusive)
+    :return: The values in the same order as the subsets
+    """
+    cost_function, subsets, denormalization = _worker_state
+    # Slicing Combinations generates the subsets of the range
+    if method_name in DATASET_METHODS:
+        method = getattr(cost_function, method_name)
+        return [method(subset) for subset in subsets[start:end]]
+    elif method_name in QUERY_METHODS:
+        method = getattr(cost_function, method_name)
+        return [method(query, subset) for subset in subsets[start:end]]
+    elif method_name == 'solve':
+        return [solve_subset(cost_function, query, subset, denormalization) for subset in subsets[start:end]]
+    else:
+        msg = 'The workers can not calculate {}'.format(method_name)
+        logger.error(msg)
+        raise ValueError(msg)
+
+
+def calculate_best_range(query: KeywordCoordinate, result_length: int, start: int,
+                         end: int) -> typing.List[typing.Tuple[float, int]]:
+    """
+    This function gets executed inside the worker processes. Calculates the subsets of a range of indices with the lowest costs.
+    :param query: The (normalized) query
+    :param result_length: The number of subsets to return
+    :param start: The first index (inclusive)
+    :param end: The last index (exclusive)
+    :return: A sorted list with the result_length lowest costs and the indices of their subsets
+    """
+    cost_function, subsets, denormalization = _worker_state
+    if isinstance(subsets, Combinations):
+        range_of_subsets = subsets.iterate(start, end)
+    else:
+        range_of_subsets = subsets[start:end]
+    if result_length <= 0:
+        return []
+    # Max-heap of the best costs of the range, the subsets which cost more than its worst one need no exact cost
+    best_subsets: typing.List[typing.Tuple[float, int]] = []
+    for index, subset in enumerate(range_of_subsets, start):
+        if len(best_subsets) < result_length:
+            cost = solve_subset(cost_function, query, subset, denormalization)
+            heapq.heappush(best_subsets, (-cost, -index))
+        else:
+            cost = solve_subset(cost_function, query, subset, denormalization, -best_subsets[0][0])
+            if cost < -best_subsets[0][0]:
+                heapq.heapreplace(best_subsets, (-cost, -index))
+    return sorted((-cost, -index) for cost, index in best_subsets)
+
+
+def solve_subset(cost_function: CostFunction, query: KeywordCoordinate, subset: typing.Tuple,
+                 denormalization: typing.Optional[typing.Tuple], bound: float = math.inf) -> float:
+    """
+    Calculates the cost of a subset in a worker process.
+    :param cost_function: The cost function
+    :param query: The (normalized) query
+    :param subset: The (normalized) subset
+    :param denormalization: The denormalization parameters for the matching of precalculated values, or None
+    :param bound: The cost above which the exact cost is not needed
+    :return: The cost
+    """
+    if denormalization is not None:
+        denormalized_subset = denormalize_result_data([(0.0, subset)], *denormalization)[0][1]
+    else:
+        denormalized_subset = subset
+    return cost_function.solve(query, subset, denormalized_subset, bound)
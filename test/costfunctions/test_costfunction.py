@@ -1,8 +1,9 @@
+import pickle
 from unittest import TestCase
 
-from src.costfunctions.costfunction import CostFunction
+from src.costfunctions.costfunction import CostFunction, keyword_id_distance
 from src.metrics.distance_metrics import euclidean_distance, manhattan_distance
-from src.metrics.similarity_metrics import separated_cosine_similarity
+from src.metrics.similarity_metrics import combined_cosine_similarity, separated_cosine_similarity
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.utils.typing_definitions import dataset_type
 
@@ -287,3 +288,33 @@ class TestCostFunction(TestCase):
         cf = CostFunction(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4)
         result = cf.get_maximum_keyword_distance(query, dataset)
         self.assertAlmostEqual(result, 0.0, delta=0.01)
+
+    def test_get_maximum_for_query_limit(self):
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        dataset: dataset_type = [KeywordCoordinate('kwc1', 1, 0, ['family']), KeywordCoordinate('kwc2', 3, 0, ['family']),
+                                 KeywordCoordinate('kwc3', 2, 0, ['family'])]
+        cf = CostFunction(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4)
+        self.assertAlmostEqual(cf.get_maximum_for_query(query, dataset), 3.0, delta=0.01)
+        self.assertEqual(cf.saved_evaluations, 0)
+        self.assertAlmostEqual(cf.get_maximum_for_query(query, dataset, 2.5), 3.0, delta=0.01)
+        self.assertEqual(cf.saved_evaluations, 1)
+
+    def test_get_maximum_for_dataset_limit(self):
+        dataset: dataset_type = [KeywordCoordinate('kwc1', 0, 0, ['family']), KeywordCoordinate('kwc2', 1, 0, ['family']),
+                                 KeywordCoordinate('kwc3', 5, 0, ['family']), KeywordCoordinate('kwc4', 2, 0, ['family'])]
+        cf = CostFunction(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4)
+        self.assertAlmostEqual(cf.get_maximum_for_dataset(dataset), 5.0, delta=0.01)
+        self.assertEqual(cf.saved_evaluations, 0)
+        self.assertAlmostEqual(cf.get_maximum_for_dataset(dataset, limit=4.0), 5.0, delta=0.01)
+        self.assertEqual(cf.saved_evaluations, 4)
+
+    def test_keyword_distance_kernel(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['food'])
+        cf = CostFunction(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        self.assertIs(cf.keyword_distance_kernel, keyword_id_distance)
+        cf = CostFunction(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4)
+        expected = separated_cosine_similarity(query.keywords, kwc1.keywords)
+        self.assertAlmostEqual(cf.get_keyword_distance(query, kwc1), expected, delta=0.000001)
+        self.assertAlmostEqual(pickle.loads(pickle.dumps(cf)).get_keyword_distance(query, kwc1), expected,
+                               delta=0.000001)
@@ -297,3 +297,33 @@ class TestType1(TestCase):
         data = [kwc1, kwc2]
         result = t1.solve(query, data)
         self.assertAlmostEqual(result, math.inf, delta=0.01)
+
+    def test_get_lower_bound(self):
+        t1 = Type1(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4, 0.5, 0.6, 0.7, False)
+        self.assertAlmostEqual(t1.get_lower_bound(0.5, 0.5), 0.35, delta=0.0001)
+        self.assertAlmostEqual(t1.get_keyword_lower_bound(0.5), 0.2, delta=0.0001)
+        self.assertEqual(t1.get_lower_bound(0.6, 0.5), math.inf)
+        self.assertEqual(t1.get_lower_bound(0.5, 0.8), math.inf)
+        t1.disable_thresholds = True
+        self.assertAlmostEqual(t1.get_lower_bound(0.6, 0.8), 0.5, delta=0.0001)
+
+    def test_solve_early_abort(self):
+        t1 = Type1(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4, 0.5, 0.6, 0.7, False)
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family']), KeywordCoordinate('kwc2', 0, 0, ['family']),
+                KeywordCoordinate('kwc3', 0, 0, ['family'])]
+        result = t1.solve(query, data)
+        self.assertEqual(result, math.inf)
+        self.assertEqual(t1.early_aborts, 1)
+        # Two query-dataset distances, three inter-dataset distances and three keyword distances
+        self.assertEqual(t1.saved_evaluations, 8)
+
+    def test_solve_bound(self):
+        t1 = Type1(euclidean_distance, separated_cosine_similarity, 1, 0, 0, disable_thresholds=True)
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        data = [KeywordCoordinate('kwc{}'.format(index), index, index, ['family']) for index in range(1, 6)]
+        self.assertAlmostEqual(t1.solve(query, data, bound=8.0), 7.07, delta=0.01)
+        self.assertEqual(t1.early_aborts, 0)
+        self.assertEqual(t1.solve(query, data, bound=5.0), math.inf)
+        self.assertEqual(t1.early_aborts, 1)
+        self.assertEqual(t1.saved_evaluations, 15)
@@ -201,3 +201,9 @@ class TestType2(TestCase):
         data = [kwc1, kwc2]
         result = t2.solve(query, data)
         self.assertAlmostEqual(result, math.inf, delta=0.01)
+
+    def test_get_lower_bound(self):
+        t2 = Type2(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4, 0.5, 0.6, 0.7, False)
+        self.assertAlmostEqual(t2.get_lower_bound(0.5, 0.25), 0.15, delta=0.0001)
+        self.assertAlmostEqual(t2.get_lower_bound(0.1, 0.5), 0.2, delta=0.0001)
+        self.assertEqual(t2.get_lower_bound(0.6, 0.5), math.inf)
@@ -201,3 +201,22 @@ class TestType3(TestCase):
         data = [kwc1, kwc2]
         result = t3.solve(query, data)
         self.assertAlmostEqual(result, math.inf, delta=0.01)
+
+    def test_get_lower_bound(self):
+        t3 = Type3(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4, 0.5, 0.6, 0.7, False)
+        self.assertAlmostEqual(t3.get_lower_bound(0.6, 0.5), 0.2, delta=0.0001)
+        self.assertEqual(t3.get_lower_bound(0.1, 0.8), math.inf)
+
+    def test_get_cost_from_aggregates(self):
+        t3 = Type3(euclidean_distance, separated_cosine_similarity, 0.3, 0.3, 0.4, 0.5, 0.6, 0.7, False)
+        self.assertAlmostEqual(t3.get_cost_from_aggregates(0.9, 0.2, 0.0, 0.5, 0.5), 0.41, delta=0.0001)
+        self.assertEqual(t3.get_cost_from_aggregates(0.9, 0.6, 0.0, 0.5, 0.5), math.inf)
+
+    def test_solve_bound(self):
+        t3 = Type3(euclidean_distance, separated_cosine_similarity, 1, 0, 0, disable_thresholds=True)
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        data = [KeywordCoordinate('kwc1', 3, 4, ['family']), KeywordCoordinate('kwc2', 6, 8, ['family'])]
+        self.assertAlmostEqual(t3.solve(query, data, bound=6.0), 5.0, delta=0.01)
+        self.assertEqual(t3.solve(query, data, bound=4.0), math.inf)
+        self.assertEqual(t3.early_aborts, 1)
+        self.assertEqual(t3.saved_evaluations, 3)
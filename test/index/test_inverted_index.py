@@ -0,0 +1,45 @@
+import pickle
+from unittest import TestCase
+
+import numpy as np
+
+from src.index.inverted_index import InvertedIndex
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
+from src.model.vocabulary import vocabulary
+
+
+class TestInvertedIndex(TestCase):
+    def setUp(self):
+        self.data = create_dataset(PoiTable(['kwc1', 'kwc2', 'kwc3', 'kwc4'], [1, 2, 3, 4], [1, 2, 3, 4],
+                                            [['family', 'food'], ['food', 'food'], ['outdoor'], ['food', 'sports']]))
+
+    def test_get_postings(self):
+        index = InvertedIndex(self.data)
+        np.testing.assert_array_equal(index.get_postings(vocabulary.get_id('food')), [0, 1, 3])
+        np.testing.assert_array_equal(index.get_postings(vocabulary.get_id('outdoor')), [2])
+        self.assertEqual(len(index.get_postings(vocabulary.get_id('inverted_index_unknown'))), 0)
+        self.assertEqual(index.number_of_pois, 4)
+        self.assertEqual(len(index.keyword_ids), 4)
+
+    def test_get_positions(self):
+        index = InvertedIndex(self.data)
+        positions = index.get_positions(vocabulary.get_ids(['sports', 'family', 'outdoor']))
+        np.testing.assert_array_equal(positions, [0, 2, 3])
+        self.assertEqual(len(index.get_positions([])), 0)
+        query = KeywordCoordinate('query', 0, 0, ['outdoor', 'family'])
+        np.testing.assert_array_equal(index.get_query_positions(query), [0, 2])
+
+    def test_mixed_tables(self):
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family']), KeywordCoordinate('kwc2', 2, 2, ['food', 'family'])]
+        index = InvertedIndex(data)
+        np.testing.assert_array_equal(index.get_postings(vocabulary.get_id('family')), [0, 1])
+        self.assertEqual(len(InvertedIndex([]).get_postings(vocabulary.get_id('family'))), 0)
+
+    def test_pickle(self):
+        index = InvertedIndex(self.data)
+        unpickled_index = pickle.loads(pickle.dumps(index))
+        for word in ['family', 'food', 'outdoor', 'sports']:
+            np.testing.assert_array_equal(unpickled_index.get_postings(vocabulary.get_id(word)),
+                                          index.get_postings(vocabulary.get_id(word)))
+        self.assertEqual(unpickled_index.number_of_pois, 4)
@@ -0,0 +1,102 @@
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from src.costfunctions.type1 import Type1
+from src.costfunctions.type4 import Type4
+from src.index.ir_tree import IRTree, sort_tile_recursive
+from src.metrics.distance_metrics import euclidean_distance, geographic_distance, manhattan_distance, normalize_data
+from src.metrics.similarity_metrics import combined_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+
+
+class TestIRTree(TestCase):
+    def setUp(self):
+        generator = random.Random(4)
+        possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports', 'museum', 'park']
+        self.data = [KeywordCoordinate('kwc{}'.format(index), generator.uniform(0, 10), generator.uniform(0, 10),
+                                       generator.sample(possible_keywords, generator.randint(1, 4)))
+                     for index in range(60)]
+        self.query = KeywordCoordinate('query', 5, 5, ['family', 'food', 'park'])
+
+    def get_nodes(self, node):
+        yield node
+        if not node.is_leaf:
+            for child in node.children:
+                yield from self.get_nodes(child)
+
+    def test_sort_tile_recursive(self):
+        x = np.array([0.0, 1.0, 2.0, 3.0, 0.0, 1.0, 2.0, 3.0])
+        y = np.array([0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0, 1.0])
+        groups = sort_tile_recursive(x, y, 2)
+        self.assertEqual(len(groups), 4)
+        self.assertListEqual(sorted(np.concatenate(groups).tolist()), list(range(8)))
+        for group in groups:
+            self.assertEqual(len(group), 2)
+            self.assertEqual(abs(x[group[0]] - x[group[1]]), 1.0)
+
+    def test_structure(self):
+        tree = IRTree(self.data, node_capacity=4)
+        self.assertEqual(tree.number_of_pois, 60)
+        self.assertGreater(tree.height, 2)
+        positions = []
+        for node in self.get_nodes(tree.root):
+            if node.is_leaf:
+                self.assertLessEqual(len(node.positions), 4)
+                positions.extend(node.positions.tolist())
+                pois = [self.data[position] for position in node.positions]
+            else:
+                self.assertLessEqual(len(node.children), 4)
+                pois = [self.data[position] for leaf in self.get_nodes(node) if leaf.is_leaf
+                        for position in leaf.positions]
+            for kwc in pois:
+                self.assertTrue(node.min_x <= kwc.coordinates.x <= node.max_x)
+                self.assertTrue(node.min_y <= kwc.coordinates.y <= node.max_y)
+                keyword_ids = kwc.table.get_keyword_id_set(kwc.row)
+                self.assertTrue(keyword_ids <= node.keyword_ids)
+                self.assertTrue(node.min_keyword_count <= len(keyword_ids) <= node.max_keyword_count)
+        self.assertListEqual(sorted(positions), list(range(60)))
+        self.assertIsNone(IRTree([]).root)
+        with self.assertRaises(ValueError):
+            IRTree(self.data, node_capacity=1)
+
+    def test_get_lower_bound(self):
+        query, data, max_x, min_x, max_y, min_y = normalize_data(self.query, self.data)
+        tree = IRTree(self.data, node_capacity=4)
+        for cf in [Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True),
+                   Type1(manhattan_distance, combined_cosine_similarity, 0.3, 0.3, 0.4),
+                   Type4(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, 2.0, 2.0)]:
+            for node in self.get_nodes(tree.root):
+                lower_bound = tree.get_lower_bound(node, query, cf, (max_x, min_x, max_y, min_y))
+                for leaf in self.get_nodes(node):
+                    if not leaf.is_leaf:
+                        continue
+                    for position in leaf.positions:
+                        self.assertLessEqual(lower_bound, cf.solve(query, [data[position]]) + 0.000001)
+
+    def test_get_leaves(self):
+        tree = IRTree(self.data, node_capacity=4)
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        leaves = list(tree.get_leaves_by_lower_bound(self.query, cf))
+        self.assertEqual(sum(len(leaf.positions) for _, leaf in leaves), 60)
+        lower_bounds = [lower_bound for lower_bound, _ in leaves]
+        self.assertListEqual(lower_bounds, sorted(lower_bounds))
+        bound = lower_bounds[len(lower_bounds) // 2]
+        self.assertSetEqual(set(tree.get_leaves(self.query, cf, bound)),
+                            set(leaf for lower_bound, leaf in leaves if lower_bound <= bound))
+        for leaf in tree.get_leaves(self.query, cf, bound):
+            self.assertLessEqual(tree.get_lower_bound(leaf, self.query, cf), bound)
+        self.assertEqual(len(list(tree.get_leaves(self.query, cf, -1.0))), 0)
+
+    def test_get_positions_within(self):
+        tree = IRTree(self.data, node_capacity=4)
+        for distance_metric, distance in [(euclidean_distance, 2.0), (manhattan_distance, 2.0),
+                                          (geographic_distance, 300000.0)]:
+            positions = tree.get_positions_within(self.query, distance, distance_metric)
+            self.assertListEqual(positions.tolist(), sorted(positions.tolist()))
+            for position, kwc in enumerate(self.data):
+                if distance_metric(self.query.coordinates, kwc.coordinates) <= distance:
+                    self.assertIn(position, positions)
+            self.assertLess(len(positions), 60)
+        self.assertEqual(len(IRTree([]).get_positions_within(self.query, 1.0, euclidean_distance)), 0)
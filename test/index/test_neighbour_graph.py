@@ -0,0 +1,53 @@
+import itertools
+import pickle
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from src.index.ir_tree import IRTree
+from src.index.neighbour_graph import NeighbourGraph
+from src.metrics.distance_metrics import euclidean_distance, geographic_distance
+from src.model.keyword_coordinate import KeywordCoordinate
+
+
+class TestNeighbourGraph(TestCase):
+    def setUp(self):
+        generator = random.Random(7)
+        self.data = [KeywordCoordinate('kwc{}'.format(index), 41.6 + generator.uniform(0, 0.05),
+                                       -0.9 + generator.uniform(0, 0.05), ['family'])
+                     for index in range(50)]
+
+    def test_neighbours(self):
+        for distance_metric, max_distance in [(geographic_distance, 1000.0), (euclidean_distance, 0.01)]:
+            graph = NeighbourGraph(self.data, max_distance, distance_metric, IRTree(self.data, node_capacity=4))
+            self.assertEqual(graph.number_of_pois, 50)
+            for position1, position2 in itertools.permutations(range(50), 2):
+                distance = distance_metric(self.data[position1].coordinates, self.data[position2].coordinates)
+                self.assertEqual(graph.are_neighbours(position1, position2), distance <= max_distance)
+            for position in range(50):
+                neighbours = graph.get_neighbours(position)
+                self.assertListEqual(neighbours.tolist(), sorted(neighbours.tolist()))
+                self.assertSetEqual(graph.get_neighbour_set(position), set(neighbours.tolist()))
+                for neighbour, distance in zip(neighbours.tolist(), graph.get_distances(position).tolist()):
+                    self.assertAlmostEqual(distance, distance_metric(self.data[position].coordinates,
+                                                                     self.data[neighbour].coordinates))
+            self.assertGreater(graph.number_of_edges, 0)
+            self.assertLess(graph.number_of_edges, 50 * 49 // 2)
+            self.assertEqual(len(graph.neighbours), 2 * graph.number_of_edges)
+
+    def test_empty(self):
+        graph = NeighbourGraph([], 1000.0)
+        self.assertEqual(graph.number_of_edges, 0)
+        self.assertListEqual(graph.offsets.tolist(), [0])
+        with self.assertRaises(ValueError):
+            NeighbourGraph(self.data, 1000.0, ir_tree=IRTree(self.data[:10]))
+
+    def test_pickle(self):
+        graph = NeighbourGraph(self.data, 1000.0)
+        unpickled_graph = pickle.loads(pickle.dumps(graph))
+        np.testing.assert_array_equal(unpickled_graph.offsets, graph.offsets)
+        np.testing.assert_array_equal(unpickled_graph.neighbours, graph.neighbours)
+        np.testing.assert_array_equal(unpickled_graph.distances, graph.distances)
+        self.assertEqual(unpickled_graph.max_distance, 1000.0)
+        self.assertSetEqual(unpickled_graph.get_neighbour_set(0), graph.get_neighbour_set(0))
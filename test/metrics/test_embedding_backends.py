@@ -0,0 +1,72 @@
+import pickle
+from unittest import TestCase
+
+import numpy as np
+
+import src.metrics.similarity_metrics as mt
+from src.costfunctions.type1 import Type1
+from src.metrics.distance_metrics import euclidean_distance
+from src.metrics.embedding_backends import SharedEmbeddingBackend, Word2VecEmbeddingBackend
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.solvers.solver import Solver
+
+
+class TestEmbeddingBackends(TestCase):
+    def get_model(self):
+        return {'family': np.array([1.0, 0.0]), 'food': np.array([0.0, 1.0]), 'outdoor': np.array([1.0, 1.0])}
+
+    def test_get_vector(self):
+        backend = Word2VecEmbeddingBackend(self.get_model())
+        self.assertListEqual(list(backend.get_vector('Family')), [1.0, 0.0])
+        self.assertListEqual(list(backend['food']), [0.0, 1.0])
+        self.assertTrue('outdoor' in backend)
+        self.assertFalse('indoor' in backend)
+        self.assertRaises(KeyError, backend.get_vector, 'indoor')
+
+    def test_shared_embedding_backend(self):
+        backend = SharedEmbeddingBackend(Word2VecEmbeddingBackend(self.get_model()))
+        self.assertListEqual(list(backend.get_vector('Outdoor')), [1.0, 1.0])
+        self.assertRaises(KeyError, backend.get_vector, 'indoor')
+        self.assertRaises(KeyError, backend.get_vector, 'zoo')
+        unpickled_backend = pickle.loads(pickle.dumps(backend))
+        self.assertListEqual(list(unpickled_backend['family']), [1.0, 0.0])
+        self.assertEqual(unpickled_backend.get_document_vector(['food']).tolist(), [0.0, 1.0])
+
+    def test_get_document_vector(self):
+        backend = Word2VecEmbeddingBackend(self.get_model())
+        result = backend.get_document_vector(['family', 'food', 'indoor'])
+        self.assertAlmostEqual(result[0], 0.5, delta=0.01)
+        self.assertAlmostEqual(result[1], 0.5, delta=0.01)
+        self.assertIsNone(backend.get_document_vector(['indoor']))
+
+    def test_semantic_similarity(self):
+        backend = Word2VecEmbeddingBackend(self.get_model())
+        query_vector = backend.get_document_vector(['family'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family'])
+        kwc2 = KeywordCoordinate('kwc2', 2, 2, ['food'])
+        kwc3 = KeywordCoordinate('kwc3', 3, 3, ['outdoor'])
+        kwc4 = KeywordCoordinate('kwc4', 4, 4, ['indoor'])
+        self.assertAlmostEqual(mt.semantic_similarity(query_vector, kwc1, backend), 1.0, delta=0.01)
+        self.assertAlmostEqual(mt.semantic_similarity(query_vector, kwc2, backend), 0.0, delta=0.01)
+        self.assertAlmostEqual(mt.semantic_similarity(query_vector, kwc3, backend), 0.71, delta=0.01)
+        self.assertAlmostEqual(mt.semantic_similarity(query_vector, kwc4, backend), 0.0, delta=0.01)
+
+    def test_word2vec_cosine_similarity(self):
+        model = self.get_model()
+        backend = Word2VecEmbeddingBackend(model)
+        result_model = mt.word2vec_cosine_similarity(['family'], ['outdoor', 'food'], model)
+        result_backend = mt.word2vec_cosine_similarity(['family'], ['outdoor', 'food'], backend)
+        self.assertAlmostEqual(result_model, result_backend, delta=0.0001)
+
+    def test_shared_with_cost_function(self):
+        backend = Word2VecEmbeddingBackend(self.get_model())
+        cf = Type1(euclidean_distance, mt.word2vec_cosine_similarity, 0.3, 0.3, 0.4, model=backend)
+        self.assertIs(cf.model, backend)
+
+    def test_shared_with_solver(self):
+        backend = Word2VecEmbeddingBackend(self.get_model())
+        cf = Type1(euclidean_distance, mt.word2vec_cosine_similarity, 0.3, 0.3, 0.4, model=backend)
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['food'])]
+        so = Solver(query, data, cf, normalize=False)
+        self.assertIs(so.get_embedding_backend(), backend)
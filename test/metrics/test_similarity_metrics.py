@@ -1,3 +1,4 @@
+import math
 import os
 from unittest import TestCase
 
@@ -6,6 +7,7 @@ from gensim.models import Word2Vec
 
 import src.metrics.similarity_metrics as mt
 from src.model.keyword_coordinate import KeywordCoordinate
+from src.model.poi_table import PoiTable
 from src.utils.typing_definitions import sim_dataset_type, sim_tuple_type
 
 
@@ -243,6 +245,25 @@ class TestSimilarityMetrics(TestCase):
         for subset in subsets:
             self.assertEqual(len(subset), 0)
 
+    def test_keyword_id_cosine_similarity(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        kwc = KeywordCoordinate('poi', 1, 1, ['food', 'outdoor', 'outdoor', 'rest'])
+        combined_keyword_list = mt.create_combined_keyword_vector(query, [kwc])
+        expected = mt.combined_cosine_similarity(query.keywords, kwc.keywords, combined_keyword_list)
+        self.assertAlmostEqual(mt.keyword_id_cosine_similarity(query, kwc), expected, delta=1e-12)
+
+    def test_keyword_id_cosine_similarity_no_keywords(self):
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        kwc = KeywordCoordinate('poi', 1, 1, [])
+        self.assertRaises(ValueError, mt.keyword_id_cosine_similarity, query, kwc)
+
+    def test_tfidf_cosine_similarity(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        table = PoiTable(['poi'], [1], [1], [['food', 'rest']], keyword_weights=[[0.6, 0.8]])
+        kwc = KeywordCoordinate.from_table(table, 0)
+        # cosine of (1, 1, 0) and (0, 0.6, 0.8)
+        self.assertAlmostEqual(mt.tfidf_cosine_similarity(query, kwc), 1 - 0.6 / math.sqrt(2), delta=1e-12)
+
     def test_word2vec_cosine_similarity(self):
         valid_string_list = ['outdoor', 'rest']
         partially_invalid_string_list = ['outdoor123', 'rest']
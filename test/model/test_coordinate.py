@@ -1,3 +1,4 @@
+import pickle
 from unittest import TestCase
 
 from src.model.coordinate import Coordinate
@@ -10,3 +11,9 @@ class TestCoordinate(TestCase):
         c = Coordinate(x, y)
         self.assertEqual(c.x, x)
         self.assertEqual(c.y, y)
+
+    def test_pickle(self):
+        c = Coordinate(5.0, 7.0)
+        unpickled_c = pickle.loads(pickle.dumps(c))
+        self.assertEqual(unpickled_c.x, 5.0)
+        self.assertEqual(unpickled_c.y, 7.0)
@@ -1,6 +1,10 @@
+import copy
+import pickle
 from unittest import TestCase
 
-from src.model.keyword_coordinate import KeywordCoordinate
+from src.model.coordinate import Coordinate
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
 
 
 class TestKeywordCoordinate(TestCase):
@@ -12,3 +16,60 @@ class TestKeywordCoordinate(TestCase):
         self.assertEqual(kwc.coordinates.x, x)
         self.assertEqual(kwc.coordinates.y, y)
         self.assertEqual(kwc.keywords, kw)
+
+    def test_table_view(self):
+        table = PoiTable(['a', 'b'], [1.0, 2.0], [3.0, 4.0], [['x'], ['y', 'z']], ids=[7, 8])
+        dataset = create_dataset(table)
+        self.assertEqual(dataset[1].name, 'b')
+        self.assertEqual(dataset[1].id, 8)
+        self.assertAlmostEqual(dataset[1].coordinates.x, 2.0)
+        self.assertAlmostEqual(dataset[1].coordinates.y, 4.0)
+        self.assertListEqual(dataset[1].keywords, ['y', 'z'])
+        self.assertIs(dataset[1].table, table)
+
+    def test_equality_and_hash(self):
+        table = PoiTable(['a'], [1.0], [3.0], [['x', 'y']])
+        kwc1 = KeywordCoordinate.from_table(table, 0)
+        kwc2 = KeywordCoordinate('other name', 1.0, 3.0, ['x', 'y'])
+        kwc3 = KeywordCoordinate('a', 1.0, 3.0, ['y', 'x'])
+        self.assertEqual(kwc1, kwc2)
+        self.assertEqual(hash(kwc1), hash(kwc2))
+        self.assertNotEqual(kwc1, kwc3)
+
+    def test_copy(self):
+        kwc = KeywordCoordinate('a', 1.0, 3.0, ['x'])
+        self.assertIs(copy.deepcopy(kwc), kwc)
+
+    def test_pickle(self):
+        kwc = KeywordCoordinate('a', 1.0, 3.0, ['x'])
+        unpickled_kwc = pickle.loads(pickle.dumps(kwc))
+        self.assertEqual(unpickled_kwc, kwc)
+        self.assertEqual(unpickled_kwc.name, 'a')
+
+    def test_pickle_row(self):
+        table = PoiTable(['p{}'.format(index) for index in range(1000)], [float(index) for index in range(1000)],
+                         [0.0] * 1000, [['x'], ['y', 'z']] * 500, ids=list(range(10, 1010)),
+                         keyword_weights=[[1.0], [0.5, 2.0]] * 500)
+        kwc = KeywordCoordinate.from_table(table, 1)
+        state = pickle.dumps(kwc)
+        self.assertLess(len(state), 500)
+        unpickled_kwc = pickle.loads(state)
+        self.assertEqual(unpickled_kwc, kwc)
+        self.assertEqual(unpickled_kwc.name, 'p1')
+        self.assertEqual(unpickled_kwc.id, 11)
+        self.assertEqual(unpickled_kwc.table.get_keyword_weight_dict(0), table.get_keyword_weight_dict(1))
+
+    def test_standalone(self):
+        kwc = KeywordCoordinate('a', 1.0, 3.0, 'x y')
+        self.assertListEqual(kwc.keywords, ['x', 'y'])
+        self.assertEqual(kwc.id, 0)
+        self.assertEqual(kwc.table.names[kwc.row], 'a')
+        self.assertListEqual(kwc.table.get_keywords(kwc.row), ['x', 'y'])
+        self.assertAlmostEqual(kwc.table.keyword_weight_norms[kwc.row], 2 ** 0.5)
+
+    def test_legacy_state(self):
+        kwc = KeywordCoordinate.__new__(KeywordCoordinate)
+        kwc.__setstate__({'name': 'a', 'coordinates': Coordinate(1.0, 3.0), 'keywords': ['x', 'y']})
+        self.assertEqual(kwc.name, 'a')
+        self.assertAlmostEqual(kwc.coordinates.x, 1.0)
+        self.assertListEqual(kwc.keywords, ['x', 'y'])
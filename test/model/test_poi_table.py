@@ -0,0 +1,86 @@
+import pickle
+from unittest import TestCase
+
+import numpy as np
+
+from src.model.keyword_coordinate import KeywordCoordinate, create_dataset
+from src.model.poi_table import PoiTable
+from src.model.vocabulary import vocabulary
+
+
+class TestPoiTable(TestCase):
+    def test_instantiation(self):
+        table = PoiTable(['a', 'b', 'c'], [1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [['x', 'y'], [], ['y']])
+        self.assertEqual(len(table), 3)
+        self.assertListEqual(table.keyword_offsets.tolist(), [0, 2, 2, 3])
+        self.assertListEqual(table.ids.tolist(), [0, 1, 2])
+        self.assertListEqual(table.get_keywords(0), ['x', 'y'])
+        self.assertListEqual(table.get_keywords(1), [])
+        self.assertEqual(table.get_keyword_ids(2)[0], vocabulary.get_id('y'))
+        self.assertFalse(table.x.flags.writeable)
+
+    def test_keyword_string(self):
+        table = PoiTable(['a'], [1.0], [2.0], ['x y'])
+        self.assertListEqual(table.get_keywords(0), ['x', 'y'])
+
+    def test_sorted_keyword_ids(self):
+        table = PoiTable(['a', 'b'], [1.0, 2.0], [4.0, 5.0], [['sorted z', 'sorted a', 'sorted z'], ['sorted a']],
+                         keyword_weights=[[0.3, 0.4, 0.5], [2.0]])
+        keyword_id_a = vocabulary.get_id('sorted a')
+        keyword_id_z = vocabulary.get_id('sorted z')
+        self.assertListEqual(table.get_sorted_keyword_ids(0).tolist(), sorted([keyword_id_a, keyword_id_z]))
+        self.assertEqual(table.get_keyword_id_set(1), frozenset([keyword_id_a]))
+        self.assertDictEqual(table.get_keyword_weight_dict(0), {keyword_id_a: 0.4, keyword_id_z: 0.3})
+        self.assertAlmostEqual(table.keyword_weight_norms[0], 0.5)
+        self.assertAlmostEqual(table.keyword_weight_norms[1], 2.0)
+
+    def test_keyword_weights_length(self):
+        self.assertRaises(ValueError, PoiTable, ['a'], [1.0], [2.0], [['x', 'y']], None, [[1.0]])
+
+    def test_from_keyword_coordinates(self):
+        table = PoiTable(['a', 'b'], [1.0, 2.0], [4.0, 5.0], [['x'], ['y', 'z']], ids=[10, 20])
+        kwc = KeywordCoordinate('c', 3.0, 6.0, ['z'])
+        combined = PoiTable.from_keyword_coordinates([kwc, KeywordCoordinate.from_table(table, 1)])
+        self.assertListEqual(combined.names.tolist(), ['c', 'b'])
+        self.assertListEqual(combined.x.tolist(), [3.0, 2.0])
+        self.assertListEqual(combined.ids.tolist(), [0, 20])
+        self.assertListEqual(combined.get_keywords(1), ['y', 'z'])
+
+    def test_get_rescaled(self):
+        table = PoiTable(['a', 'b'], [0.0, 1.0], [0.5, 1.0], [['x'], ['y']])
+        rescaled = table.get_rescaled(2.0, 1.0, 4.0, 0.0)
+        self.assertListEqual(rescaled.x.tolist(), [1.0, 3.0])
+        self.assertListEqual(rescaled.y.tolist(), [2.0, 4.0])
+        self.assertIs(rescaled.keyword_ids, table.keyword_ids)
+        self.assertIs(table.get_rescaled(2.0, 1.0, 4.0, 0.0), rescaled)
+
+    def test_pickle(self):
+        table = PoiTable(['a', 'b'], [1.0, 2.0], [4.0, 5.0], [['x', 'pickled keyword'], ['x']])
+        dataset = create_dataset(table)
+        unpickled_dataset = pickle.loads(pickle.dumps(dataset))
+        self.assertListEqual(unpickled_dataset[0].keywords, ['x', 'pickled keyword'])
+        self.assertEqual(unpickled_dataset[1].id, 1)
+        self.assertTrue(np.array_equal(unpickled_dataset[0].table.get_keyword_ids(0), table.get_keyword_ids(0)))
+        self.assertEqual(unpickled_dataset, dataset)
+        self.assertTrue(np.array_equal(unpickled_dataset[0].table.get_sorted_keyword_ids(0),
+                                       table.get_sorted_keyword_ids(0)))
+        shared_dataset = create_dataset(table.share())
+        unpickled_dataset = pickle.loads(pickle.dumps(shared_dataset))
+        self.assertIs(unpickled_dataset[0].table, unpickled_dataset[1].table)
+        self.assertEqual(unpickled_dataset, dataset)
+
+    def test_share(self):
+        table = PoiTable(['a', 'b'], [1.0, 2.0], [4.0, 5.0], [['x', 'shared keyword'], ['x']],
+                         keyword_weights=[[0.5, 2.0], [1.0]])
+        shared_table = table.share()
+        self.assertTrue(shared_table.is_shared)
+        self.assertFalse(table.is_shared)
+        self.assertIs(shared_table.share(), shared_table)
+        self.assertListEqual(shared_table.x.tolist(), table.x.tolist())
+        self.assertListEqual(shared_table.get_keywords(0), ['x', 'shared keyword'])
+        unpickled_table = pickle.loads(pickle.dumps(shared_table))
+        self.assertTrue(unpickled_table.is_shared)
+        self.assertListEqual(unpickled_table.names.tolist(), ['a', 'b'])
+        self.assertTrue(np.array_equal(unpickled_table.sorted_keyword_ids, table.sorted_keyword_ids))
+        self.assertTrue(np.array_equal(unpickled_table.keyword_weight_norms, table.keyword_weight_norms))
+        self.assertFalse(unpickled_table.x.flags.writeable)
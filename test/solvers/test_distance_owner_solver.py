@@ -0,0 +1,72 @@
+import random
+from unittest import TestCase
+
+from src.costfunctions.type1 import Type1
+from src.costfunctions.type2 import Type2
+from src.costfunctions.type3 import Type3
+from src.metrics.distance_metrics import euclidean_distance
+from src.metrics.similarity_metrics import combined_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.solvers.distance_owner_solver import DistanceOwnerSolver
+from src.solvers.naive_solver import NaiveSolver
+
+
+class TestDistanceOwnerSolver(TestCase):
+    def test_get_best_subsets_by_owners(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor'])
+        kwc2 = KeywordCoordinate('kwc2', 2, 2, ['food', 'family'])
+        kwc3 = KeywordCoordinate('kwc3', 3, 3, ['outdoor'])
+        kwc4 = KeywordCoordinate('kwc4', 4, 4, ['sports'])
+        data = [kwc1, kwc2, kwc3, kwc4]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = DistanceOwnerSolver(query, data, cf, normalize=False, RADIUS=1000000, semantic_filtering=False,
+                                 keyword_coverage=True)
+        result = so.get_best_subsets_by_owners(query, data)
+        self.assertEqual(len(result), 2)
+        self.assertAlmostEqual(result[0][0], 0.3 * 2 ** 0.5, delta=0.0001)
+        self.assertTupleEqual(result[0][1], (kwc1,))
+        self.assertTupleEqual(result[1][1], (kwc2, kwc3))
+        so.result_length = 1
+        self.assertListEqual(so.get_best_subsets_by_owners(query, data), result[:1])
+        so.keyword_coverage = False
+        so.result_length = 3
+        result = so.get_best_subsets_by_owners(query, data)
+        self.assertTupleEqual(result[0][1], (kwc1,))
+        self.assertTupleEqual(result[1][1], (kwc2,))
+        self.assertGreater(so.enumerated_owners, 0)
+
+    def test_solve_same_as_naive_solver(self):
+        possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports']
+        for seed in range(10):
+            generator = random.Random(seed)
+            query = KeywordCoordinate('query', 41.65 + generator.random() * 0.01, -0.88 + generator.random() * 0.01,
+                                      generator.sample(possible_keywords, generator.randint(1, 4)))
+            # Coordinates on a grid lead to equal distances, which have to be assigned to a single owner
+            data = [KeywordCoordinate('kwc{}'.format(index), 41.65 + index % 4 * 0.002,
+                                      -0.88 + index // 4 * 0.002,
+                                      generator.sample(possible_keywords, generator.randint(1, 3)))
+                    for index in range(11)]
+            # Every monotone cost works, Type2 is used for half of the seeds
+            cost_type = Type1 if seed < 5 else Type2
+            cf = cost_type(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                           disable_thresholds=seed % 2 == 0)
+            for keyword_coverage in (False, True):
+                for result_length in (5, 3000):
+                    ns = NaiveSolver(query, data, cf, result_length=result_length, max_subset_size=4,
+                                     RADIUS=100000, semantic_filtering=False, keyword_coverage=keyword_coverage)
+                    so = DistanceOwnerSolver(query, data, cf, result_length=result_length, max_subset_size=4,
+                                             RADIUS=100000, semantic_filtering=False,
+                                             keyword_coverage=keyword_coverage)
+                    expected = ns.solve()
+                    result = so.solve()
+                    self.assertEqual(len(result), len(expected))
+                    for index in range(len(result)):
+                        self.assertAlmostEqual(result[index][0], expected[index][0], delta=0.000001)
+
+    def test_unsupported_cost_function(self):
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family'])]
+        cf = Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        with self.assertRaises(ValueError):
+            DistanceOwnerSolver(query, data, cf)
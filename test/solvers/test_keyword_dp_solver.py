@@ -0,0 +1,97 @@
+import random
+from unittest import TestCase
+
+from src.costfunctions.type1 import Type1
+from src.costfunctions.type2 import Type2
+from src.costfunctions.type3 import Type3
+from src.evaluator import Evaluator
+from src.metrics.distance_metrics import euclidean_distance
+from src.metrics.similarity_metrics import combined_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.solvers.keyword_dp_solver import KeywordDPSolver
+from src.solvers.naive_solver import NaiveSolver
+
+
+class Type2Subclass(Type2):
+    pass
+
+
+class TestKeywordDPSolver(TestCase):
+    def test_solve(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor'])
+        kwc2 = KeywordCoordinate('kwc2', 2, 2, ['food', 'family'])
+        kwc3 = KeywordCoordinate('kwc3', 3, 3, ['outdoor'])
+        kwc4 = KeywordCoordinate('kwc4', 4, 4, ['sports'])
+        data = [kwc1, kwc2, kwc3, kwc4]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = KeywordDPSolver(query, data, cf, normalize=False, RADIUS=1000000, semantic_filtering=False)
+        result = so.get_best_covering_subsets(query, data)
+        self.assertEqual(len(result), 2)
+        self.assertAlmostEqual(result[0][0], 0.3 * 2 ** 0.5, delta=0.0001)
+        self.assertTupleEqual(result[0][1], (kwc1,))
+        self.assertTupleEqual(result[1][1], (kwc2, kwc3))
+        so.result_length = 1
+        self.assertListEqual(so.get_best_covering_subsets(query, data), result[:1])
+
+    def test_solve_same_as_naive_solver(self):
+        possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports']
+        for seed in range(10):
+            generator = random.Random(seed)
+            query = KeywordCoordinate('query', 41.65 + generator.random() * 0.01, -0.88 + generator.random() * 0.01,
+                                      generator.sample(possible_keywords, generator.randint(1, 4)))
+            data = [KeywordCoordinate('kwc{}'.format(index), 41.65 + generator.random() * 0.01,
+                                      -0.88 + generator.random() * 0.01,
+                                      generator.sample(possible_keywords, generator.randint(1, 3)))
+                    for index in range(12)]
+            for cost_function_type in (Type1, Type2):
+                cf = cost_function_type(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                                        disable_thresholds=seed % 2 == 0)
+                ns = NaiveSolver(query, data, cf, result_length=5, max_subset_size=3, RADIUS=100000,
+                                 semantic_filtering=False, keyword_coverage=True)
+                so = KeywordDPSolver(query, data, cf, result_length=5, max_subset_size=3, RADIUS=100000,
+                                     semantic_filtering=False)
+                expected = ns.solve()
+                result = so.solve()
+                self.assertEqual(len(result), len(expected))
+                for index in range(len(result)):
+                    self.assertAlmostEqual(result[index][0], expected[index][0], delta=0.000001)
+
+    def test_partial_subset_limit(self):
+        possible_keywords = ['family', 'food', 'outdoor', 'rest']
+        query = KeywordCoordinate('query', 0, 0, possible_keywords)
+        data = [KeywordCoordinate('kwc{}'.format(index), index, index % 5,
+                                  [possible_keywords[index % 4], possible_keywords[(index * 3) % 4]])
+                for index in range(20)]
+        cf = Type2(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        exact = KeywordDPSolver(query, data, cf, normalize=False, result_length=3).get_best_covering_subsets(query,
+                                                                                                             data)
+        so = KeywordDPSolver(query, data, cf, normalize=False, result_length=3, max_partial_subsets_per_state=2)
+        result = so.get_best_covering_subsets(query, data)
+        self.assertEqual(len(result), 3)
+        for index in range(len(result)):
+            self.assertGreaterEqual(result[index][0] + 0.000001, exact[index][0])
+
+    def test_unsupported_cost_function(self):
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family'])]
+        cf = Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        with self.assertRaises(ValueError):
+            KeywordDPSolver(query, data, cf)
+        cf = Type2Subclass(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        self.assertIs(KeywordDPSolver(query, data, cf).cost_function, cf)
+
+    def test_evaluator(self):
+        query = KeywordCoordinate('query', 41.65, -0.88, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 41.651, -0.881, ['family'])
+        kwc2 = KeywordCoordinate('kwc2', 41.652, -0.882, ['food'])
+        kwc3 = KeywordCoordinate('kwc3', 41.653, -0.883, ['food', 'family'])
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = KeywordDPSolver(query, [kwc1, kwc2, kwc3], cf, result_length=2, semantic_filtering=False)
+        ev = Evaluator()
+        ev.add_solver(so)
+        ev.evaluate()
+        results = ev.get_results()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(results[0][0]), 2)
+        self.assertIsInstance(results[0][1], KeywordDPSolver)
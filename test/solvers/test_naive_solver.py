@@ -1,3 +1,4 @@
+import random
 from unittest import TestCase
 
 from src.costfunctions.type1 import Type1
@@ -11,6 +12,20 @@ from src.utils.data_generator import DataGenerator
 from src.utils.data_handler import load_word2vec_model, calculate_model_subset
 
 
+def create_parallel_test_case(number_of_pois: int):
+    """
+    Creates the query, the data and the cost function shared by the tests of the parallel and the early-aborting solvers.
+    :param number_of_pois: The number of POIs of the data
+    :return: A tuple with the query, the data and the cost function
+    """
+    query = KeywordCoordinate('query', 41.65, -0.88, ['family', 'food', 'outdoor'])
+    data = [KeywordCoordinate('kwc{}'.format(index), 41.65 + index * 0.001, -0.88 + (index % 3) * 0.001,
+                              [['family', 'food'], ['outdoor'], ['food', 'sports']][index % 3])
+            for index in range(number_of_pois)]
+    cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+    return query, data, cf
+
+
 class TestNaiveSolver(TestCase):
     def test_solve(self):
         query = KeywordCoordinate(0, 0, ['family', 'food', 'outdoor'])
@@ -206,3 +221,116 @@ class TestNaiveSolver(TestCase):
                 self.assertAlmostEqual(key_list[list_index].coordinates.x, key_list_pre[list_index].coordinates.x)
                 self.assertAlmostEqual(key_list[list_index].coordinates.y, key_list_pre[list_index].coordinates.y)
                 self.assertListEqual(key_list[list_index].keywords, key_list_pre[list_index].keywords)
+
+    def assert_same_costs(self, result, expected_costs):
+        """
+        Checks that a result has the expected costs in the same order.
+        :param result: The result
+        :param expected_costs: The expected costs
+        """
+        self.assertEqual(len(result), len(expected_costs))
+        for index in range(len(result)):
+            self.assertAlmostEqual(result[index][0], expected_costs[index], delta=0.000001)
+
+    def assert_same_result_as_serial_solver(self, result, query, data, cf, **kwargs) -> NaiveSolver:
+        """
+        Checks that a result has the same costs as the result of a serial NaiveSolver with the same arguments.
+        :param result: The result
+        :param query: The query
+        :param data: The data
+        :param cf: The cost function
+        :param kwargs: The arguments of the solver besides RADIUS and semantic_filtering
+        :return: The serial solver
+        """
+        serial_solver = NaiveSolver(query, data, cf, RADIUS=100000, semantic_filtering=False, **kwargs)
+        self.assert_same_costs(result, [cost for cost, _ in serial_solver.solve()])
+        return serial_solver
+
+    def test_parallel_scoring(self):
+        query, data, cf = create_parallel_test_case(6)
+        ns = NaiveSolver(query, data, cf, result_length=20, RADIUS=100000, semantic_filtering=False,
+                         max_number_of_concurrent_processes=2, parallel_scoring=True)
+        result = ns.solve()
+        self.assert_same_result_as_serial_solver(result, query, data, cf, result_length=20)
+        pool = ns.get_worker_pool()
+        pre_id = ns.get_max_inter_dataset_distance()
+        # The precalculation runs on the same workers as the solve call
+        self.assertIs(ns.get_worker_pool(), pool)
+        self.assertEqual(len(pre_id), len(ns.list_of_subsets))
+
+    def test_parallel_enumeration(self):
+        query, data, cf = create_parallel_test_case(7)
+        ns = NaiveSolver(query, data, cf, result_length=20, max_subset_size=3, RADIUS=100000,
+                         semantic_filtering=False, max_number_of_concurrent_processes=2, parallel_enumeration=True)
+        result = ns.solve()
+        # The parent only keeps the candidates, the subsets are generated by the workers
+        self.assertEqual(len(ns.list_of_subsets), 41)
+        self.assertEqual(len(ns.list_of_subsets.items), 6)
+        self.assert_same_result_as_serial_solver(result, query, data, cf, result_length=20, max_subset_size=3)
+        ns.dynamic_scheduling = True
+        result = ns.solve()
+        self.assertEqual(ns.utilization_report.number_of_items, 41)
+        self.assert_same_result_as_serial_solver(result, query, data, cf, result_length=20, max_subset_size=3)
+        self.assertRaises(ValueError, NaiveSolver, query, data, cf, semantic_filtering=False, keyword_coverage=True,
+                          parallel_enumeration=True)
+
+    def test_parallel_branch_and_bound(self):
+        query, data, cf = create_parallel_test_case(7)
+        for keyword_coverage in (False, True):
+            ns = NaiveSolver(query, data, cf, result_length=5, max_subset_size=3, RADIUS=100000,
+                             semantic_filtering=False, keyword_coverage=keyword_coverage,
+                             max_number_of_concurrent_processes=2, parallel_branch_and_bound=True)
+            self.assert_same_result_as_serial_solver(ns.solve(), query, data, cf, result_length=5,
+                                                     max_subset_size=3, keyword_coverage=keyword_coverage)
+
+    def test_thread_execution_backend(self):
+        query, data, cf = create_parallel_test_case(6)
+        ns = NaiveSolver(query, data, cf, result_length=20, RADIUS=100000, semantic_filtering=False,
+                         max_number_of_concurrent_processes=2, parallel_scoring=True, execution_backend='thread')
+        serial_solver = self.assert_same_result_as_serial_solver(ns.solve(), query, data, cf, result_length=20)
+        expected_pre_qd = serial_solver.get_max_query_dataset_distance()
+        pre_qd = ns.get_max_query_dataset_distance()
+        self.assertEqual(len(pre_qd), len(expected_pre_qd))
+        for subset, value in expected_pre_qd.items():
+            self.assertAlmostEqual(pre_qd[subset], value, delta=0.000001)
+        self.assertRaises(ValueError, NaiveSolver, query, data, cf, semantic_filtering=False,
+                          execution_backend='gpu')
+
+    def test_early_abort(self):
+        query, data, cf = create_parallel_test_case(6)
+        ns = NaiveSolver(query, data, cf, result_length=3, RADIUS=100000, semantic_filtering=False)
+        result = ns.solve()
+        early_aborts = ns.cost_function.early_aborts
+        saved_evaluations = ns.cost_function.saved_evaluations
+        self.assertGreater(early_aborts, 0)
+        self.assertGreater(saved_evaluations, 0)
+        # The counters are reset by every solve call
+        ns.solve()
+        self.assertEqual(ns.cost_function.early_aborts, early_aborts)
+        self.assertEqual(ns.cost_function.saved_evaluations, saved_evaluations)
+        # The serial solver aborts as well, so the result is compared with the full costs of all the subsets
+        self.assert_same_costs(result, sorted(ns.get_cost_for_subset(ns.normalised_query, subset)
+                                              for subset in ns.list_of_subsets)[:3])
+
+    def test_keyword_coverage_order(self):
+        query = KeywordCoordinate('query', 0.5, 0.5, ['family', 'food', 'outdoor'])
+        keywords = [['family', 'outdoor'], ['rest', 'outdoor'], ['food', 'outdoor', 'family'], ['sports', 'food'],
+                    ['outdoor', 'rest', 'sports'], ['food', 'rest', 'sports'], ['family', 'sports', 'outdoor'],
+                    ['family', 'rest', 'food']]
+        data = [KeywordCoordinate('kwc{}'.format(index), (index * 7 % 11) / 11, (index * 5 % 13) / 13,
+                                  keywords[index]) for index in range(len(keywords))]
+        for cost_function_type in (Type1, Type3):
+            cf = cost_function_type(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                                    disable_thresholds=True)
+            expected = None
+            for seed in range(4):
+                shuffled_data = list(data)
+                random.Random(seed).shuffle(shuffled_data)
+                ns = NaiveSolver(query, shuffled_data, cf, normalize=False, result_length=5, max_subset_size=3,
+                                 RADIUS=100000, semantic_filtering=False, keyword_coverage=True)
+                result = [cost for cost, _ in ns.solve()]
+                if expected is None:
+                    expected = result
+                self.assertEqual(len(result), len(expected))
+                for index in range(len(result)):
+                    self.assertAlmostEqual(result[index], expected[index], delta=0.000001)
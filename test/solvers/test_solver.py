@@ -1,12 +1,25 @@
 from unittest import TestCase
 
+import numpy as np
+
 from src.costfunctions.costfunction import CostFunction
+from src.costfunctions.type1 import Type1
+from src.costfunctions.type3 import Type3
+from src.costfunctions.type4 import Type4
 from src.metrics.distance_metrics import euclidean_distance
 from src.metrics.similarity_metrics import separated_cosine_similarity, combined_cosine_similarity
 from src.model.keyword_coordinate import KeywordCoordinate
 from src.solvers.solver import Solver
 
 
+class MonotoneType1(Type1):
+    pass
+
+
+class Type4Subclass(Type4):
+    pass
+
+
 class TestSolver(TestCase):
     def test_instantiation(self):
         query_keywords = ['family', 'food', 'outdoor']
@@ -194,3 +207,297 @@ class TestSolver(TestCase):
         self.assertAlmostEqual(result.get(fs5), 0.42, delta=0.01)
         self.assertAlmostEqual(result.get(fs6), 0.42, delta=0.01)
         self.assertAlmostEqual(result.get(fs7), 0.42, delta=0.01)
+
+    def test_get_all_covering_subsets(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor'])
+        kwc2 = KeywordCoordinate('kwc2', 2, 2, ['food', 'family'])
+        kwc3 = KeywordCoordinate('kwc3', 3, 3, ['outdoor'])
+        kwc4 = KeywordCoordinate('kwc4', 4, 4, ['sports'])
+        kwc5 = KeywordCoordinate('kwc5', 5, 5, ['food', 'sports'])
+        data = [kwc1, kwc2, kwc3, kwc4, kwc5]
+        cf = CostFunction(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        so = Solver(query, data, cf, normalize=False, keyword_coverage=True)
+        self.assertListEqual(so.get_query_keyword_masks(query, data), [7, 3, 4, 0, 2])
+        subsets = so.get_all_covering_subsets(query, data)
+        self.assertListEqual(subsets, [(kwc1,), (kwc2, kwc3)])
+        so.max_subset_size = 1
+        self.assertListEqual(so.get_all_covering_subsets(query, data), [(kwc1,)])
+
+    def test_get_all_covering_subsets_brute_force(self):
+        possible_keywords = ['family', 'food', 'outdoor', 'rest', 'indoor', 'sports']
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor', 'rest'])
+        data = [KeywordCoordinate('kwc{}'.format(index), index, index,
+                                  [possible_keywords[(index * factor) % 6] for factor in range(1, index % 3 + 2)])
+                for index in range(12)]
+        cf = CostFunction(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        so = Solver(query, data, cf, normalize=False, max_subset_size=3, keyword_coverage=True)
+        expected = set()
+        for subset in so.get_all_subsets(data):
+            covered = set()
+            contributes = True
+            for kwc in subset:
+                new_keywords = set(kwc.keywords) & set(query.keywords) - covered
+                contributes = contributes and len(new_keywords) > 0
+                covered |= new_keywords
+            if contributes and covered == set(query.keywords):
+                expected.add(frozenset(subset))
+        subsets = so.get_all_covering_subsets(query, data)
+        self.assertEqual(len(subsets), len(expected))
+        self.assertSetEqual(set(frozenset(subset) for subset in subsets), expected)
+
+    def test_filter_candidates_by_keyword_bound(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family', 'food'])
+        kwc2 = KeywordCoordinate('kwc2', 0.5, 0.5, ['sports'])
+        kwc3 = KeywordCoordinate('kwc3', 0.2, 0.2, ['food'])
+        data = [kwc1, kwc2, kwc3]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = Solver(query, data, cf, normalize=False, result_length=1, keyword_filtering=True)
+        positions = np.arange(len(data))
+        self.assertListEqual(so.filter_candidates_by_keyword_bound(query, data, positions), [kwc1, kwc3])
+        so.result_length = 3
+        self.assertListEqual(so.filter_candidates_by_keyword_bound(query, data, positions), data)
+        so.result_length = 1
+        so.keyword_coverage = True
+        self.assertListEqual(so.filter_candidates_by_keyword_bound(query, data, positions), data)
+
+    def test_get_inverted_index(self):
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family']), KeywordCoordinate('kwc2', 2, 2, ['food'])]
+        cf = CostFunction(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        so = Solver(query, data, cf, normalize=False)
+        index = so.get_inverted_index()
+        self.assertEqual(index.number_of_pois, 2)
+        self.assertIs(so.get_inverted_index(), index)
+        so = Solver(query, data[:1], cf, normalize=False, inverted_index=index)
+        with self.assertRaises(ValueError):
+            so.get_inverted_index()
+
+    def test_filter_candidates_by_index_bound(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family', 'food'])
+        kwc2 = KeywordCoordinate('kwc2', 0.5, 0.5, ['sports'])
+        kwc3 = KeywordCoordinate('kwc3', 0.2, 0.2, ['food'])
+        kwc4 = KeywordCoordinate('kwc4', 3, 3, ['food'])
+        data = [kwc1, kwc2, kwc3, kwc4]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = Solver(query, data, cf, normalize=False, result_length=1, spatial_keyword_filtering=True)
+        positions = np.arange(len(data))
+        self.assertListEqual(so.filter_candidates_by_index_bound(query, data, positions), [kwc3])
+        self.assertEqual(so.get_ir_tree().number_of_pois, 4)
+        so.result_length = 2
+        self.assertListEqual(so.filter_candidates_by_index_bound(query, data, positions), [kwc1, kwc3])
+        so.result_length = 5
+        self.assertListEqual(so.filter_candidates_by_index_bound(query, data, positions), data)
+
+    def test_get_all_clique_subsets(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        kwc1 = KeywordCoordinate('kwc1', 0, 0, ['family'])
+        kwc2 = KeywordCoordinate('kwc2', 1, 0, ['food'])
+        kwc3 = KeywordCoordinate('kwc3', 0, 1, ['outdoor'])
+        kwc4 = KeywordCoordinate('kwc4', 5, 5, ['family', 'food', 'outdoor'])
+        data = [kwc1, kwc2, kwc3, kwc4]
+        cf = CostFunction(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        so = Solver(query, data, cf, normalize=False, neighbour_distance=1.0)
+        graph = so.get_neighbour_graph(data)
+        subsets = so.get_all_clique_subsets(data, graph)
+        self.assertSetEqual(set(subsets), {(kwc1,), (kwc2,), (kwc3,), (kwc4,), (kwc1, kwc2), (kwc1, kwc3)})
+        self.assertListEqual(so.get_all_subsets(data, graph), subsets)
+        so.neighbour_distance = 1.5
+        graph = so.get_neighbour_graph(data)
+        self.assertIn((kwc1, kwc2, kwc3), so.get_all_clique_subsets(data, graph))
+        so.max_subset_size = 2
+        self.assertEqual(len(so.get_all_clique_subsets(data, graph)), 7)
+        self.assertSetEqual(set(so.get_all_covering_subsets(query, data, graph)), {(kwc4,)})
+        so.max_subset_size = 3
+        self.assertSetEqual(set(so.get_all_covering_subsets(query, data, graph)), {(kwc1, kwc2, kwc3), (kwc4,)})
+        so.neighbour_distance = None
+        self.assertIsNone(so.get_neighbour_graph(data))
+
+    def test_filter_candidates_by_skyline(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 0, ['family', 'food'])
+        kwc2 = KeywordCoordinate('kwc2', 0.5, 0, ['sports'])
+        kwc3 = KeywordCoordinate('kwc3', 2, 0, ['family', 'food'])
+        kwc4 = KeywordCoordinate('kwc4', 3, 0, ['food'])
+        kwc5 = KeywordCoordinate('kwc5', 3, 0, ['food'])
+        data = [kwc1, kwc2, kwc3, kwc4, kwc5]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = Solver(query, data, cf, normalize=False, result_length=1, skyline_filtering=True)
+        self.assertListEqual(so.get_skyline_layers(query, data), [0, 0, 1, 2, 2])
+        self.assertListEqual(so.get_skyline_layers(query, data, max_layers=2), [0, 0, 1, 2, 2])
+        self.assertListEqual(so.filter_candidates_by_skyline(query, data), [kwc1, kwc2])
+        self.assertEqual(so.eliminated_by_skyline, 3)
+        so.result_length = 3
+        self.assertListEqual(so.filter_candidates_by_skyline(query, data), data)
+        self.assertEqual(so.eliminated_by_skyline, 0)
+        so.result_length = 1
+        so.keyword_coverage = True
+        self.assertListEqual(so.get_skyline_layers(query, data, eligible=[False, True, False, False, False]),
+                             [0, 0, 0, 0, 0])
+        self.assertListEqual(so.filter_candidates_by_skyline(query, data), [kwc1, kwc2])
+        with self.assertRaises(ValueError):
+            Solver(query, data, Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4),
+                   skyline_filtering=True)
+        so = Solver(query, data, MonotoneType1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4),
+                    normalize=False, result_length=1, skyline_filtering=True)
+        self.assertListEqual(so.get_skyline_layers(query, data), [0, 0, 1, 2, 2])
+
+    def test_limit_candidates(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 3, 0, ['family', 'food'])
+        kwc2 = KeywordCoordinate('kwc2', 1, 0, ['family', 'food'])
+        kwc3 = KeywordCoordinate('kwc3', 2, 0, ['family', 'food'])
+        data = [kwc1, kwc2, kwc3]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.5, 0.0, 0.5, disable_thresholds=True)
+        so = Solver(query, data, cf, normalize=False, result_length=1, max_candidates=2)
+        self.assertListEqual(so.limit_candidates(query, data), [kwc2, kwc3])
+        self.assertEqual(so.removed_candidates, 1)
+        self.assertAlmostEqual(so.removed_candidates_bound, 1.5)
+        self.assertTrue(so.check_exactness([(0.5, (kwc2,))]))
+        self.assertTrue(so.result_is_exact)
+        self.assertFalse(so.check_exactness([]))
+        so.result_length = 2
+        self.assertFalse(so.check_exactness([(0.5, (kwc2,)), (1.6, (kwc2, kwc1))]))
+        self.assertFalse(so.result_is_exact)
+        so.max_candidates = 3
+        self.assertListEqual(so.limit_candidates(query, data), data)
+        self.assertTrue(so.check_exactness([]))
+
+    def test_filter_candidates_by_thresholds(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food'])
+        kwc1 = KeywordCoordinate('kwc1', 0.5, 0, ['family', 'food'])
+        kwc2 = KeywordCoordinate('kwc2', 0.2, 0, ['sports'])
+        kwc3 = KeywordCoordinate('kwc3', 2, 0, ['family', 'food'])
+        data = [kwc1, kwc2, kwc3]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, query_distance_threshold=1.0,
+                   dataset_distance_threshold=0.8, keyword_similarity_threshold=0.7)
+        so = Solver(query, data, cf, normalize=False, threshold_filtering=True)
+        self.assertListEqual(so.filter_candidates_by_thresholds(query, data), [kwc1])
+        self.assertEqual(so.get_neighbour_distance(), 0.8)
+        so.neighbour_distance = 0.5
+        self.assertEqual(so.get_neighbour_distance(), 0.5)
+        so.neighbour_distance = None
+        # The thresholds are a capability of the cost function, so subclasses keep them
+        so = Solver(query, data, MonotoneType1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                                               query_distance_threshold=1.0, dataset_distance_threshold=0.8,
+                                               keyword_similarity_threshold=0.7), normalize=False,
+                    threshold_filtering=True)
+        self.assertListEqual(so.filter_candidates_by_thresholds(query, data), [kwc1])
+        self.assertEqual(so.get_neighbour_distance(), 0.8)
+        cf = Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, query_distance_threshold=1.0)
+        so = Solver(query, data, cf, normalize=False, threshold_filtering=True)
+        self.assertListEqual(so.filter_candidates_by_thresholds(query, data), [kwc1, kwc3])
+        cf.disable_thresholds = True
+        self.assertListEqual(so.filter_candidates_by_thresholds(query, data), data)
+        self.assertIsNone(so.get_neighbour_distance())
+
+    def test_get_adaptive_query_distances(self):
+        query = KeywordCoordinate('query', 0, 0, ['family'])
+        # Along the meridian, about 111 meters apart
+        data = [KeywordCoordinate('kwc{}'.format(index), index * 0.001, 0, ['family']) for index in range(1, 21)]
+        cf = CostFunction(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4)
+        so = Solver(query, data, cf, RADIUS=2000, semantic_filtering=False, candidate_count_window=(3, 5))
+        query_distances = so.get_candidate_query_distances()
+        self.assertEqual(so.get_all_candidates_heuristic(data, query_distances), data[:5])
+        self.assertTrue(query_distances[4] < so.effective_radius < query_distances[5])
+        so.RADIUS = 100
+        so.get_candidate_query_distances()
+        self.assertEqual(so.effective_radius, 400)
+        so.candidate_count_window = (50, 60)
+        query_distances = so.get_candidate_query_distances()
+        self.assertEqual(so.get_all_candidates_heuristic(data, query_distances), data)
+        so.candidate_count_window = None
+        so.get_candidate_query_distances()
+        self.assertEqual(so.effective_radius, 100)
+        with self.assertRaises(ValueError):
+            Solver(query, data, cf, candidate_count_window=(5, 3))
+
+    def test_get_best_subsets_level_wise(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor']),
+                KeywordCoordinate('kwc2', 0.5, 0.5, ['food']),
+                KeywordCoordinate('kwc3', 0.2, 0.3, ['outdoor', 'family']),
+                KeywordCoordinate('kwc4', 4, 4, ['sports']),
+                KeywordCoordinate('kwc5', 0.1, 0.9, ['food', 'sports'])]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = Solver(query, data, cf, normalize=False, result_length=3, level_wise=True)
+        expected = sorted(so.get_cost_for_subset(query, subset) for subset in so.get_all_subsets(data))[:3]
+        results = so.get_best_subsets_level_wise(query, data)
+        self.assertListEqual([cost for cost, _ in results], expected)
+        self.assertEqual(len(so.level_survivors), 2)
+        self.assertLess(so.level_survivors[0], len(data))
+        so.max_subset_size = 1
+        so.get_best_subsets_level_wise(query, data)
+        self.assertEqual(len(so.level_survivors), 1)
+        with self.assertRaises(ValueError):
+            Solver(query, data, cf, keyword_coverage=True, level_wise=True)
+        with self.assertRaises(ValueError):
+            Solver(query, data, Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4), level_wise=True)
+        # The monotonicity is a capability of the cost function, so subclasses keep it
+        so = Solver(query, data, MonotoneType1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                                               disable_thresholds=True), normalize=False, result_length=3,
+                    level_wise=True)
+        self.assertListEqual([cost for cost, _ in so.get_best_subsets_level_wise(query, data)], expected)
+
+    def test_get_best_subsets_incrementally(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor']),
+                KeywordCoordinate('kwc2', 0.5, 0.5, ['food']),
+                KeywordCoordinate('kwc3', 0.2, 0.3, ['outdoor', 'family']),
+                KeywordCoordinate('kwc4', 4, 4, ['sports']),
+                KeywordCoordinate('kwc5', 0.1, 0.9, ['food', 'sports'])]
+        for cf in [Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True),
+                   Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True),
+                   Type4(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, 2.0, 2.0,
+                         disable_thresholds=True),
+                   Type4Subclass(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, 2.0, 2.0,
+                                 disable_thresholds=True)]:
+            so = Solver(query, data, cf, normalize=False, result_length=100, max_subset_size=3,
+                        incremental_enumeration=True)
+            expected = sorted(so.get_cost_for_subset(query, subset) for subset in so.get_all_subsets(data))
+            self.assertListEqual([cost for cost, _ in so.get_best_subsets_incrementally(query, data)], expected)
+            so.keyword_coverage = True
+            expected = sorted(so.get_cost_for_subset(query, subset)
+                              for subset in so.get_all_covering_subsets(query, data))
+            self.assertListEqual([cost for cost, _ in so.get_best_subsets_incrementally(query, data)], expected)
+            so.result_length = 2
+            self.assertListEqual([cost for cost, _ in so.get_best_subsets_incrementally(query, data)], expected[:2])
+
+    def test_get_best_subsets_by_parallel_branch_and_bound(self):
+        query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        data = [KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor']),
+                KeywordCoordinate('kwc2', 0.5, 0.5, ['food']),
+                KeywordCoordinate('kwc3', 0.2, 0.3, ['outdoor', 'family']),
+                KeywordCoordinate('kwc4', 4, 4, ['sports']),
+                KeywordCoordinate('kwc5', 0.1, 0.9, ['food', 'sports'])]
+        cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+        so = Solver(query, data, cf, normalize=False, result_length=3, max_subset_size=3,
+                    max_number_of_concurrent_processes=2, parallel_branch_and_bound=True)
+        expected = sorted(so.get_cost_for_subset(query, subset) for subset in so.get_all_subsets(data))[:3]
+        results = so.get_best_subsets_by_parallel_branch_and_bound(query, data)
+        self.assertListEqual([cost for cost, _ in results], expected)
+        # The bound is the result_length-th best cost of a single branch, which is at least the overall one
+        self.assertGreaterEqual(so.shared_bound, expected[-1])
+        self.assertGreater(so.pruned_branches, 0)
+        # The search runs on the worker pool of the solver, which is reused by the next search
+        pool = so.get_worker_pool()
+        number_of_tasks = pool.number_of_tasks
+        self.assertGreater(number_of_tasks, 0)
+        so.keyword_coverage = True
+        expected = sorted(so.get_cost_for_subset(query, subset)
+                          for subset in so.get_all_covering_subsets(query, data))[:3]
+        results = so.get_best_subsets_by_parallel_branch_and_bound(query, data)
+        self.assertListEqual([cost for cost, _ in results], expected)
+        self.assertIs(so.get_worker_pool(), pool)
+        self.assertGreater(pool.number_of_tasks, number_of_tasks)
+        with self.assertRaises(ValueError):
+            Solver(query, data, Type3(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4),
+                   parallel_branch_and_bound=True)
+        so = Solver(query, data, MonotoneType1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                                               disable_thresholds=True), normalize=False, result_length=3,
+                    max_subset_size=3, max_number_of_concurrent_processes=2, parallel_branch_and_bound=True)
+        expected = sorted(so.get_cost_for_subset(query, subset) for subset in so.get_all_subsets(data))[:3]
+        self.assertListEqual([cost for cost, _ in so.get_best_subsets_by_parallel_branch_and_bound(query, data)],
+                             expected)
@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from src.utils.benchmark_utils import measure_import_time
+
+
+class TestStartup(TestCase):
+    # Generous upper bound. Importing the solver used to take more than a second because of spaCy, pandas and sklearn.
+    MAX_IMPORT_TIME = 0.5
+
+    def test_naive_solver_import_time(self):
+        timings = []
+        for repetition in range(3):
+            timing, heavy_modules = measure_import_time('src.solvers.naive_solver',
+                                                        ['pandas', 'sklearn', 'spacy', 'en_core_web_lg'])
+            self.assertListEqual(heavy_modules, [])
+            timings.append(timing)
+        self.assertLess(min(timings), self.MAX_IMPORT_TIME)
+
+    def test_data_handler_import(self):
+        timing, heavy_modules = measure_import_time('src.utils.data_handler', ['pandas', 'sklearn'])
+        self.assertListEqual(heavy_modules, [])
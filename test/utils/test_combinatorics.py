@@ -0,0 +1,46 @@
+import itertools
+import pickle
+from unittest import TestCase
+
+from src.utils.combinatorics import Combinations, count_combinations, iterate_combinations, next_combination, \
+    rank_combination, unrank_combination
+
+
+class TestCombinatorics(TestCase):
+    def test_count_combinations(self):
+        self.assertEqual(count_combinations(4, 2), 10)
+        self.assertEqual(count_combinations(4, 10), 15)
+        self.assertEqual(count_combinations(0, 3), 0)
+
+    def test_unrank_combination(self):
+        for rank, combination in enumerate(itertools.combinations(range(6), 3)):
+            self.assertTupleEqual(unrank_combination(rank, 6, 3), combination)
+            self.assertEqual(rank_combination(combination, 6), rank)
+        self.assertRaises(ValueError, unrank_combination, 20, 6, 3)
+
+    def test_next_combination(self):
+        combination = [0, 3, 4]
+        self.assertTrue(next_combination(combination, 5))
+        self.assertListEqual(combination, [1, 2, 3])
+        combination = [2, 3, 4]
+        self.assertFalse(next_combination(combination, 5))
+        self.assertListEqual(combination, [2, 3, 4])
+
+    def test_iterate_combinations(self):
+        expected = [combination for size in range(1, 4) for combination in itertools.combinations(range(5), size)]
+        self.assertListEqual(list(iterate_combinations(5, 3, 0, len(expected))), expected)
+        self.assertListEqual(list(iterate_combinations(5, 3, 3, 17)), expected[3:17])
+        self.assertListEqual(list(iterate_combinations(5, 3, 24, 100)), expected[24:])
+        self.assertListEqual(list(iterate_combinations(5, 3, 30, 40)), [])
+
+    def test_combinations(self):
+        combinations = Combinations(['a', 'b', 'c', 'd'], 2)
+        self.assertEqual(len(combinations), 10)
+        self.assertTupleEqual(combinations[0], ('a',))
+        self.assertTupleEqual(combinations[4], ('a', 'b'))
+        self.assertTupleEqual(combinations[-1], ('c', 'd'))
+        self.assertListEqual(combinations[3:6], [('d',), ('a', 'b'), ('a', 'c')])
+        self.assertListEqual(list(combinations), combinations[:])
+        self.assertRaises(IndexError, combinations.__getitem__, 10)
+        unpickled_combinations = pickle.loads(pickle.dumps(combinations))
+        self.assertListEqual(unpickled_combinations[2:8], combinations[2:8])
@@ -0,0 +1,58 @@
+import concurrent.futures
+import logging
+from unittest import TestCase
+
+from src.utils.logging_utils import start_queue_logging, stop_queue_logging, get_worker_logging_arguments, \
+    initialize_worker_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def log_from_worker(message):
+    logging.getLogger('src.test_worker').info(message)
+    return True
+
+
+class TestLoggingUtils(TestCase):
+    def setUp(self):
+        self.root_logger = logging.getLogger()
+        self.original_handlers = list(self.root_logger.handlers)
+        self.original_level = self.root_logger.level
+        for handler in self.original_handlers:
+            self.root_logger.removeHandler(handler)
+        self.handler = ListHandler()
+        self.root_logger.addHandler(self.handler)
+        self.root_logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        stop_queue_logging()
+        self.root_logger.removeHandler(self.handler)
+        for handler in self.original_handlers:
+            self.root_logger.addHandler(handler)
+        self.root_logger.setLevel(self.original_level)
+
+    def test_queue_logging(self):
+        start_queue_logging()
+        self.assertEqual(len(self.root_logger.handlers), 1)
+        self.assertIsInstance(self.root_logger.handlers[0], logging.handlers.QueueHandler)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2, initializer=initialize_worker_logging,
+                                                    initargs=get_worker_logging_arguments()) as executor:
+            futures = [executor.submit(log_from_worker, 'worker {}'.format(index)) for index in range(4)]
+            for future in futures:
+                self.assertTrue(future.result())
+        logging.getLogger('src.test_parent').info('parent')
+        stop_queue_logging()
+        self.assertEqual(self.root_logger.handlers, [self.handler])
+        self.assertEqual(sorted(self.handler.messages), ['parent', 'worker 0', 'worker 1', 'worker 2', 'worker 3'])
+
+    def test_synchronous_logging(self):
+        self.assertEqual(get_worker_logging_arguments()[0], None)
+        logging.getLogger('src.test_parent').info('parent')
+        self.assertEqual(self.handler.messages, ['parent'])
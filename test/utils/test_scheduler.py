@@ -0,0 +1,63 @@
+import concurrent.futures
+import time
+from unittest import TestCase
+
+from src.utils.scheduler import ChunkSizer, DynamicScheduler, UtilizationReport
+
+
+def get_squares(offset: int, start: int, end: int):
+    return [offset + index * index for index in range(start, end)]
+
+
+def sleep_skewed(expensive_items: int, start: int, end: int):
+    for index in range(start, end):
+        time.sleep(0.01 if index < expensive_items else 0.0005)
+
+
+class TestScheduler(TestCase):
+    def test_chunk_sizer(self):
+        chunk_sizer = ChunkSizer(2, target_chunk_seconds=0.1, initial_chunk_size=8)
+        self.assertEqual(chunk_sizer.get_chunk_size(1000), 8)
+        self.assertEqual(chunk_sizer.get_chunk_size(3), 1)
+        chunk_sizer.record(100, 0.1)
+        self.assertEqual(chunk_sizer.get_chunk_size(1000), 100)
+        chunk_sizer.record(300, 0.1)
+        self.assertEqual(chunk_sizer.get_chunk_size(1000), 200)
+        # The last chunks get smaller so the workers finish together
+        self.assertEqual(chunk_sizer.get_chunk_size(100), 25)
+
+    def test_utilization_report(self):
+        # The first half of the items takes three times as long as the second half
+        report = UtilizationReport(2, 8, 2.0, {1: 2.0, 2: 2.0}, [(0, 4, 3.0), (4, 8, 1.0)])
+        self.assertAlmostEqual(report.utilization, 1.0)
+        self.assertAlmostEqual(report.idle_time, 0.0)
+        self.assertListEqual(report.get_static_busy_times(), [3.0, 1.0])
+        self.assertAlmostEqual(report.static_idle_time, 2.0)
+        self.assertAlmostEqual(report.removed_idle_time, 2.0)
+        # The overhead of the run is part of the idle time, but not of the removed idle time
+        report = UtilizationReport(2, 8, 3.0, {1: 2.0, 2: 2.0}, [(0, 4, 2.0), (4, 8, 2.0)])
+        self.assertAlmostEqual(report.idle_time, 2.0)
+        self.assertAlmostEqual(report.compute_idle_time, 0.0)
+        self.assertAlmostEqual(report.removed_idle_time, 0.0)
+        report = UtilizationReport(2, 3, 1.0, {1: 1.0}, [(0, 3, 1.0)])
+        self.assertAlmostEqual(report.utilization, 0.5)
+        self.assertAlmostEqual(report.get_static_busy_times()[0], 2 / 3)
+
+    def test_run(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            scheduler = DynamicScheduler(executor, 2, initial_chunk_size=3)
+            result = scheduler.run(get_squares, (10,), 50)
+        self.assertListEqual([value for chunk in result for value in chunk], get_squares(10, 0, 50))
+        self.assertEqual(scheduler.report.number_of_items, 50)
+        self.assertEqual(sum(end - start for start, end, seconds in scheduler.report.chunks), 50)
+        self.assertListEqual(scheduler.run(get_squares, (0,), 0), [])
+
+    def test_removed_idle_time(self):
+        # The first quarter of the items takes 20 times as long, so a static split leaves one worker idle
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            scheduler = DynamicScheduler(executor, 2, initial_chunk_size=2)
+            scheduler.run(sleep_skewed, (10,), 40)
+        report = scheduler.report
+        self.assertEqual(len(report.busy_times), 2)
+        self.assertGreater(report.static_idle_time, report.compute_idle_time)
+        self.assertGreater(report.removed_idle_time, 0.0)
@@ -0,0 +1,37 @@
+import pickle
+from unittest import TestCase
+
+import numpy as np
+
+from src.utils.shared_arrays import SharedArray
+
+
+class TestSharedArray(TestCase):
+    def test_instantiation(self):
+        shared_array = SharedArray(np.array([[1.0, 2.0], [3.0, 4.0]]))
+        self.assertTrue(shared_array.is_owner)
+        self.assertListEqual(shared_array.array.tolist(), [[1.0, 2.0], [3.0, 4.0]])
+        self.assertFalse(shared_array.array.flags.writeable)
+        self.assertEqual(shared_array.nbytes, 32)
+        shared_array.close()
+        self.assertIsNone(shared_array.array)
+
+    def test_pickle(self):
+        shared_array = SharedArray(np.array(['food', 'family']))
+        pickled = pickle.dumps(shared_array)
+        unpickled_array = pickle.loads(pickled)
+        self.assertFalse(unpickled_array.is_owner)
+        self.assertEqual(unpickled_array.name, shared_array.name)
+        self.assertListEqual(unpickled_array.array.tolist(), ['food', 'family'])
+        # Only the name of the block is pickled, not the data
+        self.assertLess(len(pickled), len(pickle.dumps(np.zeros(100))))
+
+    def test_object_array(self):
+        self.assertRaises(ValueError, SharedArray, np.array([{'a'}, None]))
+
+    def test_writeable(self):
+        shared_array = SharedArray(np.array([2.0]), writeable=True)
+        unpickled_array = pickle.loads(pickle.dumps(shared_array))
+        self.assertTrue(unpickled_array.array.flags.writeable)
+        unpickled_array.array[0] = 1.0
+        self.assertEqual(shared_array.array[0], 1.0)
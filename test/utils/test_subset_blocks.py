@@ -0,0 +1,69 @@
+import itertools
+from unittest import TestCase
+
+from src.costfunctions.type1 import Type1
+from src.costfunctions.type4 import Type4
+from src.metrics.distance_metrics import euclidean_distance, geographic_distance
+from src.metrics.similarity_metrics import combined_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.utils.subset_blocks import SubsetBlocks, calculate_in_threads, get_distances, get_subset_blocks
+
+
+class Type4Subclass(Type4):
+    pass
+
+
+class TestSubsetBlocks(TestCase):
+    def setUp(self):
+        self.query = KeywordCoordinate('query', 41.65, -0.88, ['family', 'food', 'outdoor'])
+        self.data = [KeywordCoordinate('kwc1', 41.651, -0.881, ['family', 'food', 'outdoor']),
+                     KeywordCoordinate('kwc2', 41.652, -0.885, ['food']),
+                     KeywordCoordinate('kwc3', 41.658, -0.882, ['outdoor']),
+                     KeywordCoordinate('kwc4', 41.655, -0.887, ['sports'])]
+        self.subsets = [subset for size in range(1, 4) for subset in itertools.combinations(self.data, size)]
+
+    def test_instantiation(self):
+        subset_blocks = SubsetBlocks(self.subsets, block_size=5)
+        self.assertEqual(len(subset_blocks.pois), 4)
+        # 4 subsets of size 1, 6 of size 2 in two blocks and 4 of size 3
+        self.assertListEqual([len(positions) for positions, _ in subset_blocks.blocks], [4, 5, 1, 4])
+        positions, indices = subset_blocks.blocks[1]
+        self.assertTupleEqual(tuple(subset_blocks.pois[index] for index in indices[0]), self.subsets[positions[0]])
+
+    def test_get_distances(self):
+        for distance_metric in (euclidean_distance, geographic_distance):
+            distances = get_distances(self.data[0].coordinates.x, self.data[0].coordinates.y,
+                                      self.data[1].coordinates.x, self.data[1].coordinates.y, distance_metric.__name__)
+            self.assertAlmostEqual(float(distances), distance_metric(self.data[0].coordinates,
+                                                                     self.data[1].coordinates), delta=0.000001)
+        self.assertRaises(ValueError, get_distances, 0.0, 0.0, 1.0, 1.0, 'manhattan_distance')
+
+    def test_calculate_in_threads(self):
+        for cost_function in [Type1(geographic_distance, combined_cosine_similarity, 0.3, 0.3, 0.4),
+                              Type4(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, 2.0, 2.0,
+                                    disable_thresholds=True),
+                              Type4Subclass(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, 3.0, 2.0,
+                                            disable_thresholds=True)]:
+            results = calculate_in_threads('get_minimum_for_dataset', cost_function, self.subsets, max_workers=2)
+            for result, subset in zip(results, self.subsets):
+                self.assertAlmostEqual(result, cost_function.get_minimum_for_dataset(subset), delta=0.000001)
+            results = calculate_in_threads('solve', cost_function, self.subsets, self.query, max_workers=2)
+            for result, subset in zip(results, self.subsets):
+                self.assertAlmostEqual(result, cost_function.solve(self.query, subset), delta=0.000001)
+        # Precalculated values are looked up subset by subset
+        cost_function = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4,
+                              precalculated_query_dataset_dict={frozenset(subset): 1.0 for subset in self.subsets})
+        self.assertListEqual(calculate_in_threads('get_maximum_for_query', cost_function, self.subsets, self.query, 2),
+                             [1.0] * len(self.subsets))
+        self.assertRaises(ValueError, calculate_in_threads, 'get_cost_from_components', cost_function, self.subsets)
+
+    def test_get_subset_blocks(self):
+        subset_blocks = get_subset_blocks(self.subsets)
+        self.assertIs(get_subset_blocks(self.subsets), subset_blocks)
+        # A list which replaces a freed list of the same length may get the same id
+        subsets = [tuple(KeywordCoordinate(kwc.name, kwc.coordinates.x * 2, kwc.coordinates.y * 2, kwc.keywords)
+                         for kwc in subset) for subset in self.subsets]
+        del self.subsets
+        other_subset_blocks = get_subset_blocks(subsets)
+        self.assertIsNot(other_subset_blocks, subset_blocks)
+        self.assertAlmostEqual(other_subset_blocks.x[0], 83.302, delta=0.000001)
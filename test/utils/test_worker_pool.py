@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+import numpy as np
+
+from src.costfunctions.type1 import Type1
+from src.metrics.distance_metrics import euclidean_distance
+from src.metrics.similarity_metrics import combined_cosine_similarity, word2vec_cosine_similarity
+from src.model.keyword_coordinate import KeywordCoordinate
+from src.utils.combinatorics import Combinations
+from src.utils.worker_pool import get_index_ranges, get_worker_pool, shutdown_worker_pool
+
+
+class TestWorkerPool(TestCase):
+    def setUp(self):
+        self.query = KeywordCoordinate('query', 0, 0, ['family', 'food', 'outdoor'])
+        kwc1 = KeywordCoordinate('kwc1', 1, 1, ['family', 'food', 'outdoor'])
+        kwc2 = KeywordCoordinate('kwc2', 2, 2, ['food'])
+        kwc3 = KeywordCoordinate('kwc3', 3, 3, ['outdoor'])
+        self.subsets = [(kwc1,), (kwc2,), (kwc3,), (kwc1, kwc2), (kwc1, kwc3), (kwc2, kwc3), (kwc1, kwc2, kwc3)]
+        self.cf = Type1(euclidean_distance, combined_cosine_similarity, 0.3, 0.3, 0.4, disable_thresholds=True)
+
+    def tearDown(self):
+        shutdown_worker_pool()
+
+    def test_get_index_ranges(self):
+        self.assertListEqual(get_index_ranges(10, 3), [(0, 4), (4, 8), (8, 10)])
+        self.assertListEqual(get_index_ranges(2, 4), [(0, 1), (1, 2)])
+        self.assertListEqual(get_index_ranges(5, 1), [(0, 5)])
+        self.assertListEqual(get_index_ranges(0, 4), [])
+
+    def test_calculate(self):
+        pool = get_worker_pool(2, self.cf, self.subsets)
+        self.assertListEqual(pool.calculate('get_maximum_for_dataset'),
+                             [self.cf.get_maximum_for_dataset(subset) for subset in self.subsets])
+        self.assertListEqual(pool.calculate('get_minimum_for_query', self.query, balance=False),
+                             [self.cf.get_minimum_for_query(self.query, subset) for subset in self.subsets])
+        self.assertListEqual(pool.calculate('solve', self.query),
+                             [self.cf.solve(self.query, subset) for subset in self.subsets])
+        self.assertListEqual(pool.calculate('get_maximum_for_query', self.query, dynamic=True),
+                             [self.cf.get_maximum_for_query(self.query, subset) for subset in self.subsets])
+        self.assertEqual(pool.utilization_report.number_of_items, len(self.subsets))
+        with self.assertRaises(ValueError):
+            pool.calculate('get_cost_from_components', self.query)
+
+    def test_get_worker_pool(self):
+        pool = get_worker_pool(2, self.cf, self.subsets)
+        self.assertIs(get_worker_pool(2, self.cf, self.subsets), pool)
+        # Replacing a precalculated dict changes the payload of the workers
+        self.cf.precalculated_inter_dataset_dict = {frozenset(subset): 0.0 for subset in self.subsets}
+        new_pool = get_worker_pool(2, self.cf, self.subsets)
+        self.assertIsNot(new_pool, pool)
+        self.assertListEqual(new_pool.calculate('get_maximum_for_dataset'), [0.0] * len(self.subsets))
+        self.assertIsNot(get_worker_pool(2, self.cf, self.subsets[:3]), new_pool)
+
+    def test_shared_memory(self):
+        model = {'family': np.array([1.0, 0.0]), 'food': np.array([0.0, 1.0]), 'outdoor': np.array([1.0, 1.0])}
+        cf = Type1(euclidean_distance, word2vec_cosine_similarity, 0.3, 0.3, 0.4, model=model,
+                   disable_thresholds=True)
+        pool = get_worker_pool(2, cf, self.subsets, shared_memory=True)
+        self.assertIsNot(get_worker_pool(2, cf, self.subsets), pool)
+        pool = get_worker_pool(2, cf, self.subsets, shared_memory=True)
+        self.assertTrue(pool.shared_payload[1][0][0].table.is_shared)
+        self.assertIs(cf.model, model)
+        self.assertListEqual(pool.calculate('solve', self.query), [cf.solve(self.query, subset) for subset in self.subsets])
+
+    def test_calculate_best(self):
+        pool = get_worker_pool(2, self.cf, self.subsets)
+        expected = sorted(((self.cf.solve(self.query, subset), subset) for subset in self.subsets),
+                          key=lambda x: x[0])[:3]
+        self.assertListEqual([cost for cost, subset in pool.calculate_best(self.query, 3)],
+                             [cost for cost, subset in expected])
+        combinations = Combinations([subset[0] for subset in self.subsets[:3]])
+        for shared_memory in (False, True):
+            pool = get_worker_pool(2, self.cf, combinations, shared_memory=shared_memory)
+            result = pool.calculate_best(self.query, 3, balance=False)
+            self.assertListEqual([cost for cost, subset in result], [cost for cost, subset in expected])
+            self.assertSetEqual({frozenset(subset) for cost, subset in result},
+                                {frozenset(subset) for cost, subset in expected})